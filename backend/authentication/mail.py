@@ -0,0 +1,176 @@
+"""
+batched outgoing mail.
+
+`send_email_task` renders its email and queues it as an OutgoingEmail
+instead of sending it. The first email queued schedules a flush WINDOW
+seconds later, which sends everything queued by then over a single
+connection of the email backend, BATCH_SIZE emails per connection, so
+spikes of registrations or staff changes cost one SMTP session per
+batch instead of one per email. Queued emails survive a worker restart
+and celery beat flushes the queue every minute in case a scheduled
+flush was lost.
+
+A flush claims its batch in a short transaction and sends it outside of
+any, so no row lock or transaction is held during the SMTP session. A
+batch whose flush died is claimed again CLAIM_TIMEOUT seconds later, so
+its emails may be sent twice but are never lost.
+
+Throughput counters are kept in the default cache, see `stats`.
+"""
+import datetime
+import logging
+import smtplib
+import time
+import uuid
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from utils.email import render_email
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+WINDOW = getattr(settings, "EMAIL_BATCH_WINDOW", 5)
+# SMTP servers limit the messages of a session, e.g. 100 for gmail
+BATCH_SIZE = getattr(settings, "EMAIL_BATCH_SIZE", 100)
+# longer than an SMTP session of BATCH_SIZE emails
+CLAIM_TIMEOUT = getattr(settings, "EMAIL_CLAIM_TIMEOUT", 10 * 60)
+SCHEDULED_KEY = "mail:flush-scheduled"
+SENT_KEY = "mail:sent"
+FAILED_KEY = "mail:failed"
+BATCHES_KEY = "mail:batches"
+SENDING_TIME_KEY = "mail:sending-ms"
+COUNTER_KEYS = [SENT_KEY, FAILED_KEY, BATCHES_KEY, SENDING_TIME_KEY]
+
+
+def _count(key: str, delta: int):
+    if delta <= 0:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def queue_email(template_path, recipient, link, site_name, **kwargs) -> bool:
+    """
+    queues an email. Returns True when no flush is scheduled yet, the
+    caller then schedules one WINDOW seconds later.
+    """
+    message = render_email(template_path, recipient, link, site_name, **kwargs)
+    OutgoingEmail.objects.create(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email,
+        recipient=recipient,
+    )
+    return cache.add(SCHEDULED_KEY, True, WINDOW)
+
+
+def claim_emails(batch_size: int = BATCH_SIZE) -> List[OutgoingEmail]:
+    """
+    claims up to batch_size queued emails that no live flush claimed,
+    and returns them.
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=CLAIM_TIMEOUT)
+    with transaction.atomic():
+        # concurrent flushes claim different emails
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(Q(claim="") | Q(date_claimed__lt=stale))
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(id__in=ids).update(claim=token, date_claimed=now)
+    return list(OutgoingEmail.objects.filter(claim=token).order_by("id"))
+
+
+def flush_outbox(batch_size: int = BATCH_SIZE) -> int:
+    """
+    sends up to batch_size queued emails over one connection. Emails
+    refused by the server are dropped, other errors are raised after the
+    emails sent so far are removed from the queue and the others are
+    released. Returns the number of emails sent or dropped.
+    """
+    # emails queued from now on schedule another flush
+    cache.delete(SCHEDULED_KEY)
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0
+    sent, failed, error = [], [], None
+    start = time.perf_counter()
+    connection = get_connection()
+    try:
+        connection.open()
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                [email.recipient],
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError):
+                logger.exception("Email to %s refused", email.recipient)
+                failed.append(email.id)
+                continue
+            sent.append(email.id)
+    except Exception as exception:
+        error = exception
+    finally:
+        connection.close()
+    OutgoingEmail.objects.filter(id__in=sent + failed).delete()
+    if error is not None:
+        # the next flush retries the others right away
+        OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            claim="", date_claimed=None
+        )
+    _count(SENT_KEY, len(sent))
+    _count(FAILED_KEY, len(failed))
+    _count(BATCHES_KEY, 1)
+    _count(SENDING_TIME_KEY, round((time.perf_counter() - start) * 1000))
+    if error is not None:
+        raise error
+    return len(sent) + len(failed)
+
+
+def flush_all(batch_size: int = BATCH_SIZE) -> int:
+    """sends every queued email, a batch at a time"""
+    total = 0
+    while True:
+        flushed = flush_outbox(batch_size)
+        total += flushed
+        # fewer emails than a batch are left, or claimed by another flush
+        if flushed < batch_size:
+            return total
+
+
+def stats() -> Dict[str, float]:
+    """returns the throughput counters of outgoing mail"""
+    counters = cache.get_many(COUNTER_KEYS)
+    sent = counters.get(SENT_KEY, 0)
+    batches = counters.get(BATCHES_KEY, 0)
+    seconds = counters.get(SENDING_TIME_KEY, 0) / 1000
+    return {
+        "sent": sent,
+        "failed": counters.get(FAILED_KEY, 0),
+        "batches": batches,
+        "queued": OutgoingEmail.objects.count(),
+        "emails_per_batch": round(sent / batches, 2) if batches else 0,
+        "emails_per_second": round(sent / seconds, 2) if seconds else 0,
+    }
+
+
+def reset_stats():
+    cache.delete_many(COUNTER_KEYS)
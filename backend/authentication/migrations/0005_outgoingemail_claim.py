@@ -0,0 +1,23 @@
+# Generated by Django 4.0 on 2026-10-18 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0004_outgoingemail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outgoingemail",
+            name="claim",
+            field=models.CharField(blank=True, db_index=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name="outgoingemail",
+            name="date_claimed",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
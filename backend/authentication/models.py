@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -9,6 +10,17 @@ class User(AbstractUser):
     bio = models.CharField(max_length=200, blank=True)
     is_verified = models.BooleanField(default=False)
     avatar = models.ImageField(upload_to="avatar/", default="avatar.jpg", blank=True)
+    # see common.images
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # indexed for keyset pagination of the user list
+    date_joined = models.DateTimeField(
+        _("date joined"), default=timezone.now, db_index=True
+    )
+
+    def save(self, *args, **kwargs):
+        # post_save receivers update derived data in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def get_tokens_for_user(self):
         refresh = RefreshToken.for_user(self)
@@ -34,3 +46,18 @@ class User(AbstractUser):
 
     def get_number_of_unverified_questions(self) -> int:
         return self.questions.filter(is_verified=False).count()
+
+
+class OutgoingEmail(models.Model):
+    """
+    an email waiting for the next batch, see authentication.mail.
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField()
+    date_created = models.DateTimeField(auto_now_add=True)
+    # the flush sending the email, see authentication.mail.claim_emails
+    claim = models.CharField(max_length=32, blank=True, db_index=True)
+    date_claimed = models.DateTimeField(null=True, blank=True)
@@ -1,3 +1,4 @@
+from common.images import VariantsField
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -101,6 +102,8 @@ class ChangePasswordSerializer(serializers.Serializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_variants = VariantsField("avatar")
+
     class Meta:
         model = User
         fields = [
@@ -110,6 +113,7 @@ class UserSerializer(serializers.ModelSerializer):
             "last_name",
             "bio",
             "avatar",
+            "avatar_variants",
             "is_staff",
         ]
 
@@ -180,6 +184,8 @@ class NewPasswordSerializer(serializers.Serializer):
 
 
 class AdminUserSerializer(serializers.ModelSerializer):
+    avatar_variants = VariantsField("avatar")
+
     class Meta:
         model = User
         fields = [
@@ -192,4 +198,5 @@ class AdminUserSerializer(serializers.ModelSerializer):
             "is_superuser",
             "date_joined",
             "avatar",
+            "avatar_variants",
         ]
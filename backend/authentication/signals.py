@@ -0,0 +1,15 @@
+from common.tasks import schedule_image_processing, schedule_variants_deletion
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def process_avatar(sender, instance, **kwargs):
+    schedule_image_processing(instance, "avatar", "avatar_variants")
+
+
+@receiver(post_delete, sender=User)
+def delete_avatar_variants(sender, instance, **kwargs):
+    schedule_variants_deletion(instance, "avatar", "avatar_variants")
@@ -1,7 +1,20 @@
+import smtplib
+
 from celery import shared_task
-from utils.email import send_email
+
+from . import mail
 
 
 @shared_task
 def send_email_task(template_path, recipient, link, site_name, **kwargs):
-    send_email(template_path, recipient, link, site_name, **kwargs)
+    if mail.queue_email(template_path, recipient, link, site_name, **kwargs):
+        flush_outbox_task.apply_async(countdown=mail.WINDOW)
+
+
+@shared_task(
+    autoretry_for=(smtplib.SMTPException, OSError),
+    retry_backoff=True,
+    max_retries=5,
+)
+def flush_outbox_task():
+    return mail.flush_all()
@@ -0,0 +1,148 @@
+import datetime
+import smtplib
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail as outbox
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from utils.email import compiled_template
+from utils.testing import run_tasks_eagerly
+
+from .. import mail
+from ..models import OutgoingEmail
+from ..tasks import send_email_task
+
+User = get_user_model()
+EMAIL_STATS_URL = reverse("authentication:email-stats")
+TEMPLATE = "authentication/now_staff_mail.html"
+
+
+class RefusingBackend(EmailBackend):
+    """refuses the emails to refused@example.com"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "refused@example.com" in message.to:
+                raise smtplib.SMTPRecipientsRefused({})
+        return super().send_messages(messages)
+
+
+class ClaimCheckingBackend(EmailBackend):
+    """records whether every queued email was claimed while sending"""
+
+    claimed = []
+
+    def send_messages(self, messages):
+        ClaimCheckingBackend.claimed.append(
+            not OutgoingEmail.objects.filter(claim="").exists()
+        )
+        return super().send_messages(messages)
+
+
+class UnreachableBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError()
+
+
+class BatchedMailTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        run_tasks_eagerly(self)
+
+    def queue(self, *recipients):
+        # a flush is already scheduled, so the emails wait for it
+        cache.set(mail.SCHEDULED_KEY, True)
+        for recipient in recipients:
+            send_email_task.delay(TEMPLATE, recipient, link="", site_name="QuizBank")
+
+    def test_task_sends_after_window(self):
+        with mock.patch.object(mail, "WINDOW", 0):
+            send_email_task.delay(TEMPLATE, "a@example.com", "", "QuizBank")
+        self.assertEqual(len(outbox.outbox), 1)
+        self.assertEqual(outbox.outbox[0].to, ["a@example.com"])
+        self.assertIn("You have been made a staff user", outbox.outbox[0].body)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_one_connection_per_batch(self):
+        self.queue("a@example.com", "b@example.com", "c@example.com")
+        self.assertEqual(len(outbox.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+        with mock.patch.object(
+            mail, "get_connection", wraps=get_connection
+        ) as connections:
+            self.assertEqual(mail.flush_all(batch_size=2), 3)
+        self.assertEqual(connections.call_count, 2)
+        self.assertEqual(
+            [message.to[0] for message in outbox.outbox],
+            ["a@example.com", "b@example.com", "c@example.com"],
+        )
+        stats = mail.stats()
+        self.assertEqual((stats["sent"], stats["batches"], stats["queued"]), (3, 2, 0))
+        self.assertEqual(stats["emails_per_batch"], 1.5)
+
+    @override_settings(EMAIL_BACKEND=f"{__name__}.RefusingBackend")
+    def test_refused_emails_dropped(self):
+        self.queue("a@example.com", "refused@example.com", "c@example.com")
+        with self.assertLogs("authentication.mail", "ERROR"):
+            mail.flush_all()
+        self.assertEqual(len(outbox.outbox), 2)
+        self.assertFalse(OutgoingEmail.objects.exists())
+        self.assertEqual(mail.stats()["failed"], 1)
+
+    @override_settings(EMAIL_BACKEND=f"{__name__}.UnreachableBackend")
+    def test_unreachable_server_keeps_queue(self):
+        self.queue("a@example.com")
+        with self.assertRaises(ConnectionRefusedError):
+            mail.flush_outbox()
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+        # released for the next flush
+        self.assertEqual(OutgoingEmail.objects.get().claim, "")
+
+    @override_settings(EMAIL_BACKEND=f"{__name__}.ClaimCheckingBackend")
+    def test_claimed_while_sending(self):
+        ClaimCheckingBackend.claimed = []
+        self.queue("a@example.com", "b@example.com")
+        self.assertEqual(mail.flush_outbox(), 2)
+        self.assertEqual(ClaimCheckingBackend.claimed, [True, True])
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_stale_claims_taken_over(self):
+        self.queue("a@example.com", "b@example.com")
+        first, second = OutgoingEmail.objects.order_by("id")
+        now = timezone.now()
+        first.claim, first.date_claimed = "live", now
+        first.save()
+        second.claim = "dead"
+        second.date_claimed = now - datetime.timedelta(seconds=mail.CLAIM_TIMEOUT + 1)
+        second.save()
+        self.assertEqual(mail.flush_outbox(), 1)
+        self.assertEqual([message.to for message in outbox.outbox], [["b@example.com"]])
+        self.assertEqual(list(OutgoingEmail.objects.all()), [first])
+
+    @override_settings(DEBUG=False)
+    def test_templates_compiled_once(self):
+        self.assertIs(compiled_template(TEMPLATE), compiled_template(TEMPLATE))
+
+
+class EmailStatsViewTest(APITestCase):
+    def test_staff_only(self):
+        user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com"
+        )
+        access_token = user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        response = self.client.get(EMAIL_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(EMAIL_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("emails_per_second", response.data["data"])
@@ -1,7 +1,16 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.urls import reverse
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
+from utils.testing import run_tasks_eagerly
 
 User = get_user_model()
 LOGIN_URL = reverse("authentication:login")
@@ -9,6 +18,7 @@ REGISTER_URL = reverse("authentication:register")
 REFRESH_URL = reverse("authentication:token-refresh")
 CHANGE_PWD_URL = reverse("authentication:change-password")
 PROFILE_URL = reverse("authentication:user-profile")
+USER_LIST_URL = reverse("user-list")
 
 
 class LoginViewTest(APITestCase):
@@ -328,3 +338,67 @@ class UserProfileViewTest(APITestCase):
         self.assertEqual(response.data.get("status"), "success")
         self.assertNotEqual(response.data.get("data")["id"], body["id"])
         self.assertEqual(response.data.get("data")["id"], self.verified_user.id)
+
+    def test_avatar_processed_after_response(self):
+        """
+        the variants of an uploaded avatar are drawn by a task queued once
+        the update is committed, the response does not wait for them.
+        """
+        run_tasks_eagerly(self)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        buffer = io.BytesIO()
+        Image.new("RGB", (1000, 500), "blue").save(buffer, "PNG")
+        avatar = SimpleUploadedFile("me.png", buffer.getvalue(), "image/png")
+        access_token = self.verified_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        with override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.patch(
+                    PROFILE_URL, data={"avatar": avatar}, format="multipart"
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNone(response.data["data"]["avatar_variants"])
+            for callback in callbacks:
+                callback()
+            variants = self.client.get(PROFILE_URL).data["data"]["avatar_variants"]
+        self.assertEqual(set(variants), {"thumbnail", "medium"})
+        self.assertEqual(
+            (variants["thumbnail"]["width"], variants["thumbnail"]["height"]),
+            (200, 100),
+        )
+        self.assertTrue(variants["thumbnail"]["url"].endswith(".webp"))
+
+    def test_default_avatar_not_processed(self):
+        with mock.patch("common.tasks.process_image_task.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                User.objects.create_user(username="new", password="p", email="n@x.com")
+        delay.assert_not_called()
+
+
+class UserListViewTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        for i in range(12):
+            User.objects.create_user(
+                username=f"user{i}", password="dave1234", email=f"u{i}@gmail.com"
+            )
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def test_cursor_pagination(self):
+        response = self.client.get(USER_LIST_URL, {"pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("status"), "success")
+        page = response.data.get("data")
+        self.assertNotIn("count", page)
+        self.assertEqual(len(page["results"]), 10)
+        page = self.client.get(page["next"]).data.get("data")
+        self.assertEqual(len(page["results"]), 3)
+        self.assertIsNone(page["next"])
+        self.assertEqual(page["results"][-1]["username"], "admin")
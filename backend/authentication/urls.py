@@ -3,6 +3,7 @@ from django.urls import path
 from .views import (
     ChangePasswordView,
     CustomTokenRefreshView,
+    EmailStatsView,
     EmailVerificationView,
     LoginView,
     RegisterView,
@@ -33,4 +34,5 @@ urlpatterns = [
     ),
     path("reset-password/set", SetNewPasswordView.as_view(), name="reset-password-set"),
     path("refresh-token", CustomTokenRefreshView.as_view(), name="token-refresh"),
+    path("email-stats", EmailStatsView.as_view(), name="email-stats"),
 ]
@@ -1,4 +1,5 @@
 import jwt
+from common.pagination import PageNumberOrKeysetPagination
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -12,6 +13,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenRefreshView
+from . import mail
 from .tasks import send_email_task
 
 from .serializers import (
@@ -287,6 +289,8 @@ class UserListView(generics.ListAPIView):
     permission_classes = [IsAdminUser]
     authentication_classes = [JWTAuthentication]
     queryset = User.objects.all()
+    pagination_class = PageNumberOrKeysetPagination
+    cursor_field = "date_joined"
 
     def list(self, request, *args, **kwargs):
         data = super().list(request, *args, **kwargs).data
@@ -294,6 +298,24 @@ class UserListView(generics.ListAPIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
+class EmailStatsView(APIView):
+    """
+    returns the throughput counters of outgoing mail and the number of
+    emails waiting for the next batch.
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        data = {
+            "status": "success",
+            "message": "Outgoing mail statistics",
+            "data": mail.stats(),
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class CustomTokenRefreshView(TokenRefreshView):
     def post(self, request, *args, **kwargs):
         data = super().post(request, *args, **kwargs).data
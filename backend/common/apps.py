@@ -6,4 +6,6 @@ class CommonConfig(AppConfig):
     name = "common"
 
     def ready(self):
-        from . import cors_handler
+        from . import cors_handler, signals
+
+        signals.connect()
@@ -0,0 +1,56 @@
+"""
+conditional GET for API views.
+
+A view mixing in ConditionalGetMixin describes the state of its GET
+responses with `get_etag` and `get_last_modified`, which must be cheap to
+compute, e.g. from a version counter. Once the request is authenticated
+and permitted, a matching If-None-Match or If-Modified-Since is answered
+with 304 Not Modified before the handler runs, so nothing is queried or
+serialized. Full responses carry the validators for the next request.
+"""
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    def get_etag(self, request, *args, **kwargs):
+        return None
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if request.method not in ("GET", "HEAD"):
+            return
+        etag = self.get_etag(request, *args, **kwargs)
+        last_modified = self.get_last_modified(request, *args, **kwargs)
+        self.etag = quote_etag(etag) if etag else None
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if getattr(self, "etag", None):
+                response.headers.setdefault("ETag", self.etag)
+            if getattr(self, "last_modified", None):
+                response.headers.setdefault(
+                    "Last-Modified", http_date(self.last_modified)
+                )
+        return response
@@ -0,0 +1,243 @@
+"""
+resized variants of uploaded images.
+
+Images are stored as uploaded, so serving them makes every client
+download the full size original, metadata included. Once an image field
+changes, `schedule_image_processing` (see common.tasks) queues a Celery
+task that draws a copy of the image for every size of VARIANTS,
+re-encoded as WebP without metadata, and records their names and
+dimensions in a JSONField next to the image field:
+
+    {"source": "quiz/cat.png", "width": 3000, "height": 2000,
+     "phash": "2424242424242424",
+     "variants": {"thumbnail": {"name": ..., "width": 200, "height": 133},
+                  "medium": {...}}}
+
+`source` is the image the variants were drawn from, so variants of an
+image that was since replaced are never served. `phash` is a perceptual
+hash of the image, `similar_images` groups the rows whose images are
+near identical by it. Serializers expose the
+variants with `VariantsField`.
+"""
+import io
+import logging
+import posixpath
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# the longest side of every variant, images are never enlarged
+VARIANTS = getattr(settings, "IMAGE_VARIANTS", {"thumbnail": 200, "medium": 800})
+QUALITY = getattr(settings, "IMAGE_VARIANT_QUALITY", 80)
+FORMAT, EXTENSION = ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+# (model, image field, variants field) of every image with variants
+IMAGE_FIELDS = [
+    ("quiz.Question", "image", "image_variants"),
+    ("authentication.User", "avatar", "avatar_variants"),
+]
+HASH_SIZE = 8
+# of the 64 bits of a perceptual hash. Hashes are compared within buckets
+# of equal bytes, which every pair of hashes 7 bits apart or less shares.
+MAX_DISTANCE = 6
+
+# sent with the model class as sender once the variants of an instance
+# are recorded, the update skips post_save
+variants_processed = Signal()
+
+
+def source_name(model, field: str, name: Optional[str]) -> str:
+    """
+    returns the name of an image of field, or "" when it is empty or the
+    default of the field, whose variants are not drawn.
+    """
+    name = name or ""
+    return "" if name == model._meta.get_field(field).default else name
+
+
+def needs_processing(instance, field: str, variants_field: str) -> bool:
+    if {field, variants_field} & instance.get_deferred_fields():
+        return False
+    variants = getattr(instance, variants_field) or {}
+    name = source_name(type(instance), field, getattr(instance, field).name)
+    return variants.get("source", "") != name
+
+
+def variant_name(name: str, variant: str) -> str:
+    directory, filename = posixpath.split(name)
+    stem, _ = posixpath.splitext(filename)
+    return posixpath.join(directory, "variants", f"{stem}-{variant}.{EXTENSION}")
+
+
+def encode(image: Image.Image, size: int):
+    """returns the bytes and dimensions of image shrunk to fit size"""
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if FORMAT == "JPEG" or copy.mode not in ("RGB", "RGBA"):
+        transparent = copy.mode in ("RGBA", "LA", "PA") or "transparency" in copy.info
+        copy = copy.convert("RGBA" if transparent and FORMAT == "WEBP" else "RGB")
+    # exif, icc profiles and comments are only written when passed to save
+    copy.info = {}
+    buffer = io.BytesIO()
+    copy.save(buffer, FORMAT, quality=QUALITY)
+    return buffer.getvalue(), copy.size
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    returns the difference hash of image: one bit for every pair of
+    horizontally adjacent pixels of a 9x8 grayscale copy, set when the
+    left one is brighter. Resized or re-encoded copies of an image differ
+    in a few bits at most.
+    """
+    small = image.convert("L").resize(
+        (HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS
+    )
+    pixels = small.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        for column in range(HASH_SIZE):
+            index = row * (HASH_SIZE + 1) + column
+            value = value << 1 | (pixels[index] > pixels[index + 1])
+    return value
+
+
+def make_variants(storage, name: str) -> dict:
+    """draws and stores the variants of the image name of storage"""
+    with storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    # the orientation tag is dropped with the metadata, so apply it first
+    image = ImageOps.exif_transpose(image)
+    width, height = image.size
+    variants = {}
+    for variant, size in VARIANTS.items():
+        content, (variant_width, variant_height) = encode(image, size)
+        variants[variant] = {
+            "name": storage.save(variant_name(name, variant), ContentFile(content)),
+            "width": variant_width,
+            "height": variant_height,
+        }
+    return {
+        "source": name,
+        "width": width,
+        "height": height,
+        "phash": f"{perceptual_hash(image):016x}",
+        "variants": variants,
+    }
+
+
+def delete_variants(storage, variants: Optional[dict]):
+    for variant in ((variants or {}).get("variants") or {}).values():
+        storage.delete(variant["name"])
+
+
+def process_image(model, pk, field: str, variants_field: str, name: str):
+    """
+    draws the variants of the image name of the field of an instance and
+    records them, unless the image was replaced since. Returns the
+    recorded variants, or None when nothing was done.
+    """
+    row = model._default_manager.filter(pk=pk).values_list(field, variants_field)
+    row = row.first()
+    if row is None or source_name(model, field, row[0]) != name:
+        # deleted or replaced, the task queued by the change handles it
+        return None
+    storage = model._meta.get_field(field).storage
+    old = row[1] or {}
+    data = {}
+    if name:
+        try:
+            data = make_variants(storage, name)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.exception("Could not draw the variants of %s", name)
+            # recorded so the image is not queued again on every save
+            data = {"source": name}
+    delete_variants(storage, old)
+    model._default_manager.filter(pk=pk).update(**{variants_field: data})
+    variants_processed.send(sender=model, pk=pk, variants=data)
+    return data
+
+
+def similar_images(
+    model, field: str, variants_field: str, max_distance: int = MAX_DISTANCE
+) -> List[List]:
+    """
+    returns the primary keys of every group of rows of model whose images
+    are identical or nearly so, going by the perceptual hashes recorded
+    with their variants.
+    """
+    hashes = {}
+    rows = model._default_manager.values_list("pk", field, variants_field)
+    for pk, name, variants in rows.iterator():
+        variants = variants or {}
+        if variants.get("phash") and variants.get("source") == name:
+            hashes[pk] = int(variants["phash"], 16)
+    buckets = {}
+    for pk, value in hashes.items():
+        for band in range(8):
+            buckets.setdefault((band, value >> band * 8 & 0xFF), []).append(pk)
+    parents = {}
+
+    def find(pk):
+        while parents.get(pk, pk) != pk:
+            pk = parents[pk]
+        return pk
+
+    for pks in buckets.values():
+        for i, first in enumerate(pks):
+            for second in pks[i + 1 :]:
+                roots = find(first), find(second)
+                if roots[0] == roots[1]:
+                    continue
+                if bin(hashes[first] ^ hashes[second]).count("1") <= max_distance:
+                    parents[max(roots)] = min(roots)
+    groups = {}
+    for pk in parents:
+        groups.setdefault(find(pk), {find(pk)}).add(pk)
+    return sorted(sorted(group) for group in groups.values())
+
+
+def variant_urls(source: str, variants: Optional[dict], storage, request=None):
+    """
+    returns the url and dimensions of every variant drawn from the image
+    source, or None until they are drawn.
+    """
+    if not source or not variants or variants.get("source") != source:
+        return None
+    urls = {}
+    for variant, data in (variants.get("variants") or {}).items():
+        url = storage.url(data["name"])
+        urls[variant] = {
+            "url": request.build_absolute_uri(url) if request is not None else url,
+            "width": data["width"],
+            "height": data["height"],
+        }
+    return urls or None
+
+
+class VariantsField(serializers.Field):
+    """
+    the variant urls of the image of image_field, read from the model
+    field of the same name as the serializer field.
+    """
+
+    def __init__(self, image_field: str, **kwargs):
+        self.image_field = image_field
+        super().__init__(source="*", read_only=True, **kwargs)
+
+    def to_representation(self, instance):
+        model = type(instance)
+        return variant_urls(
+            source_name(
+                model, self.image_field, getattr(instance, self.image_field).name
+            ),
+            getattr(instance, self.field_name),
+            model._meta.get_field(self.image_field).storage,
+            self.context.get("request"),
+        )
@@ -0,0 +1,132 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# median cold start of every step in milliseconds, generous enough to
+# absorb noise but low enough to catch an import doing real work
+BUDGETS = {
+    "manage.py help": 2500,
+    "config.wsgi": 2000,
+    "celery worker": 2500,
+}
+STEPS = {
+    "manage.py help": ["manage.py", "help"],
+    "config.wsgi": [
+        "-c",
+        "import time; start = time.perf_counter(); import config.wsgi; "
+        "print(time.perf_counter() - start)",
+    ],
+    "celery worker": [
+        "-c",
+        "import time; start = time.perf_counter(); from config.celery import app; "
+        "app.loader.import_default_modules(); print(time.perf_counter() - start)",
+    ],
+}
+IMPORT_TIME_RE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| *(\S+)")
+OTHERS = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the cold start of manage.py, the WSGI application and the "
+        "Celery worker in fresh interpreters, and the import cost of every "
+        "installed app. Fails when a median exceeds its budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument(
+            "--budget",
+            action="append",
+            default=[],
+            metavar="STEP=MS",
+            help=f"Override a budget, steps are {', '.join(BUDGETS)}",
+        )
+
+    def handle(self, *args, **options):
+        budgets = {**BUDGETS, **self.parse_budgets(options["budget"])}
+        rounds = options["rounds"]
+        self.stdout.write(f"{'step':<16} {'median':>10} {'max':>10} {'budget':>10}")
+        over = []
+        for step, args in STEPS.items():
+            timings = sorted(self.time_step(args) for _ in range(rounds))
+            median = statistics.median(timings)
+            self.stdout.write(
+                f"{step:<16} {median:>8.0f}ms {timings[-1]:>8.0f}ms "
+                f"{budgets[step]:>8}ms"
+            )
+            if median > budgets[step]:
+                over.append(step)
+
+        apps, others = self.import_costs()
+        self.stdout.write(f"\n{'app':<24} {'import':>10}")
+        for package, cost in apps:
+            self.stdout.write(f"{package:<24} {cost:>8.1f}ms")
+        self.stdout.write(f"\n{'other package':<24} {'import':>10}")
+        for package, cost in others:
+            self.stdout.write(f"{package:<24} {cost:>8.1f}ms")
+
+        if over:
+            raise CommandError(f"Startup over budget: {', '.join(over)}")
+
+    def parse_budgets(self, values) -> dict:
+        budgets = {}
+        for value in values:
+            step, _, ms = value.rpartition("=")
+            if step not in BUDGETS or not ms.isdigit():
+                raise CommandError(f"Invalid budget {value!r}, expected STEP=MS")
+            budgets[step] = int(ms)
+        return budgets
+
+    def run(self, args):
+        return subprocess.run(
+            [sys.executable, *args],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    def time_step(self, args) -> float:
+        """
+        returns the time taken by args in milliseconds: the time printed
+        by the step when it prints one, else the wall time of the process.
+        """
+        start = time.perf_counter()
+        output = self.run(args).stdout.strip()
+        elapsed = time.perf_counter() - start
+        try:
+            return float(output) * 1000
+        except ValueError:
+            return elapsed * 1000
+
+    def import_costs(self):
+        """
+        returns the time spent importing the modules of every installed
+        app and of the largest other packages in milliseconds, most
+        expensive first.
+
+        Only the time spent in a package's own modules is counted:
+        Django loads apps with import_module, which -X importtime does
+        not report, so the importer of a module cannot be relied on.
+        """
+        packages = {app.split(".")[0] for app in settings.INSTALLED_APPS}
+        packages.add("config")
+        stderr = self.run(["-X", "importtime", "-c", "import config.wsgi"]).stderr
+        costs = {}
+        for line in stderr.splitlines():
+            match = IMPORT_TIME_RE.match(line)
+            if match:
+                package = match.group(2).split(".")[0]
+                costs[package] = costs.get(package, 0) + int(match.group(1)) / 1000
+        apps = [(package, costs.get(package, 0.0)) for package in packages]
+        others = [item for item in costs.items() if item[0] not in packages]
+        others = sorted(others, key=lambda item: item[1], reverse=True)[:OTHERS]
+        return sorted(apps, key=lambda item: item[1], reverse=True), others
@@ -0,0 +1,26 @@
+from common.media import GRACE_PERIOD, collect_blobs, recount_blobs, record_strays
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove the stored files that no row refers to any more, released "
+        "more than --grace-period seconds ago"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-period", type=int, default=GRACE_PERIOD)
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Count the references of every file from the rows first",
+        )
+
+    def handle(self, *args, **options):
+        if options["recount"]:
+            corrected = recount_blobs()
+            self.stdout.write(f"Corrected the references of {corrected} files")
+        recorded = record_strays(options["grace_period"])
+        self.stdout.write(f"Recorded {recorded} files saved without a blob")
+        removed = collect_blobs(options["grace_period"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} files"))
@@ -0,0 +1,33 @@
+from common.images import IMAGE_FIELDS, process_image, source_name
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Draw the variants of the uploaded images that have none yet, e.g. "
+        "images uploaded before variants existed, or of every image with --all"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Draw every variant again"
+        )
+
+    def handle(self, *args, **options):
+        for label, field, variants_field in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            rows = model._default_manager.order_by("pk").values_list(
+                "pk", field, variants_field
+            )
+            total = 0
+            for pk, name, variants in rows.iterator():
+                name = source_name(model, field, name)
+                drawn = (variants or {}).get("source") == name
+                if not name or (drawn and not options["all"]):
+                    continue
+                process_image(model, pk, field, variants_field, name)
+                total += 1
+            self.stdout.write(
+                self.style.SUCCESS(f"Drew the variants of {total} {label} images")
+            )
@@ -0,0 +1,32 @@
+from common.images import IMAGE_FIELDS, MAX_DISTANCE, similar_images
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "List the groups of rows whose images are identical or nearly so, "
+        "e.g. resized or re-encoded copies"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-distance",
+            type=int,
+            default=MAX_DISTANCE,
+            choices=range(8),
+            help="Bits two perceptual hashes may differ by",
+        )
+
+    def handle(self, *args, **options):
+        for label, field, variants_field in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            groups = similar_images(
+                model, field, variants_field, options["max_distance"]
+            )
+            for group in groups:
+                ids = ", ".join(str(pk) for pk in group)
+                self.stdout.write(f"{label} {ids}")
+            self.stdout.write(
+                self.style.SUCCESS(f"{len(groups)} groups of similar {label} images")
+            )
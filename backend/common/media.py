@@ -0,0 +1,148 @@
+"""
+collection of the blobs of ContentAddressedStorage, see common.storage.
+
+A blob is collected once its references were all released a grace
+period ago, so a file saved but not yet committed with its row is never
+removed, and only when no row names it: the names of file fields and of
+image variants (see common.images) are checked before every removal, so
+references that drifted, e.g. through queryset updates, never lose a
+file.
+
+A file whose `MediaBlob` was rolled back with the row that saved it has
+no blob to release. `record_strays` gives such files a released blob
+once they are older than the grace period, so they are collected the
+same way.
+"""
+import datetime
+import posixpath
+import re
+from collections import Counter
+from typing import Iterable, Iterator, Set
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .images import IMAGE_FIELDS, VARIANTS
+from .models import MediaBlob
+from .signals import file_fields
+
+GRACE_PERIOD = getattr(settings, "MEDIA_BLOB_GRACE_PERIOD", 60 * 60)
+CHUNK_SIZE = 500
+# names given by ContentAddressedStorage, other files are never collected
+BLOB_NAME = re.compile(r"^[0-9a-f]{64}(\.[^./]*)?$")
+
+
+def references():
+    """yields the model and lookup of every field naming a file"""
+    for model in apps.get_models():
+        for field in file_fields(model):
+            yield model, field.name
+    for label, _, variants_field in IMAGE_FIELDS:
+        model = apps.get_model(label)
+        for variant in VARIANTS:
+            yield model, f"{variants_field}__variants__{variant}__name"
+
+
+def referenced_names(names: Iterable[str]) -> Set[str]:
+    """returns the names among names that a row refers to"""
+    names = set(names)
+    found = set()
+    for model, lookup in references():
+        rows = model._default_manager.filter(**{f"{lookup}__in": names})
+        found.update(rows.values_list(lookup, flat=True))
+    return found & names
+
+
+def count_references() -> Counter:
+    counts = Counter()
+    for model, lookup in references():
+        rows = model._default_manager.exclude(**{f"{lookup}__isnull": True})
+        counts.update(rows.values_list(lookup, flat=True).iterator())
+    del counts[""]
+    return counts
+
+
+def recount_blobs() -> int:
+    """
+    sets the references of every blob to the number of rows naming it.
+    Returns the number of blobs corrected.
+    """
+    counts = count_references()
+    corrected = []
+    for blob in MediaBlob.objects.iterator():
+        if blob.references != counts[blob.name]:
+            blob.references = counts[blob.name]
+            if blob.references == 0 and blob.date_released is None:
+                blob.date_released = timezone.now()
+            corrected.append(blob)
+    MediaBlob.objects.bulk_update(
+        corrected, ["references", "date_released"], batch_size=CHUNK_SIZE
+    )
+    return len(corrected)
+
+
+def collect_blobs(grace_period: int = GRACE_PERIOD, storage=default_storage) -> int:
+    """
+    removes the blobs released more than grace_period seconds ago that
+    no row names. Returns the number of blobs removed.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=grace_period)
+    released = MediaBlob.objects.filter(references__lte=0, date_released__lte=cutoff)
+    names = list(released.values_list("name", flat=True))
+    removed = 0
+    for start in range(0, len(names), CHUNK_SIZE):
+        chunk = set(names[start : start + CHUNK_SIZE])
+        live = referenced_names(chunk)
+        if live:
+            # references drifted, recount_blobs corrects them
+            MediaBlob.objects.filter(name__in=live).update(date_released=None)
+        for name in chunk - live:
+            # a blob saved again since it was read keeps its file
+            deleted, _ = released.filter(name=name).delete()
+            if deleted:
+                storage.purge(name)
+                removed += 1
+    return removed
+
+
+def blob_names(storage=default_storage, directory: str = "") -> Iterator[str]:
+    """yields the name of every stored file named by its content"""
+    directories, files = storage.listdir(directory)
+    for name in files:
+        if BLOB_NAME.match(name):
+            yield posixpath.join(directory, name)
+    for name in directories:
+        yield from blob_names(storage, posixpath.join(directory, name))
+
+
+def record_strays(grace_period: int = GRACE_PERIOD, storage=default_storage) -> int:
+    """
+    records the files older than grace_period seconds that have no blob,
+    e.g. because the transaction saving them was rolled back, as
+    released blobs. Returns the number of files recorded.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=grace_period)
+    names = blob_names(storage)
+    recorded = 0
+    while True:
+        chunk = {name for _, name in zip(range(CHUNK_SIZE), names)}
+        if not chunk:
+            return recorded
+        chunk -= set(
+            MediaBlob.objects.filter(name__in=chunk).values_list("name", flat=True)
+        )
+        strays = [
+            MediaBlob(
+                name=name,
+                size=storage.size(name),
+                references=0,
+                date_released=timezone.now(),
+            )
+            for name in chunk
+            if storage.get_modified_time(name) <= cutoff
+        ]
+        # a blob saved meanwhile keeps its references
+        MediaBlob.objects.bulk_create(strays, ignore_conflicts=True)
+        recorded += len(strays)
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class MediaBlob(models.Model):
+    """
+    a file of ContentAddressedStorage and the number of references to
+    it, see common.storage.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    references = models.IntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    # when the last reference was released, blobs are collected a grace
+    # period later
+    date_released = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.references} references)"
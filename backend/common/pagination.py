@@ -0,0 +1,129 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    paginates on a `(timestamp, id)` pair, newest first.
+
+    Every page is fetched with an indexed `WHERE (timestamp, id) < cursor`
+    instead of `OFFSET n`, and no `COUNT(*)` is run, so a page deep into
+    the list costs the same as the first one. Cursors are opaque strings
+    that stay valid when rows are added.
+
+    The timestamp field is read from the view's `cursor_field` attribute
+    and defaults to `date_created`.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.field = getattr(view, "cursor_field", "date_created")
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+        if reverse:
+            queryset = queryset.order_by(self.field, "id")
+            if position is not None:
+                queryset = queryset.filter(self.after(position, "gt"))
+        else:
+            queryset = queryset.order_by(f"-{self.field}", "-id")
+            if position is not None:
+                queryset = queryset.filter(self.after(position, "lt"))
+        # fetch one extra row to know whether there is another page
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def after(self, position, lookup):
+        timestamp, id = position
+        return Q(**{f"{self.field}__{lookup}": timestamp}) | Q(
+            **{self.field: timestamp, f"id__{lookup}": id}
+        )
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return row[self.field], row["id"]
+        return getattr(row, self.field), row.id
+
+    def encode_cursor(self, position, reverse):
+        timestamp, id = position
+        payload = json.dumps({"t": timestamp.isoformat(), "i": id, "r": reverse})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, cursor):
+        if cursor is None:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = (datetime.fromisoformat(payload["t"]), int(payload["i"]))
+            return position, bool(payload["r"])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class PageNumberOrKeysetPagination(BasePagination):
+    """
+    page number pagination by default, keyset pagination when the
+    request has a `cursor` or `pagination=cursor` query parameter.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            KeysetPagination.cursor_query_param in request.query_params
+            or request.query_params.get("pagination") == "cursor"
+        ):
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
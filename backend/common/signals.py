@@ -0,0 +1,89 @@
+"""
+releases the blobs of file fields on a storage counting references, see
+common.storage, when a row stops naming them. The references are taken
+when the files are saved.
+"""
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+
+def file_fields(model):
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and hasattr(field.storage, "release")
+    ]
+
+
+def stored_files(instance, fields):
+    deferred = instance.get_deferred_fields()
+    return {
+        field.name: getattr(instance, field.name).name
+        for field in fields
+        if field.attname not in deferred
+    }
+
+
+def release(fields, files):
+    for field in fields:
+        name = files.get(field.name)
+        if name:
+            transaction.on_commit(partial(field.storage.release, [name]))
+
+
+def remember_files(sender, instance, fields, **kwargs):
+    instance._stored_files = stored_files(instance, fields)
+
+
+def note_uploads(sender, instance, fields, **kwargs):
+    # files assigned since the row was read are saved with the row, even
+    # when they have the content, hence the name, of the current one
+    instance._uploaded_files = {
+        field.name
+        for field in fields
+        if field.attname not in instance.get_deferred_fields()
+        and not getattr(instance, field.name)._committed
+    }
+
+
+def release_replaced_files(sender, instance, fields, created, **kwargs):
+    current = stored_files(instance, fields)
+    old = {} if created else getattr(instance, "_stored_files", {})
+    uploaded = getattr(instance, "_uploaded_files", set())
+    release(
+        fields,
+        {
+            name: file
+            for name, file in old.items()
+            if name in current and (name in uploaded or current[name] != file)
+        },
+    )
+    instance._stored_files = current
+    instance._uploaded_files = set()
+
+
+def release_deleted_files(sender, instance, fields, **kwargs):
+    release(fields, stored_files(instance, fields))
+
+
+def connect():
+    for model in apps.get_models():
+        fields = file_fields(model)
+        if not fields:
+            continue
+        for signal, receiver in [
+            (post_init, remember_files),
+            (pre_save, note_uploads),
+            (post_save, release_replaced_files),
+            (post_delete, release_deleted_files),
+        ]:
+            signal.connect(
+                partial(receiver, fields=fields),
+                sender=model,
+                weak=False,
+                dispatch_uid=f"{receiver.__name__}:{model._meta.label}",
+            )
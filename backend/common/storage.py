@@ -0,0 +1,117 @@
+"""
+content addressed file storage.
+
+Files are named by the SHA-256 of their content, in the directory they
+are uploaded to, e.g. `quiz/<sha256>.png`. Saving a file that is already
+stored writes nothing and returns the name of the stored copy, so every
+row referencing the same image shares one blob. A name always denotes
+the same bytes, so media URLs can be served with a far-future
+`Cache-Control: immutable` header.
+
+Every blob is recorded as a `MediaBlob` counting its references: saving
+a file takes a reference and deleting it releases one, see
+`common.signals` for the references held by file fields. Released blobs
+are never removed right away, `manage.py collect_media` removes them a
+grace period later once no row names them.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+from typing import Iterable, Optional
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+
+HASH_CHUNK_SIZE = 64 * 1024
+DEFAULT_FILE_MODE = 0o644
+
+
+def as_bytes(chunk) -> bytes:
+    return chunk.encode() if isinstance(chunk, str) else chunk
+
+
+def content_hash(content) -> str:
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(as_bytes(chunk))
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # the name is chosen by _save, an existing file is the same content
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        name = posixpath.join(directory, f"{content_hash(content)}{extension}")
+        if not self.exists(name):
+            self.write(name, content)
+        self.acquire(name, content.size)
+        return name
+
+    def write(self, name: str, content):
+        """
+        writes content through a temporary file, so a blob is either
+        missing or complete even when the same file is uploaded twice at
+        once.
+        """
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            for chunk in content.chunks():
+                file.write(as_bytes(chunk))
+        # temporary files are only readable by their owner
+        mode = self.file_permissions_mode
+        os.chmod(file.name, mode if mode is not None else DEFAULT_FILE_MODE)
+        os.replace(file.name, path)
+
+    def acquire(self, name: str, size: Optional[int] = None):
+        from .models import MediaBlob
+
+        if size is None:
+            size = self.size(name)
+        blob, created = MediaBlob.objects.get_or_create(
+            name=name, defaults={"size": size, "references": 1}
+        )
+        if not created:
+            MediaBlob.objects.filter(id=blob.id).update(
+                references=F("references") + 1, date_released=None
+            )
+
+    def release(self, names: Iterable[str]):
+        """
+        releases a reference to every blob of names. Names that are not
+        blobs, e.g. files stored before this storage, are ignored.
+        """
+        from .models import MediaBlob
+
+        names = [name for name in names if name]
+        if not names:
+            return
+        for name in names:
+            MediaBlob.objects.filter(name=name, references__gt=0).update(
+                references=F("references") - 1
+            )
+        MediaBlob.objects.filter(
+            name__in=names, references=0, date_released__isnull=True
+        ).update(date_released=timezone.now())
+
+    def delete(self, name):
+        # blobs may be shared, they are removed by `purge`
+        self.release([name])
+
+    def purge(self, name: str):
+        """removes the file of a blob"""
+        super().delete(name)
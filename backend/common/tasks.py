@@ -0,0 +1,41 @@
+from celery import shared_task
+from django.apps import apps
+from django.db import transaction
+
+from .images import delete_variants, needs_processing, process_image, source_name
+from .media import collect_blobs
+
+
+@shared_task
+def process_image_task(model, pk, field, variants_field, name):
+    process_image(apps.get_model(model), pk, field, variants_field, name)
+
+
+def schedule_image_processing(instance, field, variants_field):
+    """
+    draws the variants of the image of field once the current
+    transaction is committed, when it changed since they were drawn.
+    """
+    if not needs_processing(instance, field, variants_field):
+        return
+    args = (
+        instance._meta.label,
+        instance.pk,
+        field,
+        variants_field,
+        source_name(type(instance), field, getattr(instance, field).name),
+    )
+    transaction.on_commit(lambda: process_image_task.delay(*args))
+
+
+def schedule_variants_deletion(instance, field, variants_field):
+    """deletes the variants of a deleted row once the deletion is committed"""
+    storage = instance._meta.get_field(field).storage
+    variants = getattr(instance, variants_field)
+    if variants:
+        transaction.on_commit(lambda: delete_variants(storage, variants))
+
+
+@shared_task
+def collect_blobs_task():
+    return collect_blobs()
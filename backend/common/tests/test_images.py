@@ -0,0 +1,122 @@
+import io
+import shutil
+import tempfile
+
+from common.images import make_variants, process_image, similar_images
+from common.models import MediaBlob
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+User = get_user_model()
+
+
+def make_image(width=1200, height=900, format="JPEG", orientation=None):
+    image = Image.new("RGB", (width, height), "red")
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    if orientation is not None:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, format, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_make_variants(self):
+        name = default_storage.save("quiz/photo.jpg", ContentFile(make_image()))
+        data = make_variants(default_storage, name)
+        self.assertEqual(
+            (data["source"], data["width"], data["height"]), (name, 1200, 900)
+        )
+        self.assertEqual(
+            {
+                variant: (value["width"], value["height"])
+                for variant, value in data["variants"].items()
+            },
+            {"thumbnail": (200, 150), "medium": (800, 600)},
+        )
+        thumbnail = data["variants"]["thumbnail"]["name"]
+        self.assertTrue(thumbnail.startswith("quiz/variants/"))
+        with default_storage.open(thumbnail) as file:
+            image = Image.open(file)
+            self.assertEqual(image.format, "WEBP")
+            self.assertFalse(image.getexif())
+
+    def test_orientation_applied(self):
+        # rotated 90 degrees, so displayed 900 wide
+        content = make_image(orientation=6)
+        name = default_storage.save("quiz/rotated.jpg", ContentFile(content))
+        data = make_variants(default_storage, name)
+        self.assertEqual((data["width"], data["height"]), (900, 1200))
+        self.assertEqual(data["variants"]["thumbnail"]["width"], 150)
+
+    def test_small_images_not_enlarged(self):
+        name = default_storage.save("quiz/small.png", ContentFile(make_image(50, 40)))
+        data = make_variants(default_storage, name)
+        self.assertEqual(data["variants"]["medium"]["width"], 50)
+
+    def test_process_image(self):
+        user = User.objects.create_user(username="u", email="u@x.com", password="p")
+        name = default_storage.save("avatar/u.jpg", ContentFile(make_image()))
+        User.objects.filter(id=user.id).update(avatar=name)
+        data = process_image(User, user.id, "avatar", "avatar_variants", name)
+        user.refresh_from_db()
+        self.assertEqual(user.avatar_variants, data)
+        old = data["variants"]["thumbnail"]["name"]
+
+        # replaced since the task was queued
+        self.assertIsNone(
+            process_image(User, user.id, "avatar", "avatar_variants", "x")
+        )
+
+        # an unreadable image is recorded without variants, the old ones
+        # are released
+        broken = default_storage.save("avatar/broken.jpg", ContentFile(b"not an image"))
+        User.objects.filter(id=user.id).update(avatar=broken)
+        with self.assertLogs("common.images", "ERROR"):
+            process_image(User, user.id, "avatar", "avatar_variants", broken)
+        user.refresh_from_db()
+        self.assertEqual(user.avatar_variants, {"source": broken})
+        self.assertEqual(MediaBlob.objects.get(name=old).references, 0)
+
+    def test_process_images_command(self):
+        user = User.objects.create_user(username="u", email="u@x.com", password="p")
+        name = default_storage.save("avatar/u.jpg", ContentFile(make_image()))
+        User.objects.filter(id=user.id).update(avatar=name)
+        output = io.StringIO()
+        call_command("process_images", stdout=output)
+        self.assertIn(
+            "Drew the variants of 1 authentication.User images", output.getvalue()
+        )
+        user.refresh_from_db()
+        self.assertEqual(user.avatar_variants["source"], name)
+
+    def test_similar_images(self):
+        users = [
+            User.objects.create_user(username=f"u{i}", email=f"{i}@x.com", password="p")
+            for i in range(3)
+        ]
+        image = Image.new("RGB", (600, 400), "white")
+        image.paste("black", (0, 0, 300, 400))
+        copies = [image, image.resize((300, 200)), Image.new("RGB", (600, 400))]
+        for user, copy in zip(users, copies):
+            buffer = io.BytesIO()
+            copy.save(buffer, "PNG")
+            name = default_storage.save("avatar/a.png", ContentFile(buffer.getvalue()))
+            User.objects.filter(id=user.id).update(avatar=name)
+            process_image(User, user.id, "avatar", "avatar_variants", name)
+        self.assertEqual(
+            similar_images(User, "avatar", "avatar_variants"),
+            [[users[0].id, users[1].id]],
+        )
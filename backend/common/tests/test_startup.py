@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import unittest
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+# parsers and clients only the scraper commands need
+HEAVY_MODULES = ["bs4", "scraper.crawler", "scraper.scraper", "scraper.loader"]
+
+
+class StartupTest(SimpleTestCase):
+    def test_heavy_modules_not_imported(self):
+        """
+        fails when loading the WSGI application imports a module only
+        some commands need.
+        """
+        code = (
+            "import sys, config.wsgi; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        self.assertEqual(output, "")
+
+    @unittest.skipUnless(
+        os.environ.get("BENCHMARK_STARTUP"),
+        "timings depend on the machine, set BENCHMARK_STARTUP=1 to check budgets",
+    )
+    def test_startup_within_budget(self):
+        """
+        fails when manage.py, the WSGI application or the Celery worker
+        start noticeably slower, e.g. because of an import-time query.
+        """
+        output = StringIO()
+        call_command("benchmark_startup", "--rounds=1", stdout=output)
+        self.assertIn("config.wsgi", output.getvalue())
+
+    def test_invalid_budget(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_startup", "--budget=nothing=1")
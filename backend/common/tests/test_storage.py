@@ -0,0 +1,118 @@
+import datetime
+import io
+import shutil
+import tempfile
+
+from common.media import collect_blobs, recount_blobs, record_strays
+from common.models import MediaBlob
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from utils.testing import run_tasks_eagerly
+
+User = get_user_model()
+
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (20, 20), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # the image variants are drawn by a task
+        run_tasks_eagerly(self)
+        self.user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com"
+        )
+
+    def upload(self, user, content, name="me.png"):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.avatar = SimpleUploadedFile(name, content)
+            user.save()
+        return user.avatar.name
+
+    def test_identical_files_share_a_blob(self):
+        first = default_storage.save("quiz/one.PNG", ContentFile(b"same"))
+        second = default_storage.save("quiz/two.png", ContentFile(b"same"))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r"^quiz/[0-9a-f]{64}\.png$")
+        self.assertEqual(MediaBlob.objects.get(name=first).references, 2)
+        self.assertNotEqual(
+            default_storage.save("quiz/one.png", ContentFile(b"other")), first
+        )
+
+    def test_rows_release_their_files(self):
+        other = User.objects.create_user(username="o", password="p", email="o@x.com")
+        name = self.upload(self.user, png("red"))
+        self.assertEqual(self.upload(other, png("red")), name)
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 2)
+
+        # uploading the same file again keeps one reference
+        self.upload(self.user, png("red"), "again.png")
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 2)
+
+        self.upload(self.user, png("blue"))
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        blob = MediaBlob.objects.get(name=name)
+        self.assertEqual(blob.references, 0)
+        self.assertIsNotNone(blob.date_released)
+
+    def test_collect_blobs(self):
+        name = self.upload(self.user, png("red"))
+        self.upload(self.user, png("blue"))
+        self.assertEqual(collect_blobs(), 0)  # released within the grace period
+        MediaBlob.objects.update(date_released=timezone.now() - datetime.timedelta(1))
+        self.assertEqual(collect_blobs(), 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(self.user.avatar.name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_named_blobs_not_collected(self):
+        name = self.upload(self.user, png("red"))
+        # a row pointed at the file without taking a reference
+        MediaBlob.objects.update(
+            references=0, date_released=timezone.now() - datetime.timedelta(1)
+        )
+        self.assertEqual(collect_blobs(), 0)
+        self.assertTrue(default_storage.exists(name))
+        # the avatar and its variants, the same file at this size
+        self.assertEqual(recount_blobs(), 2)
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 1)
+
+    def test_rolled_back_files_collected(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            name = default_storage.save("quiz/one.png", ContentFile(b"lost"))
+            raise ValueError
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertEqual(record_strays(), 0)  # may still be committed
+        self.assertEqual(record_strays(grace_period=0), 1)
+        self.assertEqual(record_strays(grace_period=0), 0)
+        MediaBlob.objects.update(date_released=timezone.now() - datetime.timedelta(1))
+        self.assertEqual(collect_blobs(), 1)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_named_strays_not_collected(self):
+        name = self.upload(self.user, png("red"))
+        MediaBlob.objects.all().delete()
+        # stored before this storage, never collected
+        with open(default_storage.path("legacy.png"), "wb") as f:
+            f.write(b"legacy")
+        # the avatar and its webp variant
+        self.assertEqual(record_strays(grace_period=0), 2)
+        MediaBlob.objects.update(date_released=timezone.now() - datetime.timedelta(1))
+        self.assertEqual(collect_blobs(), 0)
+        self.assertTrue(default_storage.exists(name))
+        self.assertTrue(default_storage.exists("legacy.png"))
@@ -115,6 +115,8 @@ STATIC_URL = "static/"
 
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# uploads are named by their content and shared, see common.storage
+DEFAULT_FILE_STORAGE = "common.storage.ContentAddressedStorage"
 FILE_UPLOAD_PERMISSION = 0o64
 
 # Default primary key field type
@@ -138,6 +140,27 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+# read statistics from counters maintained on every write instead of
+# aggregating the question and user tables on every request.
+MATERIALIZED_STATISTICS = config("MATERIALIZED_STATISTICS", default=False, cast=bool)
+
+# serve random questions from decks precomputed by celery beat, see
+# quiz.decks
+QUESTION_DECKS = config("QUESTION_DECKS", default=True, cast=bool)
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-question-decks": {
+        "task": "quiz.tasks.rebuild_decks_task",
+        "schedule": 15 * 60,
+    },
+    "flush-outbox": {
+        "task": "authentication.tasks.flush_outbox_task",
+        "schedule": 60,
+    },
+    "collect-media-blobs": {
+        "task": "common.tasks.collect_blobs_task",
+        "schedule": 24 * 60 * 60,
+    },
+}
 
 ADMIN_TOKEN = config("TEST_TOKEN")
 API_BASE_URL = config("API_BASE_URL")
@@ -145,6 +168,7 @@ FRONTEND_URL = config("FRONTEND_URL")
 EXTERNAL_API_PATHS = [
     "/api/v1/questions/",
     "/api/v1/questions",
+    "/api/v1/questions/random",
     "/api/v1/categories/",
     "/api/v1/categories",
     "/api/v1/statistics/",
@@ -14,6 +14,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 # CORS
 CORS_ALLOWED_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:5500",]
 
@@ -14,6 +14,13 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REDIS_URL"),
+    }
+}
+
 # CORS
 CORS_ALLOWED_ORIGINS = ["http://quizzybank.vercel.app"]
 
@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feedback", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="feedback",
+            name="date_created",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
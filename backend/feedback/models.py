@@ -14,7 +14,7 @@ class Feedback(models.Model):
     created_by = models.ForeignKey(
         User, related_name="feedbacks", on_delete=models.CASCADE
     )
-    date_created = models.DateTimeField(auto_now_add=True)
+    date_created = models.DateTimeField(auto_now_add=True, db_index=True)
     is_resolved = models.BooleanField(default=False)
     resolved_by = models.ForeignKey(
         User, related_name="resolved_feedbacks", null=True, on_delete=models.SET_NULL
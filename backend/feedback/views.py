@@ -1,3 +1,4 @@
+from common.pagination import PageNumberOrKeysetPagination
 from common.permissions import IsAdminUserorWriteOnly
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
@@ -13,6 +14,7 @@ class FeedbackListView(generics.ListCreateAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdminUserorWriteOnly & IsAuthenticated]
     queryset = Feedback.objects.all()
+    pagination_class = PageNumberOrKeysetPagination
 
     def list(self, request, *args, **kwargs):
         data = super().list(request, *args, **kwargs).data
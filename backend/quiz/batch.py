@@ -0,0 +1,257 @@
+"""
+batch creation of questions.
+
+A batch is validated item by item with every category resolved from a
+single query, then the questions and their incorrect answers are written
+with `bulk_create` inside one transaction. The search index, cache
+generation and statistics counters are updated once for the whole batch
+instead of once per question.
+
+Copies of questions already in their category are found by fingerprint
+(see quiz.fingerprint) with one query for the whole batch. Backends that
+cannot return the ids of a bulk insert, like MySQL, read them back by
+fingerprint with one query per BATCH_SIZE questions.
+"""
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+from django.db import IntegrityError, connection, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from . import decks, sampling, stats
+from .caching import bump_generation_on_commit
+from .fingerprint import find_duplicates, fingerprint
+from .models import Category, InCorrectAnswer, Question
+from .search import index_questions
+from .serializers import QuestionBatchItemSerializer
+from .similarity import index_signatures
+from .tasks import schedule_deck_refresh
+
+BATCH_SIZE = 1000
+MAX_BATCH_ITEMS = 5000
+ATOMIC = "atomic"
+PARTIAL = "partial"
+MODES = [ATOMIC, PARTIAL]
+SKIP = "skip"
+UPDATE = "update"
+DUPLICATE_MODES = [SKIP, UPDATE]
+# the fields a duplicate can change, the others make up its fingerprint
+UPDATED_FIELDS = ["difficulty", "type", "explanation"]
+
+
+def category_ids(items: list) -> Set[int]:
+    ids = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            ids.add(int(item.get("category")))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def validate_items(items: list) -> Tuple[list, dict]:
+    """
+    returns the validated data of every valid item with its index,
+    and the errors of the invalid ones keyed by index.
+    """
+    categories = Category.objects.in_bulk(category_ids(items))
+    # one serializer validates every item, as ListSerializer does, so
+    # its fields are only built once
+    serializer = QuestionBatchItemSerializer(context={"categories": categories})
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, serializer.run_validation(item)))
+        except ValidationError as exc:
+            errors[index] = as_serializer_error(exc)
+    return valid, errors
+
+
+def build_question(data: dict, user) -> Tuple[Question, List[str]]:
+    data = dict(data)
+    category = data.pop("category")["slug"]
+    incorrect_answers = list(data.pop("incorrect_answer_fields").values())
+    question = Question(**data, category=category, created_by=user)
+    question.fingerprint = fingerprint(
+        question.question, question.correct_answer, incorrect_answers
+    )
+    question.clean()
+    return question, incorrect_answers
+
+
+def fingerprint_key(question: Question) -> Tuple[int, str]:
+    return question.category_id, question.fingerprint
+
+
+def split_duplicates(questions: list) -> Tuple[list, list]:
+    """
+    separates new questions from copies of questions of the bank or of
+    an earlier question of the same batch. Returns the new questions
+    with their index, and every copy with its index and the index (in
+    questions) of the question it copies or the id of the copied one.
+    """
+    existing = find_duplicates(fingerprint_key(question) for question, _ in questions)
+    new, duplicates, seen = [], [], {}
+    for index, (question, options) in enumerate(questions):
+        key = fingerprint_key(question)
+        if key in existing:
+            duplicates.append((index, {"id": existing[key]}))
+        elif key in seen:
+            duplicates.append((index, {"copy_of": seen[key]}))
+        else:
+            seen[key] = index
+            new.append((index, (question, options)))
+    return new, duplicates
+
+
+def insert_questions(questions: List[Tuple[Question, List[str]]]):
+    """
+    writes the questions and their incorrect answers.
+    """
+    new = [question for question, _ in questions]
+    Question.objects.bulk_create(new, batch_size=BATCH_SIZE)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        fetch_ids(new)
+    count_questions(new)
+    InCorrectAnswer.objects.bulk_create(
+        [
+            InCorrectAnswer(question=question, option=option)
+            for question, options in questions
+            for option in options
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    ids = [question.id for question in new]
+    index_questions(ids)
+    index_signatures(ids)
+    # questions loaded verified, see scraper.loader, join the decks
+    verified = [question.id for question in new if question.is_verified]
+    if verified:
+        schedule_deck_refresh((id, None) for id in verified)
+        bump_generation_on_commit(sampling.GENERATION_KEY)
+    bump_generation_on_commit()
+
+
+def fetch_ids(questions: List[Question]):
+    """
+    sets the ids of questions inserted without RETURNING, e.g. on MySQL,
+    from their fingerprints, which are unique in a category.
+    """
+    for start in range(0, len(questions), BATCH_SIZE):
+        chunk = questions[start : start + BATCH_SIZE]
+        ids = {
+            (category_id, value): id
+            for id, category_id, value in Question.objects.filter(
+                fingerprint__in={question.fingerprint for question in chunk}
+            ).values_list("id", "category_id", "fingerprint")
+        }
+        for question in chunk:
+            question.id = ids[fingerprint_key(question)]
+
+
+def count_questions(questions: List[Question]):
+    if not stats.is_materialized():
+        return
+    deltas = Counter()
+    for question in questions:
+        deltas.update(stats.question_state_keys(question))
+    stats.apply_deltas(deltas)
+
+
+def update_questions(updates: Dict[int, Question]):
+    """
+    copies the fields outside of the fingerprint of every question onto
+    the question of the bank it duplicates, keyed by id.
+    """
+    questions = Question.objects.in_bulk(list(updates))
+    deltas = Counter()
+    for id, question in questions.items():
+        old_keys = stats.question_state_keys(question)
+        for field in UPDATED_FIELDS:
+            setattr(question, field, getattr(updates[id], field))
+        deltas.update(stats.state_deltas(old_keys, stats.question_state_keys(question)))
+    Question.objects.bulk_update(
+        questions.values(), UPDATED_FIELDS, batch_size=BATCH_SIZE
+    )
+    if stats.is_materialized():
+        stats.apply_deltas(deltas)
+    index_questions(list(questions))
+    moved = {
+        id: question._deck_state
+        for id, question in questions.items()
+        if decks.affects_decks(question._deck_state, decks.question_state(question))
+    }
+    schedule_deck_refresh(moved.items())
+    if any(state != decks.question_state(questions[id]) for id, state in moved.items()):
+        bump_generation_on_commit(sampling.GENERATION_KEY)
+    bump_generation_on_commit()
+
+
+def write_questions(questions: list, duplicates: str) -> list:
+    """
+    inserts the new questions and handles the duplicates in one
+    transaction, returning the result of every question.
+    """
+    new, copies = split_duplicates(questions)
+    results = [None] * len(questions)
+    with transaction.atomic():
+        if new:
+            insert_questions([question for _, question in new])
+        if copies and duplicates == UPDATE:
+            update_questions(
+                {
+                    copy["id"]: questions[index][0]
+                    for index, copy in copies
+                    if "id" in copy
+                }
+            )
+    for index, (question, _) in new:
+        results[index] = {"status": "created", "id": question.id}
+    for index, copy in copies:
+        if "id" in copy:
+            status = "updated" if duplicates == UPDATE else "duplicate"
+            results[index] = {"status": status, "id": copy["id"]}
+        else:
+            original = results[copy["copy_of"]]["id"]
+            results[index] = {"status": "duplicate", "id": original}
+    return results
+
+
+def create_questions(
+    items: list, user, mode: str = ATOMIC, duplicates: str = SKIP
+) -> list:
+    """
+    creates the questions described by items.
+
+    In atomic mode nothing is created unless every item is valid. In
+    partial mode the valid items are created and the invalid ones
+    reported. Copies of questions already in the category are skipped,
+    or update the existing question with the UPDATE duplicates mode.
+    Returns the result of every item in the order of items.
+    """
+    valid, errors = validate_items(items)
+    if errors and mode == ATOMIC:
+        valid = []
+    questions = [build_question(data, user) for _, data in valid]
+    written = []
+    if questions:
+        try:
+            written = write_questions(questions, duplicates)
+        except IntegrityError:
+            # a copy was inserted concurrently, it is now found by
+            # split_duplicates. Ids given before the rollback are void.
+            for question, _ in questions:
+                question.pk = None
+            written = write_questions(questions, duplicates)
+    results = [None] * len(items)
+    for (index, _), result in zip(valid, written):
+        results[index] = {"index": index, **result}
+    for index, error in errors.items():
+        results[index] = {"index": index, "status": "failed", "errors": error}
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {"index": index, "status": "skipped"}
+    return results
@@ -0,0 +1,166 @@
+"""
+caching of public question responses.
+
+Every key embeds the generation of the question bank. The generation is
+bumped once a transaction saving, deleting, verifying or unverifying a
+question is committed (see `quiz.signals`), which makes every key built
+before it unreachable in one step, so a page is never served after a
+moderation action changed it.
+Stale entries are left to expire.
+
+Works with any Django cache backend that supports `incr`, e.g. the
+local-memory and Redis backends.
+"""
+import datetime
+import functools
+import hashlib
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = "quiz:questions:generation"
+USERS_GENERATION_KEY = "quiz:users:generation"
+HITS_KEY = "quiz:cache:hits"
+MISSES_KEY = "quiz:cache:misses"
+TIMEOUT = getattr(settings, "QUESTION_CACHE_TIMEOUT", 60 * 60)
+
+
+def get_generation(key: str = GENERATION_KEY) -> int:
+    """
+    returns the current generation of the question bank, or of the
+    data counted by another generation key.
+    """
+    generation = cache.get(key)
+    if generation is None:
+        # seed with the clock so that an evicted counter never
+        # goes back to a value an older key was built with.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(key: str = GENERATION_KEY):
+    """
+    marks everything cached so far as stale.
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+    cache.set(f"{key}:modified", time.time(), timeout=None)
+
+
+def bump_generation_on_commit(key: str = GENERATION_KEY):
+    """
+    bumps the generation once the current transaction is committed.
+    Bumping before the commit would let a concurrent request cache the
+    old rows under the new generation, where they would stay until the
+    next change.
+    """
+    transaction.on_commit(functools.partial(bump_generation, key))
+
+
+def last_modified(key: str = GENERATION_KEY) -> Optional[datetime.datetime]:
+    """
+    returns when the generation of key was last bumped, if known.
+    """
+    modified = cache.get(f"{key}:modified")
+    if modified is None:
+        return None
+    return datetime.datetime.fromtimestamp(modified, datetime.timezone.utc)
+
+
+def make_etag(*parts, keys: Iterable[str] = (GENERATION_KEY,)) -> str:
+    """
+    returns an entity tag that changes with the generations of keys and
+    with parts, e.g. the URL of the response.
+    """
+    generations = [get_generation(key) for key in keys]
+    value = "|".join(str(part) for part in [*generations, *parts])
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def make_key(prefix: str, params: Dict[str, object]) -> str:
+    """
+    returns the cache key of prefix and params for the current
+    generation. params are sorted so their order does not matter.
+    """
+    normalized = "&".join(
+        f"{name}={value}" for name, value in sorted(params.items()) if value is not None
+    )
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f"quiz:{prefix}:{get_generation()}:{digest}"
+
+
+def _count(key: str, delta: int):
+    if delta <= 0:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def get_or_set(key: str, func: Callable[[], object]):
+    """
+    returns the value cached under key, computing and caching
+    it with func on a miss.
+    """
+    value = cache.get(key)
+    if value is not None:
+        _count(HITS_KEY, 1)
+        return value
+    _count(MISSES_KEY, 1)
+    value = func()
+    cache.set(key, value, TIMEOUT)
+    return value
+
+
+def get_many_or_set(
+    prefix: str, ids: Iterable[int], func: Callable[[list], Dict[int, object]]
+) -> Dict[int, object]:
+    """
+    returns a dict of id to the value cached for every id. The ids that
+    are missing are computed together with a single call to func, which
+    receives the list of missing ids and returns a dict for them.
+    """
+    generation = get_generation()
+    keys = {f"quiz:{prefix}:{generation}:{id}": id for id in ids}
+    cached = cache.get_many(list(keys))
+    values = {keys[key]: value for key, value in cached.items()}
+    missing = [id for id in keys.values() if id not in values]
+    _count(HITS_KEY, len(values))
+    _count(MISSES_KEY, len(missing))
+    if missing:
+        computed = func(missing)
+        cache.set_many(
+            {
+                f"quiz:{prefix}:{generation}:{id}": value
+                for id, value in computed.items()
+            },
+            TIMEOUT,
+        )
+        values.update(computed)
+    return values
+
+
+def stats() -> Dict[str, int]:
+    """
+    returns the hit and miss counters of the question cache.
+    """
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,277 @@
+"""
+precomputed decks of public questions.
+
+A deck is a shuffled list of the serialized payloads of the verified
+questions of one `category` x `difficulty` x `type` combination, any of
+which may be left out, kept in the cache. The public questions endpoint
+deals `limit` consecutive questions from the deck, starting where the
+previous request stopped, so it answers without touching the question
+tables and successive users see different questions.
+
+`rebuild_decks` (run periodically by Celery, see quiz.tasks) draws and
+shuffles every deck again. In between, a question that is verified,
+edited or removed is patched into or out of the decks of its
+combinations only (see `refresh_decks`), one patch at a time across
+workers (see `deck_lock`). Renaming or deleting a category rebuilds
+every deck (see `rebuild_category_decks`).
+
+Patches run in Celery after the commit, so a question that is unverified
+or deleted is also marked withdrawn as soon as the change is committed,
+and `deal` leaves out withdrawn questions until the decks are patched.
+"""
+import contextlib
+import hashlib
+import random
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DIFFICULTY_CHOICES, TYPE_CHOICES, Category, Question
+from .payloads import public_payloads
+
+DECK_SIZE = getattr(settings, "QUESTION_DECK_SIZE", 1000)
+# longer than the rebuild period so decks are only missing after a flush
+TIMEOUT = getattr(settings, "QUESTION_DECK_TIMEOUT", 60 * 60)
+SERIALIZE_CHUNK_SIZE = 500
+LOCK_KEY = "quiz:deck:lock"
+# longer than a patch takes, a lock left by a dead worker expires
+LOCK_TIMEOUT = 60
+LOCK_POLL_INTERVAL = 0.05
+
+# (category id, difficulty, type, is_verified) of a question
+State = Tuple[int, str, str, bool]
+
+
+class DeckLocked(Exception):
+    pass
+
+
+def deck_key(category: Optional[str], difficulty: Optional[str], type: Optional[str]):
+    combination = f"{category or ''}|{difficulty or ''}|{type or ''}"
+    return f"quiz:deck:{hashlib.md5(combination.encode()).hexdigest()}"
+
+
+def combinations(
+    category: Optional[str], difficulty: str, type: str
+) -> List[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """returns the combinations of filters a question is dealt for"""
+    return [
+        (c, d, t)
+        for c in (category, None)
+        for d in (difficulty, None)
+        for t in (type, None)
+    ]
+
+
+def question_state(question: Question) -> Optional[State]:
+    fields = {"category_id", "difficulty", "type", "is_verified"}
+    if fields & question.get_deferred_fields():
+        return None
+    return (
+        question.category_id,
+        question.difficulty,
+        question.type,
+        question.is_verified,
+    )
+
+
+def affects_decks(old: Optional[State], new: Optional[State]) -> bool:
+    """
+    tells whether a change of a question from state old to state new
+    (None when unknown or deleted) may change a deck.
+    """
+    return old is None or old[3] or (new is not None and new[3])
+
+
+def withdrawn_key(id: int) -> str:
+    return f"quiz:deck:withdrawn:{id}"
+
+
+def withdraw(ids: Iterable[int], withdrawn: bool = True):
+    """
+    stops dealing the questions of ids at once, or deals them again when
+    withdrawn is False. A mark outlives every deck built before it.
+    """
+    keys = [withdrawn_key(id) for id in ids]
+    if not keys:
+        return
+    if withdrawn:
+        cache.set_many(dict.fromkeys(keys, True), TIMEOUT)
+    else:
+        cache.delete_many(keys)
+
+
+def without_withdrawn(payloads: List[dict]) -> List[dict]:
+    keys = {payload["id"]: withdrawn_key(payload["id"]) for payload in payloads}
+    withdrawn = cache.get_many(list(keys.values()))
+    return [payload for payload in payloads if keys[payload["id"]] not in withdrawn]
+
+
+@contextlib.contextmanager
+def deck_lock(timeout: float = LOCK_TIMEOUT):
+    """
+    holds the lock of the cached decks, so concurrent patches do not
+    overwrite each other. Raises DeckLocked after waiting timeout seconds.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while not cache.add(LOCK_KEY, token, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            raise DeckLocked()
+        time.sleep(LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        if cache.get(LOCK_KEY) == token:
+            cache.delete(LOCK_KEY)
+
+
+def serialize(ids: List[int]) -> Dict[int, dict]:
+    payloads = {}
+    for start in range(0, len(ids), SERIALIZE_CHUNK_SIZE):
+        chunk = ids[start : start + SERIALIZE_CHUNK_SIZE]
+        payloads.update(public_payloads(Question.verified, chunk))
+    return payloads
+
+
+def deck_keys(categories: Iterable[Optional[str]]) -> List[str]:
+    """returns the keys of every deck of the category slugs"""
+    return [
+        deck_key(c, d, t)
+        for c in categories
+        for d in [*(value for value, _ in DIFFICULTY_CHOICES), None]
+        for t in [*(value for value, _ in TYPE_CHOICES), None]
+    ]
+
+
+def rebuild_decks() -> int:
+    """
+    draws and shuffles the deck of every combination. Returns the number
+    of decks built.
+    """
+    slugs = dict(Category.objects.values_list("id", "slug"))
+    decks = {key: [] for key in deck_keys([*slugs.values(), None])}
+    questions = Question.verified.order_by().values_list(
+        "id", "category_id", "difficulty", "type"
+    )
+    for id, category_id, difficulty, type in questions.iterator():
+        for combination in combinations(slugs.get(category_id), difficulty, type):
+            key = deck_key(*combination)
+            if key in decks:
+                decks[key].append(id)
+    for key, ids in decks.items():
+        decks[key] = random.sample(ids, min(len(ids), DECK_SIZE))
+    payloads = serialize(list({id for ids in decks.values() for id in ids}))
+    cache.set_many(
+        {
+            key: [payloads[id] for id in ids if id in payloads]
+            for key, ids in decks.items()
+        },
+        TIMEOUT,
+    )
+    return len(decks)
+
+
+def rebuild_category_decks(slugs: Iterable[str]) -> int:
+    """
+    drops the decks of slugs, the old slugs of renamed or deleted
+    categories, and rebuilds every deck, since the payloads name the
+    category of their question and the questions of a deleted category
+    are moved without signals. Runs under `deck_lock`.
+    """
+    with deck_lock():
+        cache.delete_many(deck_keys(slugs))
+        return rebuild_decks()
+
+
+def refresh_decks(changes: Iterable[Tuple[int, Optional[State]]]):
+    """
+    patches the decks of the questions that changed, given with the
+    state they had before the change. Every question is removed from the
+    decks of its old combinations and, while verified, inserted at a
+    random place in the decks of its new ones. Decks that are not
+    cached are left to the next rebuild.
+
+    The questions are read and the decks patched under `deck_lock`, so a
+    patch never writes back decks read before another patch.
+    """
+    with deck_lock():
+        patch_decks(changes)
+
+
+def patch_decks(changes: Iterable[Tuple[int, Optional[State]]]):
+    changes = [(id, tuple(old) if old else None) for id, old in changes]
+    ids = [id for id, _ in changes]
+    payloads = serialize(ids)
+    current = {
+        id: (category_id, difficulty, type, True)
+        for id, category_id, difficulty, type in Question.verified.filter(
+            id__in=ids
+        ).values_list("id", "category_id", "difficulty", "type")
+    }
+    category_ids = {state[0] for state in current.values()}
+    category_ids |= {old[0] for _, old in changes if old}
+    slugs = dict(Category.objects.filter(id__in=category_ids).values_list("id", "slug"))
+
+    def keys(state):
+        if state is None or not state[3]:
+            return set()
+        return {deck_key(*c) for c in combinations(slugs.get(state[0]), *state[1:3])}
+
+    patches = {}
+    for id, old in changes:
+        new_keys = keys(current.get(id))
+        patches[id] = (keys(old) | new_keys, new_keys)
+    decks = cache.get_many(list({key for keys, _ in patches.values() for key in keys}))
+    for id, (affected, new_keys) in patches.items():
+        for key in affected & decks.keys():
+            deck = [payload for payload in decks[key] if payload["id"] != id]
+            if key in new_keys and id in payloads:
+                deck.insert(random.randint(0, len(deck)), payloads[id])
+                del deck[DECK_SIZE:]
+            decks[key] = deck
+    if decks:
+        cache.set_many(decks, TIMEOUT)
+
+
+def next_offset(key: str, limit: int) -> int:
+    """
+    returns where to start dealing `limit` questions from the deck of
+    key, shared by every worker.
+    """
+    cursor = f"{key}:cursor"
+    try:
+        return cache.incr(cursor, limit) - limit
+    except ValueError:
+        start = random.randrange(DECK_SIZE)
+        if cache.add(cursor, start + limit, TIMEOUT):
+            return start
+        return cache.incr(cursor, limit) - limit
+
+
+def deal(
+    category: Optional[str],
+    difficulty: Optional[str],
+    type: Optional[str],
+    limit: int,
+) -> Optional[List[dict]]:
+    """
+    returns `limit` question payloads from the deck of the combination,
+    or None when the deck is not cached or decks are disabled.
+    """
+    if not getattr(settings, "QUESTION_DECKS", True):
+        return None
+    key = deck_key(category, difficulty, type)
+    deck = cache.get(key)
+    if deck is None:
+        return None
+    if len(deck) <= limit:
+        return without_withdrawn(random.sample(deck, len(deck)))
+    offset = next_offset(key, limit)
+    dealt = [deck[(offset + i) % len(deck)] for i in range(max(limit, 0))]
+    # withdrawn questions are left out, so fewer may be dealt until the
+    # decks are patched
+    return without_withdrawn(dealt)
@@ -0,0 +1,176 @@
+"""
+streaming export of the question bank.
+
+Questions are read as plain rows in chunks keyed by id, each chunk one
+`id > last` query, and the incorrect answers of every chunk are fetched
+with one query, so memory stays flat whatever the size of the bank, also
+on MySQL where the driver buffers whole result sets. Every format is written
+as a generator of strings that can be fed to a StreamingHttpResponse or
+a file.
+"""
+import csv
+import datetime
+import json
+from typing import Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import InCorrectAnswer, Question
+
+CHUNK_SIZE = 2000
+FORMATS = ["ndjson", "csv", "json"]
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+FIELDS = [
+    "id",
+    "question",
+    "difficulty",
+    "type",
+    "category",
+    "correct_answer",
+    "incorrect_answers",
+    "explanation",
+    "is_verified",
+    "date_created",
+    "date_verified",
+]
+CSV_FIELDS = [field for field in FIELDS if field != "incorrect_answers"] + [
+    "incorrect_answer_1",
+    "incorrect_answer_2",
+    "incorrect_answer_3",
+]
+
+
+def parse_timestamp(value: str, field: str) -> datetime.datetime:
+    """
+    parses an ISO 8601 date or datetime. Dates are taken as midnight
+    and naive values as being in the current time zone.
+    """
+    try:
+        timestamp = parse_datetime(value)
+        if timestamp is None:
+            date = parse_date(value)
+            if date is not None:
+                timestamp = datetime.datetime.combine(date, datetime.time.min)
+    except ValueError:
+        timestamp = None
+    if timestamp is None:
+        raise ValueError(f"{field} must be an ISO 8601 date or datetime")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def filter_questions(
+    verified: Optional[bool] = None,
+    category: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+):
+    """
+    returns the questions to export. created_after is inclusive and
+    created_before exclusive so consecutive ranges never overlap.
+    Raises ValueError for malformed dates.
+    """
+    queryset = Question.objects.all()
+    if verified is not None:
+        queryset = queryset.filter(is_verified=verified)
+    if category is not None:
+        queryset = queryset.filter(category__slug=category)
+    if created_after is not None:
+        timestamp = parse_timestamp(created_after, "created_after")
+        queryset = queryset.filter(date_created__gte=timestamp)
+    if created_before is not None:
+        timestamp = parse_timestamp(created_before, "created_before")
+        queryset = queryset.filter(date_created__lt=timestamp)
+    return queryset
+
+
+def iter_questions(queryset, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    yields every question of queryset as a dict with its incorrect
+    answers, in id order.
+    """
+    rows = queryset.order_by("id").values(
+        "id",
+        "question",
+        "difficulty",
+        "type",
+        "category__slug",
+        "correct_answer",
+        "explanation",
+        "is_verified",
+        "date_created",
+        "date_verified",
+    )
+    last = None
+    while True:
+        chunk = rows if last is None else rows.filter(id__gt=last)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        last = chunk[-1]["id"]
+        answers = {}
+        options = InCorrectAnswer.objects.filter(
+            question_id__in=[row["id"] for row in chunk]
+        ).order_by("id")
+        for question_id, option in options.values_list("question_id", "option"):
+            answers.setdefault(question_id, []).append(option)
+        for row in chunk:
+            row["category"] = row.pop("category__slug")
+            row["incorrect_answers"] = answers.get(row["id"], [])
+            yield {field: row[field] for field in FIELDS}
+        if len(chunk) < chunk_size:
+            return
+
+
+def to_ndjson(questions: Iterator[dict]) -> Iterator[str]:
+    for question in questions:
+        yield json.dumps(question, cls=DjangoJSONEncoder) + "\n"
+
+
+class Echo:
+    """a file-like object that returns what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(questions: Iterator[dict]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for question in questions:
+        options = question["incorrect_answers"][:3]
+        row = [question[field] for field in CSV_FIELDS[:-3]]
+        row += options + [""] * (3 - len(options))
+        yield writer.writerow(row)
+
+
+def to_json(questions: Iterator[dict]) -> Iterator[str]:
+    """
+    writes a JSON array in the format produced by the scraper.
+    """
+    yield "["
+    separator = "\n"
+    for question in questions:
+        scraped = {
+            "question": question["question"],
+            "incorrect answers": question["incorrect_answers"],
+            "correct_answer": question["correct_answer"],
+            "explanation": question["explanation"],
+        }
+        yield separator + json.dumps(scraped)
+        separator = ",\n"
+    yield "\n]\n"
+
+
+WRITERS = {"ndjson": to_ndjson, "csv": to_csv, "json": to_json}
+
+
+def export(queryset, format: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    return WRITERS[format](iter_questions(queryset, chunk_size))
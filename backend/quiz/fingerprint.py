@@ -0,0 +1,130 @@
+"""
+content fingerprints of questions.
+
+A fingerprint is a hash of the normalized question text, correct answer
+and sorted incorrect answers. It is stored on `Question.fingerprint`,
+unique per category, so finding the duplicates of a batch of questions
+is one indexed lookup whatever the size of the bank.
+
+Questions without a fingerprint (NULL) are never considered duplicates;
+run `manage.py backfill_fingerprints` to fingerprint older questions.
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+
+from .models import InCorrectAnswer, Question
+
+SEPARATOR = "\x1f"
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    folds case, unicode forms and whitespace so trivially different
+    copies of a question get the same fingerprint.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def fingerprint(question: str, correct_answer: str, options: Iterable[str]) -> str:
+    parts = [normalize(question), normalize(correct_answer)]
+    parts += sorted(normalize(option) for option in options)
+    return hashlib.sha256(SEPARATOR.join(parts).encode()).hexdigest()
+
+
+def compute_fingerprints(question_ids: Iterable[int]) -> Dict[int, Tuple[int, str]]:
+    """
+    returns the category and fingerprint of every question, read with
+    two queries.
+    """
+    return {
+        id: (category_id, value)
+        for id, category_id, value, _ in read_fingerprints(question_ids)
+    }
+
+
+def read_fingerprints(question_ids: Iterable[int]):
+    """
+    yields the id, category, computed fingerprint and stored fingerprint
+    of every question.
+    """
+    question_ids = list(question_ids)
+    answers = {}
+    for question_id, option in InCorrectAnswer.objects.filter(
+        question_id__in=question_ids
+    ).values_list("question_id", "option"):
+        answers.setdefault(question_id, []).append(option)
+    questions = Question.objects.filter(id__in=question_ids).values_list(
+        "id", "category_id", "question", "correct_answer", "fingerprint"
+    )
+    for id, category_id, text, correct_answer, stored in questions:
+        value = fingerprint(text, correct_answer, answers.get(id, []))
+        yield id, category_id, value, stored
+
+
+def find_duplicates(keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+    """
+    returns the id of the question of every `(category_id, fingerprint)`
+    already in the bank, with one query.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    rows = Question.objects.filter(
+        fingerprint__in={fingerprint for _, fingerprint in keys}
+    ).values_list("category_id", "fingerprint", "id")
+    return {
+        (category_id, fingerprint): id
+        for category_id, fingerprint, id in rows
+        if (category_id, fingerprint) in keys
+    }
+
+
+def refresh_fingerprints(question_ids: Iterable[int]) -> List[int]:
+    """
+    recomputes the fingerprint of the given questions after an edit.
+    A question edited into a copy of another one of its category is
+    left without a fingerprint. Returns the ids of those questions.
+    """
+    duplicates = []
+    for id, _, value, stored in read_fingerprints(question_ids):
+        if value == stored:
+            continue
+        try:
+            with transaction.atomic():
+                Question.objects.filter(id=id).update(fingerprint=value)
+        except IntegrityError:
+            Question.objects.filter(id=id).update(fingerprint=None)
+            duplicates.append(id)
+    return duplicates
+
+
+def backfill_fingerprints(question_ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    fingerprints the given questions with one bulk update. The oldest
+    question of a set of copies keeps the fingerprint, the others are
+    left without one. Returns every copy with the id of its original.
+    """
+    computed = compute_fingerprints(question_ids)
+    existing = find_duplicates(computed.values())
+    duplicates, fingerprinted, seen = [], [], {}
+    for id in sorted(computed):
+        key = computed[id]
+        original = existing.get(key, seen.get(key))
+        if original is not None and original != id:
+            duplicates.append((id, original))
+            continue
+        seen[key] = id
+        fingerprinted.append(Question(id=id, fingerprint=key[1]))
+    try:
+        with transaction.atomic():
+            Question.objects.bulk_update(fingerprinted, ["fingerprint"])
+    except IntegrityError:
+        # fingerprints moving between questions of the chunk
+        refresh_fingerprints(computed)
+    return duplicates
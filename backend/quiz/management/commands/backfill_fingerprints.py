@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from quiz.fingerprint import backfill_fingerprints
+from quiz.models import Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the fingerprint of the questions that have none, or of every "
+        "question with --all, and report the duplicates found"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--all", action="store_true", help="Recompute every fingerprint"
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options.get("chunk_size")
+        questions = Question.objects.order_by("id")
+        if not options.get("all"):
+            questions = questions.filter(fingerprint__isnull=True)
+        ids = questions.values_list("id", flat=True)
+        total = 0
+        duplicates = []
+        chunk = []
+        for id in ids.iterator(chunk_size=chunk_size):
+            chunk.append(id)
+            if len(chunk) == chunk_size:
+                duplicates += backfill_fingerprints(chunk)
+                total += len(chunk)
+                chunk = []
+        duplicates += backfill_fingerprints(chunk)
+        total += len(chunk)
+        for id, original in duplicates:
+            self.stdout.write(f"Question {id} duplicates question {original}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fingerprinted {total - len(duplicates)} questions, "
+                f"{len(duplicates)} duplicates left without a fingerprint"
+            )
+        )
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz import sampling
+from quiz.caching import bump_generation
+from quiz.models import Category, Question
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark random question sampling against growing question banks. "
+        "The questions are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+        parser.add_argument("--rounds", type=int, default=200)
+        parser.add_argument("--limit", type=int, default=50)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options.get("sizes"))
+        rounds = options.get("rounds")
+        limit = options.get("limit")
+        self.stdout.write(
+            f"{'questions':>10} {'index build':>12} {'median':>10} {'p95':>10}"
+        )
+        with transaction.atomic():
+            category = Category.objects.create(name="benchmark-sampling")
+            created = 0
+            for size in sizes:
+                self.create_questions(category, size - created)
+                created = size
+                bump_generation(sampling.GENERATION_KEY)
+
+                start = time.perf_counter()
+                Question.verified.random_all(limit=limit, category=category.slug)
+                build = time.perf_counter() - start
+
+                timings = []
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    Question.verified.random_all(limit=limit, category=category.slug)
+                    timings.append(time.perf_counter() - start)
+                timings.sort()
+                median = statistics.median(timings)
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                self.stdout.write(
+                    f"{size:>10} {build * 1000:>10.1f}ms "
+                    f"{median * 1000:>8.2f}ms {p95 * 1000:>8.2f}ms"
+                )
+            transaction.set_rollback(True)
+        bump_generation(sampling.GENERATION_KEY)
+
+    def create_questions(self, category, count, batch_size=5000):
+        while count > 0:
+            batch = min(batch_size, count)
+            Question.objects.bulk_create(
+                [
+                    Question(
+                        question=f"benchmark question {i}",
+                        difficulty="easy",
+                        type="multiple-choice",
+                        correct_answer="yes",
+                        category=category,
+                        is_verified=True,
+                    )
+                    for i in range(batch)
+                ],
+                batch_size=batch_size,
+            )
+            count -= batch
@@ -0,0 +1,102 @@
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from quiz import search
+from quiz.models import Category, Question
+
+SIZES = [1_000, 10_000, 50_000]
+QUERIES = ["process", "cpu scheduling", "python operator", "cell genetics"]
+DATA_DIR = Path(__file__).resolve().parents[3] / "scraper" / "data"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the indexed search against the former icontains search. "
+        "The questions are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+        parser.add_argument("--rounds", type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options.get("sizes"))
+        rounds = options.get("rounds")
+        scraped = self.load_scraped_questions()
+        self.stdout.write(
+            f"{'questions':>10} {'query':>7} {'icontains':>12} {'index':>12}"
+        )
+        with transaction.atomic():
+            category = Category.objects.create(name="benchmark-search")
+            created = 0
+            for size in sizes:
+                self.create_questions(category, scraped, size - created)
+                created = size
+                queryset = Question.verified.filter(category=category)
+                for kind, queries in [
+                    ("common", QUERIES),
+                    ("rare", [str(n) for n in random.sample(range(size), 20)]),
+                ]:
+                    icontains = self.time(
+                        rounds, queries, lambda q: self.icontains(queryset, q)
+                    )
+                    indexed = self.time(
+                        rounds,
+                        queries,
+                        lambda q: search.search(q, is_verified=True, category=category),
+                    )
+                    self.stdout.write(
+                        f"{size:>10} {kind:>7} {icontains * 1000:>10.2f}ms "
+                        f"{indexed * 1000:>10.2f}ms"
+                    )
+            transaction.set_rollback(True)
+
+    def icontains(self, queryset, query):
+        """the search the public questions endpoint used to run"""
+        search_query = Q(question__icontains=query) | Q(explanation__icontains=query)
+        return list(queryset.with_related().filter(search_query))
+
+    def time(self, rounds, queries, func):
+        timings = []
+        for _ in range(rounds):
+            query = random.choice(queries)
+            start = time.perf_counter()
+            func(query)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def load_scraped_questions(self):
+        scraped = []
+        for path in DATA_DIR.glob("*/*.json"):
+            with open(path) as f:
+                scraped.extend(json.load(f))
+        return scraped
+
+    def create_questions(self, category, scraped, count, batch_size=1000):
+        created = Question.objects.filter(category=category).count()
+        while count > 0:
+            batch = min(batch_size, count)
+            questions = Question.objects.bulk_create(
+                [
+                    # the number makes every question findable by a rare term
+                    Question(
+                        question=f"{data['question']} ({created + i})",
+                        difficulty="easy",
+                        type="multiple-choice",
+                        correct_answer=data["correct_answer"][:200],
+                        explanation=data["explanation"][:1000],
+                        category=category,
+                        is_verified=True,
+                    )
+                    for i, data in enumerate(random.choices(scraped, k=batch))
+                ]
+            )
+            search.index_questions([question.id for question in questions])
+            created += batch
+            count -= batch
@@ -0,0 +1,103 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quiz import payloads
+from quiz.models import Category, InCorrectAnswer, Question
+from quiz.serializers import QuestionDetailSerializer, QuestionPublicSerializer
+
+SIZES = [50, 500, 5_000]
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the values based question payloads against the "
+        "serializers, in rows per second for pages of growing size. "
+        "The questions are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options.get("sizes"))
+        rounds = options.get("rounds")
+        self.stdout.write(
+            f"{'rows':>8} {'format':>7} {'serializer':>14} {'values':>14} "
+            f"{'speedup':>8}"
+        )
+        with transaction.atomic():
+            self.create_questions(sizes[-1])
+            ordered = Question.objects.order_by("-id")
+            for size in sizes:
+                for format, serializer, values, to_payloads in [
+                    (
+                        "public",
+                        QuestionPublicSerializer,
+                        payloads.PUBLIC_VALUES,
+                        payloads.to_public,
+                    ),
+                    (
+                        "detail",
+                        QuestionDetailSerializer,
+                        payloads.DETAIL_VALUES,
+                        payloads.to_detail,
+                    ),
+                ]:
+                    old = self.time(
+                        rounds,
+                        lambda: serializer(
+                            ordered.with_related()[:size], many=True
+                        ).data,
+                    )
+                    new = self.time(
+                        rounds,
+                        lambda: to_payloads(list(ordered.values(*values)[:size])),
+                    )
+                    self.stdout.write(
+                        f"{size:>8} {format:>7} {size / old:>10.0f} r/s "
+                        f"{size / new:>10.0f} r/s {old / new:>7.1f}x"
+                    )
+            transaction.set_rollback(True)
+
+    def time(self, rounds, func):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def create_questions(self, count):
+        user = User.objects.create_user(
+            username="benchmark-serialization", password="benchmark"
+        )
+        category = Category.objects.create(name="benchmark-serialization")
+        questions = Question.objects.bulk_create(
+            [
+                Question(
+                    question=f"{i} Which of these is a fruit?",
+                    difficulty="easy",
+                    type="multiple-choice",
+                    correct_answer="Apple",
+                    explanation="Apples grow on trees",
+                    category=category,
+                    created_by=user,
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        InCorrectAnswer.objects.bulk_create(
+            [
+                InCorrectAnswer(question=question, option=option)
+                for question in questions
+                for option in ["Rice", "Beans", "Yam"]
+            ],
+            batch_size=1000,
+        )
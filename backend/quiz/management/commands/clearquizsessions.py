@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from quiz.sessions import clear_expired
+
+
+class Command(BaseCommand):
+    help = "Delete the expired quiz sessions of the database session store"
+
+    def handle(self, *args, **options):
+        deleted = clear_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} quiz sessions"))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from quiz import export
+
+
+class Command(BaseCommand):
+    help = "Stream questions to a file as NDJSON, CSV or the JSON format of the scraper"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=export.FORMATS, default="ndjson")
+        parser.add_argument(
+            "--output", help="file to write to. Defaults to standard output"
+        )
+        verification = parser.add_mutually_exclusive_group()
+        verification.add_argument(
+            "--verified", action="store_true", help="export only verified questions"
+        )
+        verification.add_argument(
+            "--unverified",
+            action="store_true",
+            help="export only unverified questions",
+        )
+        parser.add_argument("--category", help="slug of the category to export")
+        parser.add_argument(
+            "--created-after", help="ISO 8601 date or datetime, inclusive"
+        )
+        parser.add_argument(
+            "--created-before", help="ISO 8601 date or datetime, exclusive"
+        )
+        parser.add_argument("--chunk-size", type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        verified = None
+        if options.get("verified"):
+            verified = True
+        elif options.get("unverified"):
+            verified = False
+        try:
+            queryset = export.filter_questions(
+                verified=verified,
+                category=options.get("category"),
+                created_after=options.get("created_after"),
+                created_before=options.get("created_before"),
+            )
+        except ValueError as err:
+            raise CommandError(err)
+        chunks = export.export(
+            queryset, options.get("format"), options.get("chunk_size")
+        )
+        output = options.get("output")
+        if not output:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(output, "w", newline="") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Questions exported to {output}"))
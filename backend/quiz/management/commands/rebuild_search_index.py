@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from quiz.models import Question
+from quiz.search import index_questions
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index of every question"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options.get("chunk_size")
+        ids = Question.objects.order_by("id").values_list("id", flat=True)
+        total = 0
+        chunk = []
+        for id in ids.iterator(chunk_size=chunk_size):
+            chunk.append(id)
+            if len(chunk) == chunk_size:
+                index_questions(chunk)
+                total += len(chunk)
+                chunk = []
+        index_questions(chunk)
+        total += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} questions"))
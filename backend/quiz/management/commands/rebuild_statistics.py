@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from quiz.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized statistics counters"
+
+    def handle(self, *args, **options):
+        rebuild_counters()
+        self.stdout.write(self.style.SUCCESS("Statistics counters rebuilt"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from quiz import similarity
+from quiz.models import Category
+
+
+class Command(BaseCommand):
+    help = "List the clusters of likely duplicate questions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--category", help="Slug of the category to check")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=similarity.THRESHOLD,
+            help="Lowest similarity (0 to 1) between questions of a cluster",
+        )
+
+    def handle(self, *args, **options):
+        threshold = options.get("threshold")
+        if not 0 < threshold <= 1:
+            raise CommandError("threshold must be between 0 and 1")
+        category = options.get("category")
+        if category is not None:
+            try:
+                category = Category.objects.get(slug=category)
+            except Category.DoesNotExist:
+                raise CommandError(f"invalid category: '{category}'")
+        clusters = similarity.find_clusters(category, threshold)
+        questions = similarity.describe_questions(
+            id for cluster in clusters for id in cluster
+        )
+        for cluster in clusters:
+            self.stdout.write(f"Cluster of {len(cluster)} questions:")
+            for id in cluster:
+                question = questions[id]
+                self.stdout.write(
+                    f"  {id} [{question['category']}] {question['question']}"
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Found {len(clusters)} clusters of similar questions")
+        )
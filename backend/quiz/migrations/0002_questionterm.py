@@ -0,0 +1,110 @@
+# Generated by Django 4.0 on 2026-10-18 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+import re
+from collections import Counter
+
+# the tokenizer as of this migration, quiz.search may change later
+QUESTION_WEIGHT = 3
+ANSWER_WEIGHT = 2
+EXPLANATION_WEIGHT = 1
+MAX_TERM_LENGTH = 50
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or that
+    the this to was were which what who will with
+    """.split()
+)
+TOKEN_RE = re.compile(r"\w+")
+CHUNK_SIZE = 1000
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def build_terms(question, explanation, answers):
+    weights = Counter()
+    for term in tokenize(question):
+        weights[term] += QUESTION_WEIGHT
+    for answer in answers:
+        for term in tokenize(answer):
+            weights[term] += ANSWER_WEIGHT
+    for term in tokenize(explanation):
+        weights[term] += EXPLANATION_WEIGHT
+    return weights
+
+
+def index_existing_questions(apps, schema_editor):
+    Question = apps.get_model("quiz", "Question")
+    InCorrectAnswer = apps.get_model("quiz", "InCorrectAnswer")
+    QuestionTerm = apps.get_model("quiz", "QuestionTerm")
+    rows = Question.objects.order_by("id").values_list(
+        "id", "question", "explanation", "correct_answer"
+    )
+    last = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last)[:CHUNK_SIZE])
+        if not chunk:
+            return
+        last = chunk[-1][0]
+        # the incorrect answers of the whole chunk in one query
+        options = {}
+        for question_id, option in InCorrectAnswer.objects.filter(
+            question_id__in=[row[0] for row in chunk]
+        ).values_list("question_id", "option"):
+            options.setdefault(question_id, []).append(option)
+        terms = [
+            QuestionTerm(question_id=id, term=term, weight=weight)
+            for id, question, explanation, correct_answer in chunk
+            for term, weight in build_terms(
+                question, explanation, [correct_answer, *options.get(id, [])]
+            ).items()
+        ]
+        QuestionTerm.objects.bulk_create(terms, batch_size=CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=50)),
+                ("weight", models.PositiveIntegerField(default=1)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="quiz.question",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("term", "question")},
+            },
+        ),
+        migrations.RunPython(index_existing_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.0 on 2026-10-18 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0002_questionterm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticsCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=100, unique=True)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="date_verified",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
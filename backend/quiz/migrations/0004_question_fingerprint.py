@@ -0,0 +1,26 @@
+# Generated by Django 4.0 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0003_statisticscounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="question",
+            constraint=models.UniqueConstraint(
+                fields=("fingerprint", "category"), name="unique_question_fingerprint"
+            ),
+        ),
+    ]
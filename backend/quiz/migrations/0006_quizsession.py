@@ -0,0 +1,43 @@
+# Generated by Django 4.0 on 2026-10-18 19:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0002_alter_user_date_joined"),
+        ("quiz", "0005_question_minhash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuizSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("question_ids", models.JSONField()),
+                ("result", models.JSONField(null=True)),
+                ("expires", models.DateTimeField(db_index=True)),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quiz_sessions",
+                        to="authentication.user",
+                    ),
+                ),
+            ],
+        ),
+    ]
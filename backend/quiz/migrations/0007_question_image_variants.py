@@ -0,0 +1,18 @@
+# Generated by Django 4.0 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0006_quizsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
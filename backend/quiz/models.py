@@ -1,13 +1,15 @@
 import datetime
-import random
 from typing import Dict
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from django.utils.text import slugify
 
+from . import sampling
+
 User = get_user_model()
 DIFFICULTY_CHOICES = [("easy", "Easy"), ("medium", "Medium"), ("hard", "Hard")]
 
@@ -15,34 +17,89 @@ TYPE_CHOICES = [
     ("multiple-choice", "Multiple Choice"),
     ("True / False", "True / False"),
 ]
+DIFFICULTIES = {value for value, _ in DIFFICULTY_CHOICES}
+TYPES = {value for value, _ in TYPE_CHOICES}
 
 
 def get_sentinel_category():
-    return Category.objects.get_or_create(name="deleted")
+    return Category.objects.get_or_create(name="deleted")[0]
+
+
+class QuestionQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        joins and prefetches every relation read by the question
+        serializers so a page costs the same number of queries
+        regardless of its size.
+        """
+        return self.select_related(
+            "category", "created_by", "verified_by"
+        ).prefetch_related("incorrect_answers")
 
 
-class VerifiedManager(models.Manager):
+class VerifiedManager(models.Manager.from_queryset(QuestionQuerySet)):
     def get_queryset(self):
         return super(VerifiedManager, self).get_queryset().filter(is_verified=True)
 
-    def random_all(self):
-        order_field_asc = ["date_created", "category", "difficulty", "type"]
-        order_field_desc = ["-date_created", "-category", "-difficulty", "-type"]
-        random_order_asc = random.choice(order_field_asc)
-        random_order_desc = random.choice(order_field_asc)
-        queryset = self.get_queryset().order_by(random_order_asc, random_order_desc)
-        return queryset
+    def random_ids(self, limit=50, category=None, difficulty=None, type=None):
+        """
+        returns the ids of at most `limit` verified questions drawn
+        uniformly at random from the ones matching the given filters.
+        """
+        if difficulty is not None and difficulty not in DIFFICULTIES:
+            return []
+        if type is not None and type not in TYPES:
+            return []
+        queryset = self.get_queryset()
+        if category is not None:
+            category = str(category)
+            queryset = queryset.filter(category__slug=category)
+        if difficulty is not None:
+            queryset = queryset.filter(difficulty=difficulty)
+        if type is not None:
+            queryset = queryset.filter(type=type)
+        key = ("verified", category, difficulty, type)
+        return sampling.sample_ids(queryset, key, limit)
+
+    def random_all(self, limit=50, category=None, difficulty=None, type=None):
+        """
+        returns at most `limit` verified questions drawn uniformly at
+        random from the ones matching the given filters.
+        """
+        ids = self.random_ids(limit, category, difficulty, type)
+        return sampling.fetch_in_order(self.get_queryset().with_related(), ids)
 
 
-class UnVerifiedManager(models.Manager):
+class UnVerifiedManager(models.Manager.from_queryset(QuestionQuerySet)):
     def get_queryset(self):
         return super(UnVerifiedManager, self).get_queryset().filter(is_verified=False)
 
 
+class CategoryQuerySet(models.QuerySet):
+    def with_question_counts(self):
+        """
+        annotates every category with its total, verified and
+        per-difficulty question counts using a single grouped query.
+        """
+        counts = {
+            "total_questions": Count("questions"),
+            "verified_questions": Count(
+                "questions", filter=Q(questions__is_verified=True)
+            ),
+        }
+        for difficulty, _ in DIFFICULTY_CHOICES:
+            counts[f"{difficulty}_questions"] = Count(
+                "questions", filter=Q(questions__difficulty=difficulty)
+            )
+        return self.annotate(**counts)
+
+
 class Category(models.Model):
     name = models.CharField(max_length=30, unique=True)
     slug = models.SlugField(blank=True, unique=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Categories"
 
@@ -63,13 +120,8 @@ class Category(models.Model):
         The key is the category name
         and the value is the no of questions
         """
-        categories = Category.objects.all()
-        question_count_category_dict = {}
-        for category in categories:
-            question_count_category_dict.setdefault(
-                category.name, category.questions.count()
-            )
-        return question_count_category_dict
+        categories = Category.objects.annotate(count=Count("questions"))
+        return dict(categories.values_list("name", "count"))
 
 
 class Question(models.Model):
@@ -84,7 +136,7 @@ class Question(models.Model):
     correct_answer = models.CharField(max_length=200)
     explanation = models.CharField(max_length=1000, blank=True)
     is_verified = models.BooleanField(default=False)
-    date_verified = models.DateTimeField(blank=True, null=True)
+    date_verified = models.DateTimeField(blank=True, null=True, db_index=True)
     verified_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -93,15 +145,30 @@ class Question(models.Model):
         blank=True,
     )
     image = models.ImageField(blank=True, upload_to="quiz/")
+    # see common.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     category = models.ForeignKey(
         Category, on_delete=models.SET(get_sentinel_category), related_name="questions"
     )
     date_created = models.DateTimeField(auto_now_add=True, db_index=True)
+    # see quiz.fingerprint
+    fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # see quiz.similarity
+    minhash = models.BinaryField(null=True, blank=True, editable=False)
 
-    objects = models.Manager()
+    objects = QuestionQuerySet.as_manager()
     verified = VerifiedManager()
     unverified = UnVerifiedManager()
 
+    class Meta:
+        constraints = [
+            # fingerprint first so duplicates can be looked up without
+            # knowing their category
+            models.UniqueConstraint(
+                fields=["fingerprint", "category"], name="unique_question_fingerprint"
+            )
+        ]
+
     def __str__(self):
         return self.question
 
@@ -116,7 +183,13 @@ class Question(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        # post_save receivers update derived data in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     @staticmethod
     def last_created() -> datetime.datetime:
@@ -197,3 +270,69 @@ class InCorrectAnswer(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+
+
+class QuestionTerm(models.Model):
+    """
+    an entry of the inverted index used to search questions.
+    See quiz.search.
+    """
+
+    term = models.CharField(max_length=50)
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name="terms"
+    )
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ["term", "question"]
+
+    def __str__(self):
+        return self.term
+
+
+class QuestionBucket(models.Model):
+    """
+    a band of the MinHash signature of a question, used to find
+    similar questions. See quiz.similarity.
+    """
+
+    bucket = models.BigIntegerField(db_index=True)
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name="buckets"
+    )
+
+    def __str__(self):
+        return str(self.bucket)
+
+
+class QuizSession(models.Model):
+    """
+    a quiz in progress, kept by the database session store.
+    See quiz.sessions.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, related_name="quiz_sessions"
+    )
+    question_ids = models.JSONField()
+    result = models.JSONField(null=True)
+    expires = models.DateTimeField(db_index=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class StatisticsCounter(models.Model):
+    """
+    a materialized count used by the statistics endpoint.
+    See quiz.stats.
+    """
+
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
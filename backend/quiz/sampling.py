@@ -0,0 +1,77 @@
+"""
+uniform random sampling of questions.
+
+Every filter combination gets an index of matching question ids that
+is built once per process and reused until the verified set changes.
+Drawing `limit` questions is then a `random.sample` over the index plus
+a primary key lookup, so no `ORDER BY` over the whole table is needed.
+
+The indexes are tied to their own generation, bumped only when a
+question joins or leaves the verified set or changes category,
+difficulty or type, or a category changes (see `quiz.signals`), so
+edits of question texts and answers keep the indexes. Every worker
+rebuilds an index on the next request after a bump, and drops the
+indexes of older generations then. At most MAX_INDEXES indexes are
+kept, the least recently used are dropped first, and empty indexes are
+not kept, so unknown filters cannot push out the others.
+"""
+import random
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Tuple
+
+from django.conf import settings
+
+from .caching import get_generation
+
+GENERATION_KEY = "quiz:sampling:generation"
+MAX_INDEXES = getattr(settings, "QUESTION_SAMPLING_INDEXES", 256)
+
+# maps a filter combination to (generation, ids), least recently used first
+_id_index: "OrderedDict[Hashable, Tuple[int, List[int]]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_id_index(queryset, key: Hashable) -> List[int]:
+    """
+    returns the ids of all the questions in queryset, building
+    the index for key if it is missing or stale.
+    """
+    generation = get_generation(GENERATION_KEY)
+    with _lock:
+        cached = _id_index.get(key)
+        if cached is not None and cached[0] == generation:
+            _id_index.move_to_end(key)
+            return cached[1]
+    ids = list(queryset.order_by().values_list("id", flat=True))
+    with _lock:
+        for stale in [k for k, (g, _) in _id_index.items() if g != generation]:
+            del _id_index[stale]
+        if ids:
+            _id_index[key] = (generation, ids)
+            while len(_id_index) > MAX_INDEXES:
+                _id_index.popitem(last=False)
+    return ids
+
+
+def clear_id_index():
+    with _lock:
+        _id_index.clear()
+
+
+def sample_ids(queryset, key: Hashable, limit: int) -> List[int]:
+    """
+    draws at most `limit` distinct ids uniformly at random from the
+    index of queryset.
+    """
+    ids = get_id_index(queryset, key)
+    return random.sample(ids, min(max(limit, 0), len(ids)))
+
+
+def fetch_in_order(queryset, ids: List[int]) -> list:
+    """
+    fetches the objects whose id is in ids and returns them in
+    the order of ids. ids that no longer exist are skipped.
+    """
+    objects = queryset.in_bulk(ids)
+    return [objects[id] for id in ids if id in objects]
@@ -0,0 +1,127 @@
+"""
+full-text search over questions.
+
+Questions are tokenized into an inverted index (`QuestionTerm`) that maps
+every term to the questions containing it together with a weight. A
+search looks the query terms up through the `(term, question)` index and
+ranks questions by the number of query terms they contain and then by
+the total weight of those terms, so no table scan or `LIKE '%..%'` is
+needed.
+
+The index is plain rows and indexed lookups, so it behaves the same on
+Postgres, the PlanetScale (MySQL) engine and SQLite.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import InCorrectAnswer, Question, QuestionTerm
+from .sampling import fetch_in_order
+
+QUESTION_WEIGHT = 3
+ANSWER_WEIGHT = 2
+EXPLANATION_WEIGHT = 1
+MAX_TERM_LENGTH = 50
+
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or that
+    the this to was were which what who will with
+    """.split()
+)
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    splits text into lowercase search terms without stop words.
+    """
+    if not text:
+        return []
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+def build_terms(
+    question: str, explanation: str, answers: Iterable[str]
+) -> Dict[str, int]:
+    """
+    returns the weight of every term of a question.
+    """
+    weights = Counter()
+    for term in tokenize(question):
+        weights[term] += QUESTION_WEIGHT
+    for answer in answers:
+        for term in tokenize(answer):
+            weights[term] += ANSWER_WEIGHT
+    for term in tokenize(explanation):
+        weights[term] += EXPLANATION_WEIGHT
+    return weights
+
+
+def index_questions(question_ids: Iterable[int]):
+    """
+    (re)builds the index entries of the given questions.
+    """
+    question_ids = list(question_ids)
+    if not question_ids:
+        return
+    answers = {}
+    for question_id, option in InCorrectAnswer.objects.filter(
+        question_id__in=question_ids
+    ).values_list("question_id", "option"):
+        answers.setdefault(question_id, []).append(option)
+    terms = []
+    questions = Question.objects.filter(id__in=question_ids).values_list(
+        "id", "question", "explanation", "correct_answer"
+    )
+    for question_id, text, explanation, correct_answer in questions:
+        options = [correct_answer, *answers.get(question_id, [])]
+        for term, weight in build_terms(text, explanation, options).items():
+            terms.append(
+                QuestionTerm(question_id=question_id, term=term, weight=weight)
+            )
+    with transaction.atomic():
+        QuestionTerm.objects.filter(question_id__in=question_ids).delete()
+        QuestionTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def index_question(question: Question):
+    index_questions([question.id])
+
+
+def search(query: str, offset: int = 0, limit: int = 50, **filters) -> list:
+    """
+    returns the questions that match query, most relevant first.
+    """
+    ids = search_ids(query, offset, limit, **filters)
+    return fetch_in_order(Question.objects.with_related(), ids)
+
+
+def search_ids(query: str, offset: int = 0, limit: int = 50, **filters) -> List[int]:
+    """
+    returns the ids of the questions that match query, most relevant
+    first.
+
+    filters are lookups on Question, e.g. `is_verified=True`. They are
+    joined onto the index rather than run as a subquery so only the
+    questions containing a query term are ever visited.
+    """
+    terms = set(tokenize(query))
+    if not terms or limit <= 0:
+        return []
+    lookups = {f"question__{field}": value for field, value in filters.items()}
+    ranked = (
+        QuestionTerm.objects.filter(term__in=terms, **lookups)
+        .values("question_id")
+        .annotate(matches=Count("id"), score=Sum("weight"))
+        .order_by("-matches", "-score", "-question_id")[offset : offset + limit]
+    )
+    return [row["question_id"] for row in ranked]
@@ -1,5 +1,20 @@
-from rest_framework import serializers
-from .models import InCorrectAnswer, Question, Category
+from common.images import VariantsField
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from .fingerprint import find_duplicates, fingerprint
+from .models import DIFFICULTY_CHOICES, InCorrectAnswer, Question, Category
+from .search import index_question
+
+User = get_user_model()
+MAX_VERIFICATION_IDS = 5000
+
+
+class DuplicateQuestion(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This question already exists in this category"
+    default_code = "duplicate"
 
 
 class IncorrectAnswerSerializer(serializers.Serializer):
@@ -14,6 +29,7 @@ class QuestionPublicSerializer(serializers.ModelSerializer):
     )
     incorrect_answer_fields = IncorrectAnswerSerializer(write_only=True)
     incorrect_answers = serializers.SerializerMethodField()
+    image_variants = VariantsField("image")
 
     class Meta:
         model = Question
@@ -28,10 +44,12 @@ class QuestionPublicSerializer(serializers.ModelSerializer):
             "incorrect_answer_fields",
             "explanation",
             "image",
+            "image_variants",
         ]
 
     def get_incorrect_answers(self, obj):
-        return obj.incorrect_answers.values_list("option", flat=True)
+        # iterate .all() so prefetched answers are used
+        return [answer.option for answer in obj.incorrect_answers.all()]
 
     def validate(self, data):
         if (
@@ -48,13 +66,29 @@ class QuestionPublicSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         category = validated_data.pop("category")["slug"]
         incorrect_answers = validated_data.pop("incorrect_answer_fields")
-        question = Question.objects.create(**validated_data, category=category)
-        incorrect_answers_list = []
-        for incorrect_answer in incorrect_answers.values():
-            incorrect_answers_list.append(
-                InCorrectAnswer(question=question, option=incorrect_answer)
-            )
-        InCorrectAnswer.objects.bulk_create(incorrect_answers_list)
+        value = fingerprint(
+            validated_data["question"],
+            validated_data["correct_answer"],
+            incorrect_answers.values(),
+        )
+        if find_duplicates([(category.id, value)]):
+            raise DuplicateQuestion()
+        try:
+            with transaction.atomic():
+                question = Question.objects.create(
+                    **validated_data, category=category, fingerprint=value
+                )
+                incorrect_answers_list = []
+                for incorrect_answer in incorrect_answers.values():
+                    incorrect_answers_list.append(
+                        InCorrectAnswer(question=question, option=incorrect_answer)
+                    )
+                InCorrectAnswer.objects.bulk_create(incorrect_answers_list)
+                # bulk_create skips signals so the answers are indexed here
+                index_question(question)
+        except IntegrityError:
+            # the same question was created concurrently since the check
+            raise DuplicateQuestion()
         question.refresh_from_db()
         return question
 
@@ -88,11 +122,42 @@ class QuestionPublicSerializer(serializers.ModelSerializer):
         return instance
 
 
+class PrefetchedCategoryField(serializers.PrimaryKeyRelatedField):
+    """
+    resolves categories from the `categories` dict of the serializer
+    context, so validating many questions does not run one query each.
+    """
+
+    def to_internal_value(self, data):
+        categories = self.context.get("categories")
+        if categories is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return categories[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class QuestionBatchItemSerializer(QuestionPublicSerializer):
+    """
+    validates one question of a batch, see quiz.batch.
+    """
+
+    category = PrefetchedCategoryField(
+        source="category.slug", queryset=Category.objects.all()
+    )
+
+
 class QuestionDetailSerializer(serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source="created_by.username")
     verified_by = serializers.ReadOnlyField(source="verified_by.username")
     category = serializers.ReadOnlyField(source="category.slug")
     incorrect_answers = serializers.SerializerMethodField()
+    image_variants = VariantsField("image")
 
     class Meta:
         model = Question
@@ -106,6 +171,7 @@ class QuestionDetailSerializer(serializers.ModelSerializer):
             "incorrect_answers",
             "explanation",
             "image",
+            "image_variants",
             "created_by",
             "date_created",
             "is_verified",
@@ -114,10 +180,105 @@ class QuestionDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_incorrect_answers(self, obj):
-        return obj.incorrect_answers.values_list("option", flat=True)
+        # iterate .all() so prefetched answers are used
+        return [answer.option for answer in obj.incorrect_answers.all()]
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         fields = ["id", "name", "slug"]
         model = Category
+
+
+class CategoryCountSerializer(CategorySerializer):
+    """
+    expects categories annotated by with_question_counts.
+    """
+
+    question_counts = serializers.SerializerMethodField()
+
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ["question_counts"]
+
+    def get_question_counts(self, obj):
+        return {
+            "total": obj.total_questions,
+            "verified": obj.verified_questions,
+            "unverified": obj.total_questions - obj.verified_questions,
+            "difficulty": {
+                difficulty: getattr(obj, f"{difficulty}_questions")
+                for difficulty, _ in DIFFICULTY_CHOICES
+            },
+        }
+
+
+class QuizSessionSerializer(serializers.Serializer):
+    """
+    validates the filters a quiz is drawn with, see QuizSessionCreateView.
+    """
+
+    category = serializers.CharField(required=False)
+    difficulty = serializers.CharField(required=False)
+    type = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+
+class QuestionVerificationSerializer(serializers.Serializer):
+    """
+    selects the questions of a bulk verification by id, by filter or
+    both, see quiz.verification.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_VERIFICATION_IDS,
+    )
+    category = serializers.SlugRelatedField(
+        slug_field="slug", queryset=Category.objects.all(), required=False
+    )
+    created_by = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.all(), required=False
+    )
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate_ids(self, ids):
+        ids = set(ids)
+        found = set(Question.objects.filter(id__in=ids).values_list("id", flat=True))
+        missing = sorted(ids - found)
+        if missing:
+            raise serializers.ValidationError(
+                f"Questions {', '.join(map(str, missing))} do not exist"
+            )
+        return sorted(ids)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError(
+                "Give the ids of the questions or at least one filter"
+            )
+        after, before = data.get("created_after"), data.get("created_before")
+        if after and before and after > before:
+            raise serializers.ValidationError(
+                {"created_before": "created_before must be after created_after"}
+            )
+        return data
+
+    def get_queryset(self):
+        filters = {
+            "id__in": "ids",
+            "category": "category",
+            "created_by": "created_by",
+            "date_created__gte": "created_after",
+            # exclusive like the export, see quiz.export.filter_questions
+            "date_created__lt": "created_before",
+        }
+        return Question.objects.filter(
+            **{
+                lookup: self.validated_data[field]
+                for lookup, field in filters.items()
+                if field in self.validated_data
+            }
+        )
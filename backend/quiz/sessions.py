@@ -0,0 +1,194 @@
+"""
+quiz sessions graded on the server.
+
+A session snapshots the ids of the questions drawn for it, so the
+questions can be served without their answers and the answers submitted
+at the end graded against the same questions, reading every correct
+answer with one query.
+
+Sessions live in the store named by the QUIZ_SESSION_STORE setting:
+`DatabaseSessionStore` (the default) keeps them in the QuizSession table
+and `CacheSessionStore` in the default cache, where a session costs no
+database write at all.
+"""
+import datetime
+import random
+import secrets
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .fingerprint import normalize
+from .models import Question, QuizSession
+
+DEFAULT_STORE = "quiz.sessions.DatabaseSessionStore"
+TIMEOUT = getattr(settings, "QUIZ_SESSION_TIMEOUT", 2 * 60 * 60)
+# the fields of the public payload of a question served during a quiz
+QUIZ_FIELDS = [
+    "id",
+    "question",
+    "difficulty",
+    "type",
+    "category",
+    "image",
+    "image_variants",
+]
+
+
+class SessionGraded(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The answers of this quiz were already submitted"
+    default_code = "graded"
+
+
+class DatabaseSessionStore:
+    def save(self, session: dict):
+        QuizSession.objects.create(
+            key=session["key"],
+            user_id=session["user"],
+            question_ids=session["questions"],
+            expires=session["expires"],
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        session = QuizSession.objects.filter(
+            key=key, expires__gt=timezone.now()
+        ).first()
+        if session is None:
+            return None
+        return {
+            "key": session.key,
+            "user": session.user_id,
+            "questions": session.question_ids,
+            "expires": session.expires,
+            "result": session.result,
+        }
+
+    def set_result(self, key: str, result: dict) -> bool:
+        # the filter makes concurrent submissions grade the session once
+        return bool(
+            QuizSession.objects.filter(key=key, result__isnull=True).update(
+                result=result
+            )
+        )
+
+
+class CacheSessionStore:
+    def cache_key(self, key: str) -> str:
+        return f"quiz:session:{key}"
+
+    def timeout(self, session: dict) -> int:
+        return max(int((session["expires"] - timezone.now()).total_seconds()), 1)
+
+    def save(self, session: dict):
+        cache.set(self.cache_key(session["key"]), session, self.timeout(session))
+
+    def get(self, key: str) -> Optional[dict]:
+        return cache.get(self.cache_key(key))
+
+    def set_result(self, key: str, result: dict) -> bool:
+        session = self.get(key)
+        if session is None:
+            return False
+        # add is atomic, so only one submission gets to store its result
+        if not cache.add(f"{self.cache_key(key)}:graded", True, self.timeout(session)):
+            return False
+        session["result"] = result
+        self.save(session)
+        return True
+
+
+def get_store():
+    return import_string(getattr(settings, "QUIZ_SESSION_STORE", DEFAULT_STORE))()
+
+
+def start_session(question_ids: List[int], user=None) -> dict:
+    session = {
+        "key": secrets.token_urlsafe(24),
+        "user": user.id if user is not None and user.is_authenticated else None,
+        "questions": list(question_ids),
+        "expires": timezone.now() + datetime.timedelta(seconds=TIMEOUT),
+        "result": None,
+    }
+    get_store().save(session)
+    return session
+
+
+def get_session(key: str, user=None) -> Optional[dict]:
+    """
+    returns the session of key, or None when it expired or belongs to
+    another user.
+    """
+    session = get_store().get(key)
+    if session is None or session["user"] is None:
+        return session
+    if user is None or session["user"] != user.id:
+        return None
+    return session
+
+
+def quiz_questions(session: dict, payloads: List[dict]) -> List[dict]:
+    """
+    strips the answers from the public payload of the questions of a
+    session. The options are shuffled the same way on every request of
+    the session.
+    """
+    questions = []
+    for payload in payloads:
+        options = [payload["correct_answer"], *payload["incorrect_answers"]]
+        random.Random(f"{session['key']}:{payload['id']}").shuffle(options)
+        question = {field: payload.get(field) for field in QUIZ_FIELDS}
+        questions.append({**question, "options": options})
+    return questions
+
+
+def grade(session: dict, answers: Dict[str, str]) -> dict:
+    """
+    grades the answers, keyed by question id, of a session and stores
+    the result. Raises SessionGraded when the session was already graded.
+    """
+    if session["result"] is not None:
+        raise SessionGraded()
+    questions = {
+        id: (correct_answer, explanation)
+        for id, correct_answer, explanation in Question.verified.filter(
+            id__in=session["questions"]
+        ).values_list("id", "correct_answer", "explanation")
+    }
+    results = []
+    for id in session["questions"]:
+        # questions deleted or unverified since the session started are
+        # no longer served, so they are not graded either
+        if id not in questions:
+            continue
+        correct_answer, explanation = questions[id]
+        answer = answers.get(str(id))
+        results.append(
+            {
+                "id": id,
+                "answer": answer,
+                "correct": answer is not None
+                and normalize(answer) == normalize(correct_answer),
+                "correct_answer": correct_answer,
+                "explanation": explanation,
+            }
+        )
+    result = {
+        "score": sum(result["correct"] for result in results),
+        "total": len(results),
+        "results": results,
+    }
+    if not get_store().set_result(session["key"], result):
+        raise SessionGraded()
+    return result
+
+
+def clear_expired() -> int:
+    """deletes the expired sessions of the database store"""
+    deleted, _ = QuizSession.objects.filter(expires__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,246 @@
+from functools import partial
+
+from common.images import variants_processed
+from common.tasks import schedule_image_processing, schedule_variants_deletion
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import decks, sampling, stats
+from .caching import USERS_GENERATION_KEY, bump_generation_on_commit
+from .fingerprint import refresh_fingerprints
+from .models import Category, InCorrectAnswer, Question
+from .search import index_question
+from .similarity import index_signatures
+from .tasks import schedule_category_decks_rebuild, schedule_deck_refresh
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=InCorrectAnswer)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def question_changed(sender, instance, **kwargs):
+    """invalidate everything derived from the question bank"""
+    bump_generation_on_commit()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # the sampling indexes filter by category slug
+    bump_generation_on_commit(sampling.GENERATION_KEY)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """invalidate everything derived from the users, e.g. statistics"""
+    bump_generation_on_commit(USERS_GENERATION_KEY)
+
+
+# the fields the search terms, signature and fingerprint are built from
+TEXT_FIELDS = ("question", "correct_answer", "explanation")
+
+
+def text_state(question: Question):
+    if set(TEXT_FIELDS) & question.get_deferred_fields():
+        return None
+    return tuple(getattr(question, field) for field in TEXT_FIELDS)
+
+
+@receiver(post_init, sender=Question)
+def remember_text_state(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._text_state = text_state(instance)
+
+
+def text_changed(instance, created, update_fields) -> bool:
+    """tells whether a save may have changed the text of a question"""
+    if update_fields is not None and not set(TEXT_FIELDS) & set(update_fields):
+        return False
+    old = None if created else getattr(instance, "_text_state", None)
+    new = text_state(instance)
+    instance._text_state = new
+    return old is None or old != new
+
+
+@receiver(post_save, sender=Question)
+def reindex_question(sender, instance, created, update_fields, **kwargs):
+    # saves that leave the text alone, e.g. verifications, keep the
+    # derived text data
+    if not text_changed(instance, created, update_fields):
+        return
+    index_question(instance)
+    index_signatures([instance.id])
+    # questions created with their answers are fingerprinted by the
+    # code creating them, see QuestionPublicSerializer and quiz.batch
+    if not (created and instance.fingerprint is not None):
+        refresh_fingerprints([instance.id])
+    # both are written with queryset updates, the next save of instance
+    # would put back the old values
+    instance.refresh_from_db(fields=["fingerprint", "minhash"])
+
+
+@receiver(post_save, sender=InCorrectAnswer)
+def reindex_answer_question(sender, instance, **kwargs):
+    # answers removed with their question are cleaned up by the
+    # cascade on QuestionTerm, so only saves are handled here.
+    index_question(instance.question)
+
+
+@receiver(post_save, sender=InCorrectAnswer)
+def refresh_answer_fingerprint(sender, instance, **kwargs):
+    refresh_fingerprints([instance.question_id])
+    if InCorrectAnswer.question.is_cached(instance):
+        instance.question.refresh_from_db(fields=["fingerprint"])
+
+
+@receiver(post_save, sender=Question)
+def process_question_image(sender, instance, **kwargs):
+    schedule_image_processing(instance, "image", "image_variants")
+
+
+@receiver(post_delete, sender=Question)
+def delete_question_image_variants(sender, instance, **kwargs):
+    schedule_variants_deletion(instance, "image", "image_variants")
+
+
+@receiver(variants_processed, sender=Question)
+def question_image_processed(sender, pk, **kwargs):
+    # cached payloads and decks carry the variant urls
+    bump_generation_on_commit()
+    schedule_deck_refresh([(pk, None)])
+
+
+@receiver(post_init, sender=Question)
+def remember_deck_state(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._deck_state = decks.question_state(instance)
+
+
+@receiver(post_save, sender=Question)
+def refresh_question_decks(sender, instance, created, **kwargs):
+    old = None if created else getattr(instance, "_deck_state", None)
+    new = decks.question_state(instance)
+    instance._deck_state = new
+    if created and not instance.is_verified:
+        return
+    if not decks.affects_decks(old, new):
+        return
+    if old is None or old != new:
+        # the question joined, left or moved between sampling indexes
+        bump_generation_on_commit(sampling.GENERATION_KEY)
+    if new is not None:
+        # an unverified question stops being dealt before the decks are
+        # patched
+        transaction.on_commit(partial(decks.withdraw, [instance.id], not new[3]))
+    schedule_deck_refresh([(instance.id, old)])
+
+
+@receiver(post_delete, sender=Question)
+def remove_question_from_decks(sender, instance, **kwargs):
+    state = getattr(instance, "_deck_state", None) or decks.question_state(instance)
+    if decks.affects_decks(state, None):
+        bump_generation_on_commit(sampling.GENERATION_KEY)
+        transaction.on_commit(partial(decks.withdraw, [instance.id]))
+        schedule_deck_refresh([(instance.id, state)])
+
+
+@receiver(post_save, sender=InCorrectAnswer)
+def refresh_answer_decks(sender, instance, **kwargs):
+    # the old state of the question is unknown, so only the decks of
+    # its current combinations are patched
+    if instance.question.is_verified:
+        schedule_deck_refresh([(instance.question_id, None)])
+
+
+def remember_state(instance, keys):
+    instance._statistics_keys = keys
+
+
+def count_change(instance, created, keys):
+    """
+    moves instance from the counters it was counted towards
+    to the ones it is now counted towards.
+    """
+    old_keys = [] if created else getattr(instance, "_statistics_keys", None)
+    if old_keys is None or keys is None:
+        # the previous state is unknown so recount everything
+        stats.rebuild_counters()
+    else:
+        stats.apply_deltas(stats.state_deltas(old_keys, keys))
+    remember_state(instance, keys)
+
+
+def uncount(keys):
+    if keys is None:
+        stats.rebuild_counters()
+    else:
+        stats.apply_deltas(stats.state_deltas(keys, []))
+
+
+@receiver(post_init, sender=Question)
+def remember_question_state(sender, instance, **kwargs):
+    if stats.is_materialized() and instance.pk is not None:
+        remember_state(instance, stats.question_state_keys(instance))
+
+
+@receiver(post_save, sender=Question)
+def count_question(sender, instance, created, **kwargs):
+    if stats.is_materialized():
+        count_change(instance, created, stats.question_state_keys(instance))
+
+
+@receiver(post_delete, sender=Question)
+def uncount_question(sender, instance, **kwargs):
+    if stats.is_materialized():
+        uncount(stats.question_state_keys(instance))
+
+
+@receiver(post_init, sender=User)
+def remember_user_state(sender, instance, **kwargs):
+    if stats.is_materialized() and instance.pk is not None:
+        remember_state(instance, stats.user_state_keys(instance))
+
+
+@receiver(post_save, sender=User)
+def count_user(sender, instance, created, **kwargs):
+    if stats.is_materialized():
+        count_change(instance, created, stats.user_state_keys(instance))
+
+
+@receiver(post_delete, sender=User)
+def uncount_user(sender, instance, **kwargs):
+    if stats.is_materialized():
+        uncount(stats.user_state_keys(instance))
+
+
+@receiver(post_init, sender=Category)
+def remember_category_slug(sender, instance, **kwargs):
+    # None when deferred, reading it would cost a query
+    instance._deck_slug = instance.__dict__.get("slug")
+
+
+@receiver(post_save, sender=Category)
+def rebuild_renamed_category_decks(sender, instance, created, **kwargs):
+    # the decks are keyed by slug and their payloads name the category
+    old = getattr(instance, "_deck_slug", None)
+    instance._deck_slug = instance.slug
+    if not created and old != instance.slug:
+        schedule_category_decks_rebuild([old] if old else [])
+
+
+@receiver(post_delete, sender=Category)
+def rebuild_deleted_category_decks(sender, instance, **kwargs):
+    schedule_category_decks_rebuild([instance.slug])
+
+
+@receiver(post_delete, sender=Category)
+def recount_categories(sender, instance, **kwargs):
+    # the questions of a deleted category are moved with a bulk update
+    if stats.is_materialized():
+        stats.rebuild_counters()
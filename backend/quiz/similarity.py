@@ -0,0 +1,242 @@
+"""
+near-duplicate detection of questions with MinHash and LSH.
+
+The question text and correct answer are split into overlapping
+character shingles, and the shingles summarized by a MinHash signature:
+the share of equal positions in the signatures of two questions
+estimates the Jaccard similarity of their shingles. Signatures are
+stored on `Question.minhash`.
+
+The signature is also cut into BANDS bands of ROWS values, and the hash
+of every band stored as a `QuestionBucket`. Similar questions very
+likely share a bucket and dissimilar ones very likely do not, so the
+candidates for a question are found through the bucket index, and only
+the candidates are compared. Neither lookups nor clusters compare every
+pair of questions.
+"""
+import hashlib
+import random
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count
+
+from .fingerprint import normalize
+from .models import Question, QuestionBucket
+from .search import TOKEN_RE
+
+SHINGLE_SIZE = 5
+BANDS = 16
+ROWS = 4
+NUM_PERMUTATIONS = BANDS * ROWS
+# with 16 bands of 4 rows questions 70% similar share a bucket 99% of
+# the time and questions 30% similar 12% of the time
+THRESHOLD = 0.7
+MAX_CANDIDATES = 100
+# buckets holding more questions than this are boilerplate shared by
+# unrelated questions, comparing all of them would be quadratic
+MAX_BUCKET_SIZE = 200
+# the smallest prime above 2 ** 32, products stay small enough to be fast
+PRIME = 4294967311
+MAX_HASH = (1 << 32) - 1
+SIGNATURE_FORMAT = f">{NUM_PERMUTATIONS}I"
+
+_random = random.Random(1729)
+PERMUTATIONS = [
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def shingles(question: str, correct_answer: str = "") -> Set[int]:
+    """
+    returns the hashes of the character shingles of a question, with
+    case, accents and punctuation folded.
+    """
+    words = TOKEN_RE.findall(normalize(f"{question} {correct_answer}"))
+    text = " ".join(words)
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())}
+    return {
+        zlib.crc32(text[i : i + SHINGLE_SIZE].encode())
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(question: str, correct_answer: str = "") -> Tuple[int, ...]:
+    hashes = list(shingles(question, correct_answer))
+    return tuple(
+        min([(a * h + b) % PRIME for h in hashes]) & MAX_HASH for a, b in PERMUTATIONS
+    )
+
+
+def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """estimates the Jaccard similarity of two questions"""
+    return sum(x == y for x, y in zip(first, second)) / NUM_PERMUTATIONS
+
+
+def pack(signature: Tuple[int, ...]) -> bytes:
+    return struct.pack(SIGNATURE_FORMAT, *signature)
+
+
+def unpack(value: bytes) -> Tuple[int, ...]:
+    return struct.unpack(SIGNATURE_FORMAT, bytes(value))
+
+
+def buckets(signature: Tuple[int, ...]) -> List[int]:
+    """
+    returns the bucket of every band of a signature, as signed 64 bit
+    integers so they fit a BigIntegerField.
+    """
+    values = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS]
+        digest = hashlib.blake2b(
+            struct.pack(f">B{ROWS}I", band, *rows), digest_size=8
+        ).digest()
+        values.append(int.from_bytes(digest, "big", signed=True))
+    return values
+
+
+def index_signatures(question_ids: Iterable[int]):
+    """
+    (re)computes the signature and buckets of the given questions.
+    """
+    question_ids = list(question_ids)
+    if not question_ids:
+        return
+    questions, rows = [], []
+    for id, text, correct_answer in Question.objects.filter(
+        id__in=question_ids
+    ).values_list("id", "question", "correct_answer"):
+        value = signature(text, correct_answer)
+        questions.append(Question(id=id, minhash=pack(value)))
+        rows += [QuestionBucket(question_id=id, bucket=b) for b in buckets(value)]
+    with transaction.atomic():
+        Question.objects.bulk_update(questions, ["minhash"], batch_size=1000)
+        QuestionBucket.objects.filter(question_id__in=question_ids).delete()
+        QuestionBucket.objects.bulk_create(rows, batch_size=1000)
+
+
+def read_signatures(question_ids: Iterable[int]) -> Dict[int, Tuple[int, ...]]:
+    return {
+        id: unpack(value)
+        for id, value in Question.objects.filter(
+            id__in=list(question_ids), minhash__isnull=False
+        ).values_list("id", "minhash")
+    }
+
+
+def similar_questions(
+    question: str,
+    correct_answer: str = "",
+    exclude: Optional[int] = None,
+    threshold: float = THRESHOLD,
+    limit: int = 5,
+) -> List[Tuple[int, float]]:
+    """
+    returns the id and similarity of the questions most similar to the
+    given one, most similar first.
+    """
+    value = signature(question, correct_answer)
+    candidates = QuestionBucket.objects.filter(bucket__in=buckets(value))
+    if exclude is not None:
+        candidates = candidates.exclude(question_id=exclude)
+    # the questions sharing the most buckets are the most similar ones
+    ids = (
+        candidates.values("question_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared")
+        .values_list("question_id", flat=True)[:MAX_CANDIDATES]
+    )
+    scores = [
+        (id, similarity(value, other)) for id, other in read_signatures(ids).items()
+    ]
+    scores = [(id, score) for id, score in scores if score >= threshold]
+    scores.sort(key=lambda score: (-score[1], score[0]))
+    return scores[:limit]
+
+
+class Clusters:
+    """union-find of question ids"""
+
+    def __init__(self):
+        self.parents = {}
+
+    def find(self, id: int) -> int:
+        parent = self.parents.setdefault(id, id)
+        while parent != self.parents[parent]:
+            self.parents[parent] = self.parents[self.parents[parent]]
+            parent = self.parents[parent]
+        self.parents[id] = parent
+        return parent
+
+    def union(self, first: int, second: int):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parents[max(first, second)] = min(first, second)
+
+    def groups(self) -> List[List[int]]:
+        groups = {}
+        for id in self.parents:
+            groups.setdefault(self.find(id), []).append(id)
+        return sorted(sorted(group) for group in groups.values() if len(group) > 1)
+
+
+def find_clusters(
+    category=None, threshold: float = THRESHOLD, chunk_size: int = 1000
+) -> List[List[int]]:
+    """
+    returns the ids of every cluster of similar questions, optionally of
+    a single category. Only questions sharing a bucket are compared, a
+    chunk of buckets at a time.
+    """
+    rows = QuestionBucket.objects.all()
+    if category is not None:
+        rows = rows.filter(question__category=category)
+    shared = (
+        rows.values("bucket")
+        .annotate(size=Count("id"))
+        .filter(size__gt=1, size__lte=MAX_BUCKET_SIZE)
+        .order_by("bucket")
+        .values_list("bucket", flat=True)
+    )
+    clusters = Clusters()
+    chunk = []
+    for bucket in shared.iterator(chunk_size=chunk_size):
+        chunk.append(bucket)
+        if len(chunk) == chunk_size:
+            compare_buckets(rows, chunk, clusters, threshold)
+            chunk = []
+    compare_buckets(rows, chunk, clusters, threshold)
+    return clusters.groups()
+
+
+def compare_buckets(rows, chunk: List[int], clusters: Clusters, threshold: float):
+    if not chunk:
+        return
+    members = {}
+    for bucket, id in rows.filter(bucket__in=chunk).values_list(
+        "bucket", "question_id"
+    ):
+        members.setdefault(bucket, []).append(id)
+    signatures = read_signatures({id for ids in members.values() for id in ids})
+    for ids in members.values():
+        for i, first in enumerate(ids):
+            for second in ids[i + 1 :]:
+                if clusters.find(first) == clusters.find(second):
+                    continue
+                if similarity(signatures[first], signatures[second]) >= threshold:
+                    clusters.union(first, second)
+
+
+def describe_questions(question_ids: Iterable[int]) -> Dict[int, dict]:
+    """returns the id, text and category of the given questions"""
+    return {
+        id: {"id": id, "question": text, "category": category}
+        for id, text, category in Question.objects.filter(
+            id__in=list(question_ids)
+        ).values_list("id", "question", "category__slug")
+    }
@@ -0,0 +1,253 @@
+"""
+statistics about questions, categories and users.
+
+Statistics are computed with conditional aggregation: the question,
+difficulty, category and activity sections come out of one query and the
+users section out of a second one. Only the sections asked for are
+computed.
+
+With `MATERIALIZED_STATISTICS` enabled the counts are instead read from
+`StatisticsCounter` rows that are updated in the same transaction as the
+question or user change (see `quiz.signals`), so reading them does not
+depend on the size of the bank. Run `manage.py rebuild_statistics` after
+enabling it or after bulk changes that skip model signals.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+
+from .models import DIFFICULTY_CHOICES, Category, Question, StatisticsCounter
+
+User = get_user_model()
+SECTIONS = ["category", "difficulty", "question", "users", "activity"]
+DIFFICULTIES = [difficulty for difficulty, _ in DIFFICULTY_CHOICES]
+
+
+def is_materialized() -> bool:
+    return getattr(settings, "MATERIALIZED_STATISTICS", False)
+
+
+def question_keys(
+    is_verified: bool, difficulty: str, category_id: Optional[int]
+) -> List[str]:
+    """
+    returns the counters a question in the given state counts towards.
+    """
+    keys = ["questions", f"difficulty:{difficulty}", f"category:{category_id}"]
+    if is_verified:
+        keys.append("verified")
+    return keys
+
+
+def user_keys(is_staff: bool) -> List[str]:
+    return ["users", "staff"] if is_staff else ["users"]
+
+
+def question_state_keys(question: Question) -> Optional[List[str]]:
+    """
+    returns the counters question counts towards, or None when
+    its state is not loaded.
+    """
+    if {"is_verified", "difficulty", "category_id"} & question.get_deferred_fields():
+        return None
+    return question_keys(
+        question.is_verified, question.difficulty, question.category_id
+    )
+
+
+def user_state_keys(user) -> Optional[List[str]]:
+    if "is_staff" in user.get_deferred_fields():
+        return None
+    return user_keys(user.is_staff)
+
+
+def state_deltas(old_keys: Iterable[str], new_keys: Iterable[str]) -> Dict[str, int]:
+    """
+    returns the change of every counter when an object counted
+    towards old_keys is now counted towards new_keys.
+    """
+    deltas = Counter(new_keys)
+    deltas.subtract(Counter(old_keys))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_deltas(deltas: Dict[str, int]):
+    """
+    adds every delta to its counter with a single UPDATE per counter.
+    """
+    with transaction.atomic():
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            counter = StatisticsCounter.objects.filter(key=key)
+            if not counter.update(value=F("value") + delta):
+                StatisticsCounter.objects.get_or_create(key=key)
+                counter.update(value=F("value") + delta)
+
+
+def compute_counters() -> Dict[str, int]:
+    """
+    counts everything from the question and user tables.
+    """
+    counters = Counter()
+    rows = Question.objects.values("is_verified", "difficulty", "category_id")
+    for row in rows.annotate(count=Count("id")).order_by():
+        for key in question_keys(
+            row["is_verified"], row["difficulty"], row["category_id"]
+        ):
+            counters[key] += row["count"]
+    users = User.objects.aggregate(
+        users=Count("id"), staff=Count("id", filter=Q(is_staff=True))
+    )
+    counters.update(users)
+    return counters
+
+
+def rebuild_counters():
+    """
+    replaces the materialized counters with freshly computed ones.
+    """
+    counters = compute_counters()
+    with transaction.atomic():
+        StatisticsCounter.objects.all().delete()
+        StatisticsCounter.objects.bulk_create(
+            [StatisticsCounter(key=key, value=value) for key, value in counters.items()]
+        )
+
+
+def read_counters() -> Dict[str, int]:
+    counters = dict(StatisticsCounter.objects.values_list("key", "value"))
+    if "questions" not in counters:
+        # never built, e.g. right after enabling MATERIALIZED_STATISTICS
+        rebuild_counters()
+        counters = dict(StatisticsCounter.objects.values_list("key", "value"))
+    return counters
+
+
+def get_activity() -> dict:
+    """
+    unverified questions never have a date_verified so the maximum
+    of both indexed columns is enough.
+    """
+    return Question.objects.aggregate(
+        last_created=Max("date_created"), last_verified=Max("date_verified")
+    )
+
+
+def build_sections(
+    counters: Dict[str, int], category_names: Dict[int, str], sections: List[str]
+) -> dict:
+    data = {}
+    if "question" in sections:
+        data["question"] = {
+            "all_questions": counters.get("questions", 0),
+            "verified_questions": counters.get("verified", 0),
+            "unverified_questions": counters.get("questions", 0)
+            - counters.get("verified", 0),
+        }
+    if "difficulty" in sections:
+        data["difficulty"] = {
+            difficulty: counters.get(f"difficulty:{difficulty}", 0)
+            for difficulty in DIFFICULTIES
+        }
+    if "category" in sections:
+        data["category"] = {
+            name: counters.get(f"category:{id}", 0)
+            for id, name in category_names.items()
+        }
+    if "users" in sections:
+        data["users"] = {
+            "Total Users": counters.get("users", 0),
+            "Total Staff": counters.get("staff", 0),
+        }
+    if "activity" in sections:
+        data["activity"] = {
+            "last_created": counters.get("last_created"),
+            "last_verified": counters.get("last_verified"),
+        }
+    return data
+
+
+def aggregate_counters(sections: List[str]) -> Dict[str, object]:
+    """
+    computes the counters needed by sections with conditional
+    aggregation, one query for questions and one for users.
+    """
+    counters = {}
+    aggregates = {}
+    if "question" in sections:
+        aggregates["questions"] = Count("id")
+        aggregates["verified"] = Count("id", filter=Q(is_verified=True))
+    if "difficulty" in sections:
+        for difficulty in DIFFICULTIES:
+            aggregates[f"difficulty:{difficulty}"] = Count(
+                "id", filter=Q(difficulty=difficulty)
+            )
+    if "activity" in sections:
+        aggregates["last_created"] = Max("date_created")
+        aggregates["last_verified"] = Max("date_verified")
+    if aggregates:
+        counters.update(Question.objects.aggregate(**aggregates))
+    if "users" in sections:
+        counters.update(
+            User.objects.aggregate(
+                users=Count("id"), staff=Count("id", filter=Q(is_staff=True))
+            )
+        )
+    return counters
+
+
+def group_counters(sections: List[str]):
+    """
+    computes every question counter with a single query grouped by
+    category, verification and difficulty. Returns the counters and
+    the name of every category.
+    """
+    counters = Counter()
+    category_names = {}
+    activity = {"last_created": None, "last_verified": None}
+    rows = Category.objects.values(
+        "id", "name", "questions__is_verified", "questions__difficulty"
+    ).annotate(
+        count=Count("questions"),
+        last_created=Max("questions__date_created"),
+        last_verified=Max("questions__date_verified"),
+    )
+    for row in rows.order_by():
+        category_names[row["id"]] = row["name"]
+        if not row["count"]:
+            continue
+        keys = question_keys(
+            row["questions__is_verified"], row["questions__difficulty"], row["id"]
+        )
+        for key in keys:
+            counters[key] += row["count"]
+        for field, value in activity.items():
+            if row[field] is not None and (value is None or row[field] > value):
+                activity[field] = row[field]
+    users = aggregate_counters([s for s in sections if s == "users"])
+    return {**counters, **activity, **users}, category_names
+
+
+def get_statistics(sections: Optional[List[str]] = None) -> dict:
+    """
+    returns the statistics sections asked for, all of them by default.
+    """
+    sections = SECTIONS if sections is None else sections
+    category_names = {}
+    if is_materialized():
+        counters = read_counters()
+        if "category" in sections:
+            category_names = dict(Category.objects.values_list("id", "name"))
+        if "activity" in sections:
+            counters.update(get_activity())
+    elif "category" in sections:
+        counters, category_names = group_counters(sections)
+    else:
+        counters = aggregate_counters(sections)
+    data = build_sections(counters, category_names, sections)
+    return {section: data[section] for section in sections}
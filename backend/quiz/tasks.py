@@ -0,0 +1,38 @@
+from celery import shared_task
+from django.db import transaction
+
+from . import decks
+
+
+@shared_task
+def rebuild_decks_task():
+    return decks.rebuild_decks()
+
+
+@shared_task(autoretry_for=(decks.DeckLocked,), retry_backoff=True, max_retries=5)
+def refresh_decks_task(changes):
+    decks.refresh_decks(changes)
+
+
+@shared_task(autoretry_for=(decks.DeckLocked,), retry_backoff=True, max_retries=5)
+def rebuild_category_decks_task(slugs):
+    return decks.rebuild_category_decks(slugs)
+
+
+def schedule_deck_refresh(changes):
+    """
+    refreshes the decks of the changed questions, given as (id, old
+    state) pairs, once the current transaction is committed.
+    """
+    changes = list(changes)
+    if changes:
+        transaction.on_commit(lambda: refresh_decks_task.delay(changes))
+
+
+def schedule_category_decks_rebuild(slugs):
+    """
+    rebuilds the decks once the current transaction renaming or deleting
+    the categories of slugs is committed.
+    """
+    slugs = list(slugs)
+    transaction.on_commit(lambda: rebuild_category_decks_task.delay(slugs))
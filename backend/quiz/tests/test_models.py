@@ -1,11 +1,18 @@
 from datetime import datetime
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from ..models import Category, InCorrectAnswer, Question
+from .. import sampling, similarity, stats
+from ..fingerprint import fingerprint
+from ..models import Category, InCorrectAnswer, Question, StatisticsCounter
 
 User = get_user_model()
 
@@ -87,6 +94,80 @@ class QuestionModelTests(TestCase):
     def test_string_representation(self):
         self.assertEqual(str(self.question_1), self.question_1.question)
 
+    def test_random_all(self):
+        """
+        confirms random_all samples only verified questions
+        without repetition.
+        """
+        self.assertEqual(Question.verified.random_all(limit=5), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.verify(self.user)
+        questions = Question.verified.random_all(limit=5)
+        self.assertEqual(questions, [self.question_1])
+        self.assertEqual(Question.verified.random_all(limit=5, difficulty="hard"), [])
+
+    def test_verify_keeps_text_index(self):
+        """
+        confirms a verification does not rebuild the search terms,
+        signature or fingerprint of a question.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.question_1.verify(self.user)
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        self.assertNotIn("quiz_questionterm", sql)
+        self.assertNotIn("quiz_questionbucket", sql)
+        question = Question.objects.get(id=self.question_1.id)
+        self.assertIsNotNone(question.fingerprint)
+        self.assertIsNotNone(question.minhash)
+        self.question_1.explanation = "cause I'm older"
+        with CaptureQueriesContext(connection) as context:
+            self.question_1.save()
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        self.assertIn("quiz_questionterm", sql)
+        self.assertIn("quiz_questionbucket", sql)
+        self.assertTrue(self.question_1.terms.filter(term="older").exists())
+
+    def test_random_index_kept_on_edit(self):
+        """
+        confirms editing the text of a verified question keeps the
+        sampling indexes, while unverifying it rebuilds them.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.verify(self.user)
+        Question.verified.random_ids(limit=5)
+        self.question_1.question = "Are you young?"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Question.verified.random_ids(limit=5), [self.question_1.id]
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.unverify()
+        self.assertEqual(Question.verified.random_ids(limit=5), [])
+
+    def test_random_index_bounded(self):
+        sampling.clear_id_index()
+        with self.assertNumQueries(0):
+            Question.verified.random_ids(difficulty="impossible")
+            Question.verified.random_ids(type="essay")
+        for i in range(3):
+            Question.verified.random_ids(category=f"missing-{i}")
+        self.assertEqual(len(sampling._id_index), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.verify(self.user)
+        with mock.patch.object(sampling, "MAX_INDEXES", 2):
+            for difficulty in [None, "easy"]:
+                Question.verified.random_ids(difficulty=difficulty)
+            Question.verified.random_ids(category=self.category.slug)
+            self.assertEqual(
+                list(sampling._id_index),
+                [
+                    ("verified", None, "easy", None),
+                    ("verified", self.category.slug, None, None),
+                ],
+            )
+
     def test_question_stat(self):
         """
         confirms the questions statistics is right.
@@ -144,3 +225,186 @@ class IncorrectAnswerModelTests(TestCase):
 
     def test_string_representation(self):
         self.assertEqual(str(self.incorrect_answer), self.incorrect_answer.option)
+
+
+class StatisticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="bovage",
+            password="12345678",
+            email="bovage@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        self.empty_category = Category.objects.create(name="Empty")
+        self.question_1 = self.create_question("easy")
+        self.question_2 = self.create_question("hard")
+        self.question_2.verify(self.user)
+
+    def create_question(self, difficulty):
+        return Question.objects.create(
+            question="Are you old?",
+            difficulty=difficulty,
+            type="True / False",
+            created_by=self.user,
+            correct_answer="True",
+            category=self.category,
+        )
+
+    def assert_statistics(self):
+        data = stats.get_statistics()
+        self.assertEqual(
+            data["question"],
+            {
+                "all_questions": Question.no_of_all_questions(),
+                "verified_questions": Question.no_of_verified_questions(),
+                "unverified_questions": Question.no_of_unverified_questions(),
+            },
+        )
+        self.assertEqual(
+            data["difficulty"],
+            {
+                "easy": Question.no_of_easy_questions(),
+                "medium": Question.no_of_medium_questions(),
+                "hard": Question.no_of_hard_questions(),
+            },
+        )
+        self.assertEqual(data["category"], Category.questions_count_category())
+        self.assertEqual(
+            data["users"],
+            {"Total Users": User.total_user(), "Total Staff": User.total_staff()},
+        )
+        self.assertEqual(data["activity"]["last_created"], Question.last_created())
+        self.assertEqual(data["activity"]["last_verified"], Question.last_verified())
+
+    def test_statistics(self):
+        self.assert_statistics()
+        self.assertEqual(stats.get_statistics(["category"])["category"]["Empty"], 0)
+
+    def test_statistics_queries(self):
+        with self.assertNumQueries(2):
+            stats.get_statistics()
+        with self.assertNumQueries(1):
+            stats.get_statistics(["difficulty"])
+        with self.assertNumQueries(1):
+            stats.get_statistics(["users"])
+
+    @override_settings(MATERIALIZED_STATISTICS=True)
+    def test_materialized_statistics(self):
+        stats.rebuild_counters()
+        self.assert_statistics()
+        question = self.create_question("medium")
+        self.assert_statistics()
+        question.verify(self.user)
+        self.assert_statistics()
+        self.question_2.unverify()
+        self.question_2.difficulty = "medium"
+        self.question_2.save()
+        self.assert_statistics()
+        Question.objects.get(id=self.question_1.id).delete()
+        self.assert_statistics()
+        self.user.is_staff = True
+        self.user.save()
+        User.objects.create_user(username="dave", password="12345678", email="d@d.com")
+        self.assert_statistics()
+
+    @override_settings(MATERIALIZED_STATISTICS=True)
+    def test_materialized_statistics_queries(self):
+        stats.rebuild_counters()
+        with self.assertNumQueries(1):
+            stats.get_statistics(["question", "difficulty", "users"])
+        self.assertEqual(
+            StatisticsCounter.objects.get(key="questions").value,
+            Question.objects.count(),
+        )
+
+
+class FingerprintTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="bovage", password="12345678", email="bovage@gmail.com"
+        )
+        self.category = Category.objects.create(name="Test")
+
+    def create_question(self, text, answer="Paris"):
+        question = Question.objects.create(
+            question=text,
+            difficulty="easy",
+            type="multiple-choice",
+            created_by=self.user,
+            correct_answer=answer,
+            category=self.category,
+        )
+        InCorrectAnswer.objects.create(question=question, option="Lagos")
+        return question
+
+    def test_normalized_fingerprint(self):
+        self.assertEqual(
+            fingerprint("Capital of  France?", "Paris", ["Rome", "Lagos"]),
+            fingerprint("capital of France? ", "PARIS", ["Lagos", "Rome"]),
+        )
+        self.assertNotEqual(
+            fingerprint("Capital of France?", "Paris", ["Rome"]),
+            fingerprint("Capital of France?", "Rome", ["Paris"]),
+        )
+
+    def test_refreshed_on_edit(self):
+        question = self.create_question("Capital of France?")
+        question.refresh_from_db()
+        self.assertEqual(
+            question.fingerprint,
+            fingerprint("Capital of France?", "Paris", ["Lagos"]),
+        )
+        question.question = "Capital city of France?"
+        question.save()
+        question.refresh_from_db()
+        self.assertEqual(
+            question.fingerprint,
+            fingerprint("Capital city of France?", "Paris", ["Lagos"]),
+        )
+
+    def test_edited_into_duplicate(self):
+        original = self.create_question("Capital of France?")
+        copy = self.create_question("Capital of Italy?", answer="Rome")
+        copy.question = "Capital of France?"
+        copy.correct_answer = "Paris"
+        copy.save()
+        copy.refresh_from_db()
+        self.assertIsNone(copy.fingerprint)
+        original.refresh_from_db()
+        self.assertIsNotNone(original.fingerprint)
+
+    def test_backfill(self):
+        questions = [
+            self.create_question("Capital of France?"),
+            self.create_question("Capital of Italy?", answer="Rome"),
+            self.create_question("capital of france?"),
+        ]
+        Question.objects.update(fingerprint=None)
+        out = StringIO()
+        call_command("backfill_fingerprints", chunk_size=2, stdout=out)
+        self.assertIn(
+            f"Question {questions[2].id} duplicates question {questions[0].id}",
+            out.getvalue(),
+        )
+        self.assertIn("Fingerprinted 2 questions, 1 duplicates", out.getvalue())
+        self.assertEqual(Question.objects.filter(fingerprint=None).count(), 1)
+
+
+class SimilarityTests(TestCase):
+    def test_similarity(self):
+        first = similarity.signature("What is the capital of France?", "Paris")
+        second = similarity.signature("What is the capital city of France?", "Paris")
+        other = similarity.signature("Which planet is the largest?", "Jupiter")
+        self.assertEqual(similarity.similarity(first, first), 1)
+        self.assertGreater(similarity.similarity(first, second), 0.6)
+        self.assertLess(similarity.similarity(first, other), 0.2)
+        self.assertEqual(similarity.unpack(similarity.pack(first)), first)
+
+    def test_clusters(self):
+        clusters = similarity.Clusters()
+        clusters.union(4, 2)
+        clusters.union(7, 9)
+        clusters.union(9, 4)
+        clusters.find(5)
+        self.assertEqual(clusters.groups(), [[2, 4, 7, 9]])
@@ -1,23 +1,48 @@
-from datetime import datetime
+import csv
+import io
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from PIL import Image
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
+from utils.testing import run_tasks_eagerly
 
+from .. import caching, decks, export, payloads, stats, verification
 from ..models import Category, InCorrectAnswer, Question
+from ..serializers import QuestionDetailSerializer, QuestionPublicSerializer
 
 User = get_user_model()
 LIMIT = 50
 QUESTION_URL = reverse("quiz:question-list")
+QUESTION_RANDOM_URL = reverse("quiz:question-random")
+QUESTION_CACHE_STATS_URL = reverse("quiz:question-cache-stats")
 QUESTION_DETAIL_URL = reverse("quiz:question-detail", args="1")
 QUESTION_LIST_FULL_URL = reverse("quiz:question-list-full")
 UNVERIFIED_QUESTION_LIST_URL = reverse("quiz:unverified-question-list-full")
+QUESTION_EXPORT_URL = reverse("quiz:question-export")
+QUESTION_BATCH_URL = reverse("quiz:question-batch")
+QUESTION_SIMILAR_URL = reverse("quiz:question-similar")
+QUIZ_SESSION_URL = reverse("quiz:quiz-session-list")
 STATISTICS_URL = reverse("statistics")
+CATEGORY_URL = reverse("categories-list")
+BULK_VERIFICATION_URL = reverse("quiz:question-bulk-verification")
 
 
 class PublicQuestionListTest(APITestCase):
     def setUp(self):
+        cache.clear()
         self.verified_user = User.objects.create_user(
             username="dave", password="dave1234", email="d@gmail.com", is_verified=True
         )
@@ -60,8 +85,9 @@ class PublicQuestionListTest(APITestCase):
             explanation="cause I'm old",
             category=self.category,
         )
-        question.verify(self.verified_user)
-        self.question_1.verify(self.verified_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            question.verify(self.verified_user)
+            self.question_1.verify(self.verified_user)
         response = self.client.get(QUESTION_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("status", response.data)
@@ -162,6 +188,236 @@ class PublicQuestionListTest(APITestCase):
         self.assertEqual(response.data.get("status"), "success")
 
 
+class QuestionSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.verified_user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        self.other_category = Category.objects.create(name="Other")
+        self.python = self.create_question(
+            "Who developed the Python language?",
+            "Guido van Rossum",
+            "Python was designed in the Netherlands.",
+        )
+        self.snake = self.create_question(
+            "Which of these is a snake?",
+            "Python",
+            "A python is a large snake.",
+            category=self.other_category,
+            difficulty="hard",
+        )
+        self.unverified = self.create_question(
+            "Is Python fast?", "No", "", verify=False
+        )
+
+    def create_question(
+        self, text, answer, explanation, category=None, difficulty="easy", verify=True
+    ):
+        question = Question.objects.create(
+            question=text,
+            difficulty=difficulty,
+            type="multiple-choice",
+            created_by=self.verified_user,
+            correct_answer=answer,
+            explanation=explanation,
+            category=category or self.category,
+        )
+        InCorrectAnswer.objects.create(question=question, option="Dennis Ritchie")
+        if verify:
+            question.verify(self.verified_user)
+        return question
+
+    def search(self, **params):
+        response = self.client.get(QUESTION_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("status"), "success")
+        return [question["id"] for question in response.data.get("data")]
+
+    def test_search_ranking(self):
+        """
+        confirms a match in the question text ranks above a
+        match in the answers and explanation.
+        """
+        self.assertEqual(
+            self.search(search="python language"), [self.python.id, self.snake.id]
+        )
+        self.assertEqual(self.search(search="snake"), [self.snake.id])
+
+    def test_search_only_verified(self):
+        self.assertNotIn(self.unverified.id, self.search(search="python"))
+
+    def test_search_filters(self):
+        self.assertEqual(
+            self.search(search="python", category="other"), [self.snake.id]
+        )
+        self.assertEqual(
+            self.search(search="python", difficulty="easy"), [self.python.id]
+        )
+
+    def test_search_incorrect_answers(self):
+        self.assertEqual(len(self.search(search="ritchie")), 2)
+
+    def test_search_pagination(self):
+        self.assertEqual(self.search(search="python", limit=1), [self.python.id])
+        self.assertEqual(self.search(search="python", limit=1, page=2), [self.snake.id])
+        self.assertEqual(self.search(search="python", limit=1, page=3), [])
+
+    def test_search_index_follows_edits(self):
+        self.python.question = "Who developed the C language?"
+        self.python.explanation = ""
+        self.python.save()
+        self.assertEqual(self.search(search="c language"), [self.python.id])
+        self.assertEqual(self.search(search="netherlands"), [])
+        self.snake.delete()
+        self.assertEqual(self.search(search="snake"), [])
+
+
+class RandomQuestionListTest(APITestCase):
+    def setUp(self):
+        self.verified_user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        self.other_category = Category.objects.create(name="Other")
+        for i in range(LIMIT + 5):
+            question = Question.objects.create(
+                question=f"{i} Are you old?",
+                difficulty="easy" if i % 2 else "hard",
+                type="True / False",
+                created_by=self.verified_user,
+                correct_answer="True",
+                category=self.category,
+            )
+            question.verify(self.verified_user)
+        Question.objects.create(
+            question="Am I verified?",
+            difficulty="easy",
+            type="True / False",
+            created_by=self.verified_user,
+            correct_answer="False",
+            category=self.other_category,
+        )
+
+    def test_random_questions_limit(self):
+        response = self.client.get(QUESTION_RANDOM_URL, {"limit": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("status"), "success")
+        self.assertEqual(len(response.data.get("data")), 5)
+        ids = [question["id"] for question in response.data.get("data")]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_random_questions_max_limit(self):
+        response = self.client.get(QUESTION_RANDOM_URL, {"limit": LIMIT * 2})
+        self.assertEqual(len(response.data.get("data")), LIMIT)
+
+    def test_random_questions_filters(self):
+        response = self.client.get(
+            QUESTION_RANDOM_URL, {"category": "test", "difficulty": "hard"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(response.data.get("data")), 0)
+        for question in response.data.get("data"):
+            self.assertEqual(question["difficulty"], "hard")
+            self.assertEqual(question["category"], "test")
+
+    def test_random_questions_only_verified(self):
+        response = self.client.get(QUESTION_RANDOM_URL, {"category": "other"})
+        self.assertEqual(len(response.data.get("data")), 0)
+
+    def test_random_questions_follow_verification(self):
+        """
+        confirms that newly verified questions are sampled right away.
+        """
+        self.client.get(QUESTION_RANDOM_URL, {"category": "other"})
+        question = Question.objects.get(category=self.other_category)
+        with self.captureOnCommitCallbacks(execute=True):
+            question.verify(self.verified_user)
+        response = self.client.get(QUESTION_RANDOM_URL, {"category": "other"})
+        self.assertEqual(len(response.data.get("data")), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            question.unverify()
+        response = self.client.get(QUESTION_RANDOM_URL, {"category": "other"})
+        self.assertEqual(len(response.data.get("data")), 0)
+
+
+class QuestionCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        self.question_1 = Question.objects.create(
+            question="Are you old?",
+            difficulty="easy",
+            type="True / False",
+            created_by=self.admin_user,
+            correct_answer="True",
+            explanation="cause I'm old",
+            category=self.category,
+        )
+        self.question_1.verify(self.admin_user)
+
+    def get_stats(self):
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        response = self.client.get(QUESTION_CACHE_STATS_URL)
+        self.client.credentials()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data.get("data")
+
+    def test_cache_hits(self):
+        self.client.get(QUESTION_URL)
+        self.client.get(QUESTION_URL)
+        self.client.get(QUESTION_URL, {"search": "old"})
+        self.client.get(QUESTION_URL, {"search": "OLD  old"})
+        stats = self.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_cached_queries(self):
+        """
+        confirms that a cached search page does not query the database.
+        """
+        self.client.get(QUESTION_URL, {"search": "old"})
+        with self.assertNumQueries(0):
+            self.client.get(QUESTION_URL, {"search": "old"})
+
+    def test_invalidation_on_edit(self):
+        self.client.get(QUESTION_URL)
+        self.question_1.question = "Are you young?"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.save()
+        response = self.client.get(QUESTION_URL)
+        self.assertEqual(response.data.get("data")[0]["question"], "Are you young?")
+        response = self.client.get(QUESTION_URL, {"search": "young"})
+        self.assertEqual(len(response.data.get("data")), 1)
+
+    def test_invalidation_on_unverify(self):
+        self.client.get(QUESTION_URL)
+        self.client.get(QUESTION_URL, {"search": "old"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.unverify()
+        self.assertEqual(len(self.client.get(QUESTION_URL).data.get("data")), 0)
+        response = self.client.get(QUESTION_URL, {"search": "old"})
+        self.assertEqual(len(response.data.get("data")), 0)
+
+    def test_invalidation_on_delete(self):
+        self.client.get(QUESTION_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question_1.delete()
+        self.assertEqual(len(self.client.get(QUESTION_URL).data.get("data")), 0)
+
+    def test_stats_admin_only(self):
+        response = self.client.get(QUESTION_CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 class QuestionListFullViewTest(APITestCase):
     def setUp(self):
         self.verified_user = User.objects.create_user(
@@ -241,6 +497,963 @@ class QuestionListFullViewTest(APITestCase):
         self.assertIn("created_by", results[0])
 
 
+class QuestionQueryCountTest(APITestCase):
+    """
+    confirms that question endpoints run a fixed number of
+    queries no matter how many questions are on the page.
+    """
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def create_questions(self, count, verify=True):
+        for i in range(count):
+            question = Question.objects.create(
+                question=f"{i} Which is a fruit?",
+                difficulty="easy",
+                type="multiple-choice",
+                created_by=self.admin_user,
+                correct_answer="Apple",
+                category=self.category,
+            )
+            InCorrectAnswer.objects.bulk_create(
+                [
+                    InCorrectAnswer(question=question, option=option)
+                    for option in ["Rice", "Beans", "Yam"]
+                ]
+            )
+            if verify:
+                question.verify(self.admin_user)
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url, verify=True, **params):
+        self.create_questions(2, verify=verify)
+        self.count_queries(url, **params)  # warm up caches
+        small_page = self.count_queries(url, **params)
+        self.create_questions(8, verify=verify)
+        self.count_queries(url, **params)
+        large_page = self.count_queries(url, **params)
+        self.assertEqual(small_page, large_page)
+
+    def test_public_list_queries(self):
+        self.assert_constant_queries(QUESTION_URL)
+
+    def test_public_search_queries(self):
+        self.assert_constant_queries(QUESTION_URL, search="fruit")
+
+    def test_full_list_queries(self):
+        self.assert_constant_queries(QUESTION_LIST_FULL_URL)
+
+    def test_unverified_list_queries(self):
+        self.assert_constant_queries(UNVERIFIED_QUESTION_LIST_URL, verify=False)
+
+    def test_user_question_list_queries(self):
+        url = reverse("user-question", args=[self.admin_user.id])
+        self.assert_constant_queries(url)
+
+    def test_question_detail_queries(self):
+        self.create_questions(1)
+        question = Question.objects.first()
+        url = reverse("quiz:question-detail", args=[question.id])
+        # user lookup, question with its relations, incorrect answers
+        self.assertEqual(self.count_queries(url), 3)
+
+
+class QuestionCursorPaginationTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        for i in range(25):
+            Question.objects.create(
+                question=f"{i} Are you old?",
+                difficulty="easy",
+                type="True / False",
+                created_by=self.admin_user,
+                correct_answer="True",
+                category=self.category,
+            )
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def test_cursor_pagination(self):
+        response = self.client.get(QUESTION_LIST_FULL_URL, {"pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("status"), "success")
+        page = response.data.get("data")
+        self.assertNotIn("count", page)
+        self.assertIsNone(page["previous"])
+        ids = [question["id"] for question in page["results"]]
+        pages = [ids]
+        while page["next"]:
+            page = self.client.get(page["next"]).data.get("data")
+            pages.append([question["id"] for question in page["results"]])
+            ids += pages[-1]
+        self.assertEqual(len(pages), 3)
+        expected = Question.objects.order_by("-date_created", "-id")
+        self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+        previous = self.client.get(page["previous"]).data.get("data")
+        self.assertEqual([question["id"] for question in previous["results"]], pages[1])
+
+    def test_cursor_pagination_queries(self):
+        """
+        confirms a deep page needs no count query and costs
+        the same as the first page.
+        """
+        response = self.client.get(QUESTION_LIST_FULL_URL, {"pagination": "cursor"})
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(QUESTION_LIST_FULL_URL, {"pagination": "cursor"})
+        with CaptureQueriesContext(connection) as next_page:
+            self.client.get(response.data.get("data")["next"])
+        self.assertEqual(len(first_page), len(next_page))
+        for query in next_page.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(QUESTION_LIST_FULL_URL, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data.get("status"), "error")
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(UNVERIFIED_QUESTION_LIST_URL)
+        self.assertEqual(response.data.get("data")["count"], 25)
+
+
+class QuestionExportTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        self.other_category = Category.objects.create(name="Other")
+        for i in range(5):
+            question = Question.objects.create(
+                question=f"{i} Which is a fruit?",
+                difficulty="easy",
+                type="multiple-choice",
+                created_by=self.admin_user,
+                correct_answer="Apple",
+                explanation="Apples grow on trees",
+                category=self.category if i < 4 else self.other_category,
+            )
+            InCorrectAnswer.objects.bulk_create(
+                [
+                    InCorrectAnswer(question=question, option=option)
+                    for option in ["Rice", "Beans", "Yam"]
+                ]
+            )
+            if i % 2:
+                question.verify(self.admin_user)
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def export(self, **params):
+        response = self.client.get(QUESTION_EXPORT_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_admin_restriction(self):
+        self.client.credentials()
+        response = self.client.get(QUESTION_EXPORT_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_ndjson(self):
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["incorrect_answers"], ["Rice", "Beans", "Yam"])
+        self.assertEqual(rows[0]["category"], "test")
+
+    def test_export_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(**{"as": "csv"}))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["incorrect_answer_3"], "Yam")
+
+    def test_export_scraper_json(self):
+        questions = json.loads(self.export(**{"as": "json"}))
+        self.assertEqual(len(questions), 5)
+        self.assertEqual(
+            set(questions[0]),
+            {"question", "incorrect answers", "correct_answer", "explanation"},
+        )
+
+    def test_export_filters(self):
+        self.assertEqual(len(self.export(verified="true").splitlines()), 2)
+        self.assertEqual(len(self.export(category="other").splitlines()), 1)
+        self.assertEqual(len(self.export(created_after="2000-01-01").splitlines()), 5)
+        self.assertEqual(len(self.export(created_before="2000-01-01").splitlines()), 0)
+
+    def test_export_invalid_params(self):
+        response = self.client.get(QUESTION_EXPORT_URL, {"as": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(QUESTION_EXPORT_URL, {"created_after": "never"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_queries(self):
+        """
+        confirms answers are fetched once per chunk, not per question.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.export()
+        self.assertLessEqual(len(context.captured_queries), 3)
+
+    def test_export_keyset_chunks(self):
+        """
+        confirms every chunk is read with its own bounded query, so no
+        result set holds the whole bank.
+        """
+        ids = list(Question.objects.order_by("id").values_list("id", flat=True))
+        with CaptureQueriesContext(connection) as context:
+            rows = list(export.iter_questions(Question.objects.all(), chunk_size=2))
+        self.assertEqual([row["id"] for row in rows], ids)
+        selects = [
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "quiz_question"' in query["sql"]
+        ]
+        self.assertEqual(len(selects), len(ids) // 2 + 1)
+        self.assertTrue(all("LIMIT 2" in sql for sql in selects))
+
+    def test_export_command(self):
+        output = io.StringIO()
+        call_command("exportquestions", "--verified", "--chunk-size=1", stdout=output)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(all(row["is_verified"] for row in rows))
+
+
+class QuestionBatchCreateTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        access_token = self.user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def question(self, i, **fields):
+        return {
+            "question": f"{i} Which is a fruit?",
+            "difficulty": "easy",
+            "type": "multiple-choice",
+            "category": self.category.id,
+            "correct_answer": "Apple",
+            "explanation": "Apples grow on trees",
+            "incorrect_answer_fields": {
+                "incorrect_answer_1": "Rice",
+                "incorrect_answer_2": "Beans",
+                "incorrect_answer_3": "Yam",
+            },
+            **fields,
+        }
+
+    def post(self, questions, **data):
+        return self.client.post(
+            QUESTION_BATCH_URL, {"questions": questions, **data}, format="json"
+        )
+
+    def test_authentication_required(self):
+        self.client.credentials()
+        response = self.post([self.question(0)])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_batch_create(self):
+        response = self.post([self.question(i) for i in range(20)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.data["data"]
+        self.assertEqual((data["created"], data["failed"]), (20, 0))
+        ids = [result["id"] for result in data["results"]]
+        self.assertEqual(Question.objects.filter(id__in=ids).count(), 20)
+        self.assertEqual(
+            InCorrectAnswer.objects.filter(question_id__in=ids).count(), 60
+        )
+        question = Question.objects.get(id=ids[3])
+        self.assertEqual(question.question, "3 Which is a fruit?")
+        self.assertEqual(question.created_by, self.user)
+        self.assertFalse(question.is_verified)
+        self.assertEqual(question.terms.filter(term="yam").count(), 1)
+
+    def test_atomic_batch_rejected(self):
+        questions = [self.question(0), self.question(1, category=999)]
+        response = self.post(questions)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data["error"]["results"]
+        self.assertEqual(results[0]["status"], "skipped")
+        self.assertEqual(results[1]["status"], "failed")
+        self.assertIn("category", results[1]["errors"])
+        self.assertEqual(Question.objects.count(), 0)
+
+    def test_partial_batch(self):
+        questions = [
+            self.question(0),
+            self.question(1, difficulty="impossible"),
+            self.question(2, type="True / False"),
+        ]
+        response = self.post(questions, mode="partial")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data["data"]["results"]
+        self.assertEqual(
+            [result["status"] for result in results], ["created", "failed", "failed"]
+        )
+        self.assertEqual(Question.objects.count(), 1)
+
+    def test_invalid_batch(self):
+        self.assertEqual(self.post([]).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.post([self.question(0)], mode="sometimes")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for body in [[self.question(0)], "questions", 1]:
+            response = self.client.post(QUESTION_BATCH_URL, body, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_batch_create_without_returning(self):
+        """
+        confirms the ids of a bulk insert are read back on backends
+        without RETURNING, e.g. MySQL, instead of saving one by one.
+        """
+        returning = mock.patch.object(
+            type(connection.features),
+            "can_return_rows_from_bulk_insert",
+            new_callable=mock.PropertyMock,
+            return_value=False,
+        )
+        with returning:
+            with mock.patch.object(Question, "save") as save:
+                response = self.post([self.question(i) for i in range(5)])
+        save.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for result in response.data["data"]["results"]:
+            question = Question.objects.get(id=result["id"])
+            self.assertEqual(question.question, f"{result['index']} Which is a fruit?")
+            self.assertEqual(question.incorrect_answers.count(), 3)
+
+    def test_batch_queries(self):
+        """
+        confirms the number of queries does not grow with the batch.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.post([self.question(i) for i in range(5)])
+        small = len(context.captured_queries)
+        with CaptureQueriesContext(connection) as context:
+            self.post([self.question(i) for i in range(25)])
+        self.assertEqual(len(context.captured_queries), small)
+
+    def test_batch_invalidates_cache(self):
+        self.post([self.question(0)])
+        question = Question.objects.get()
+        question.verify(self.user)
+        response = self.client.get(QUESTION_URL, {"search": "fruit"})
+        self.assertEqual(len(response.data["data"]), 1)
+
+    def test_batch_skips_duplicates(self):
+        self.post([self.question(0)])
+        original = Question.objects.get()
+        copy = self.question(0, question="0  WHICH is a fruit?")
+        copy["incorrect_answer_fields"] = {
+            "incorrect_answer_1": "Yam",
+            "incorrect_answer_2": "Rice",
+            "incorrect_answer_3": "Beans",
+        }
+        response = self.post([copy, self.question(1), self.question(1)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.data["data"]
+        self.assertEqual((data["created"], data["duplicates"]), (1, 2))
+        results = data["results"]
+        self.assertEqual(
+            results[0], {"index": 0, "status": "duplicate", "id": original.id}
+        )
+        self.assertEqual(results[2]["id"], results[1]["id"])
+        self.assertEqual(Question.objects.count(), 2)
+
+    def test_batch_of_duplicates(self):
+        self.post([self.question(0)])
+        response = self.post([self.question(0)])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["duplicates"], 1)
+
+    def test_batch_updates_duplicates(self):
+        self.post([self.question(0)])
+        response = self.post([self.question(0, difficulty="hard")], duplicates="update")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["updated"], 1)
+        self.assertEqual(Question.objects.get().difficulty, "hard")
+
+    def test_duplicate_question(self):
+        self.post([self.question(0)])
+        response = self.client.post(QUESTION_URL, self.question(0), format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Question.objects.count(), 1)
+
+    def test_concurrent_duplicate_question(self):
+        """
+        confirms a copy created between the duplicate check and the
+        insert is reported as a duplicate.
+        """
+        self.post([self.question(0)])
+        with mock.patch("quiz.serializers.find_duplicates", return_value={}):
+            response = self.client.post(QUESTION_URL, self.question(0), format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Question.objects.count(), 1)
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        self.question = Question.objects.create(
+            question="Which is a fruit?",
+            difficulty="easy",
+            type="multiple-choice",
+            created_by=self.admin_user,
+            correct_answer="Apple",
+            category=self.category,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.verify(self.admin_user)
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_not_modified(self):
+        response = self.client.get(CATEGORY_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(0):
+            not_modified = self.revalidate(CATEGORY_URL, response)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(not_modified.content, b"")
+        not_modified = self.client.get(
+            CATEGORY_URL, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_modified(self):
+        response = self.client.get(CATEGORY_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Other")
+        modified = self.revalidate(CATEGORY_URL, response)
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertEqual(modified.data["data"]["count"], 2)
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+
+    def test_query_parameters(self):
+        response = self.client.get(CATEGORY_URL)
+        response = self.revalidate(CATEGORY_URL, response, counts="true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_statistics(self):
+        response = self.client.get(STATISTICS_URL)
+        self.assertEqual(
+            self.revalidate(STATISTICS_URL, response).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(
+                username="dave", password="dave1234", email="d@d.com"
+            )
+        self.assertEqual(
+            self.revalidate(STATISTICS_URL, response).status_code, status.HTTP_200_OK
+        )
+
+    def test_authentication_checked_first(self):
+        url = reverse("quiz:question-detail", args=[self.question.id])
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        response = self.client.get(url)
+        self.assertEqual(
+            self.revalidate(url, response).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.client.credentials()
+        self.assertEqual(
+            self.revalidate(url, response).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_public_questions(self):
+        response = self.client.get(QUESTION_URL, {"search": "fruit"})
+        response = self.revalidate(QUESTION_URL, response, search="fruit")
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(QUESTION_URL)
+        self.assertNotIn("ETag", response)
+
+
+class QuestionPayloadTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        category = Category.objects.create(name="Test")
+        for i in range(4):
+            question = Question.objects.create(
+                question=f"{i} Which is a fruit?",
+                difficulty="easy",
+                type="multiple-choice",
+                created_by=self.user if i % 2 else None,
+                correct_answer="Apple",
+                explanation="Apples grow on trees",
+                category=category,
+                image="quiz/apple tree.png" if i == 3 else "",
+            )
+            InCorrectAnswer.objects.bulk_create(
+                [
+                    InCorrectAnswer(question=question, option=f"{option} {i}")
+                    for option in ["Rice", "Beans", "Yam"]
+                ]
+            )
+            if i > 1:
+                question.verify(self.user)
+            # the variants of question 2 were drawn from a replaced image
+            if i > 1:
+                Question.objects.filter(id=question.id).update(
+                    image_variants={
+                        "source": "quiz/apple tree.png",
+                        "width": 400,
+                        "height": 200,
+                        "variants": {
+                            "thumbnail": {
+                                "name": "quiz/variants/apple tree-thumbnail.webp",
+                                "width": 200,
+                                "height": 100,
+                            }
+                        },
+                    }
+                )
+
+    def assert_same(self, payloads, serialized):
+        # key order included
+        self.assertEqual(json.dumps(payloads), json.dumps(serialized))
+
+    def test_detail_payloads(self):
+        request = APIRequestFactory().get("/")
+        questions = Question.objects.with_related().order_by("id")
+        rows = list(Question.objects.order_by("id").values(*payloads.DETAIL_VALUES))
+        self.assert_same(
+            payloads.to_detail(rows, request),
+            QuestionDetailSerializer(
+                questions, many=True, context={"request": request}
+            ).data,
+        )
+
+    def test_public_payloads(self):
+        questions = Question.objects.with_related().order_by("id")
+        by_id = payloads.public_payloads(Question.objects, [q.id for q in questions])
+        self.assert_same(
+            [by_id[question.id] for question in questions],
+            QuestionPublicSerializer(questions, many=True).data,
+        )
+
+    def test_list_view(self):
+        access_token = self.user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        with self.assertNumQueries(4):
+            # user, count, page and incorrect answers
+            response = self.client.get(QUESTION_LIST_FULL_URL)
+        results = response.data["data"]["results"]
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(results[0]["incorrect_answers"]), 3)
+        # newest first
+        self.assertIsNone(results[1]["image_variants"])
+        self.assertEqual(
+            results[0]["image_variants"]["thumbnail"]["url"],
+            "http://testserver/media/quiz/variants/apple%20tree-thumbnail.webp",
+        )
+        self.assertTrue(results[0]["image"].startswith("http://testserver/"))
+
+    def test_image_processed_after_update(self):
+        run_tasks_eagerly(self)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        buffer = io.BytesIO()
+        Image.new("RGB", (1600, 1200), "green").save(buffer, "JPEG")
+        image = SimpleUploadedFile("tree.jpg", buffer.getvalue(), "image/jpeg")
+        question = Question.objects.order_by("id").first()
+        url = reverse("quiz:question-detail", args=[question.id])
+        access_token = self.user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        with override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.patch(url, {"image": image}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNone(response.data["data"]["image_variants"])
+            for callback in callbacks:
+                callback()
+            variants = self.client.get(url).data["data"]["image_variants"]
+        self.assertEqual(
+            (variants["medium"]["width"], variants["medium"]["height"]), (800, 600)
+        )
+
+
+class QuestionDeckTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        self.other_category = Category.objects.create(name="Other")
+        self.questions = [self.create_question(i) for i in range(20)]
+        for question in self.questions:
+            question.verify(self.user)
+        cache.clear()
+        decks.rebuild_decks()
+        # the decks are patched by a task
+        run_tasks_eagerly(self)
+
+    def create_question(self, i, **fields):
+        return Question.objects.create(
+            question=f"{i} Which is a fruit?",
+            difficulty="easy" if i % 2 else "hard",
+            type="multiple-choice",
+            created_by=self.user,
+            correct_answer="Apple",
+            **{"category": self.category, **fields},
+        )
+
+    def deck_ids(self, **filters):
+        response = self.client.get(QUESTION_URL, {"limit": 50, **filters})
+        return {question["id"] for question in response.data["data"]}
+
+    def test_served_from_deck(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(QUESTION_URL, {"difficulty": "easy"})
+        questions = response.data["data"]
+        self.assertEqual(len(questions), 10)
+        self.assertEqual({question["difficulty"] for question in questions}, {"easy"})
+
+    def test_decks_rotate(self):
+        first = self.client.get(QUESTION_URL, {"limit": 8}).data["data"]
+        second = self.client.get(QUESTION_URL, {"limit": 8}).data["data"]
+        ids = [question["id"] for question in first + second]
+        self.assertEqual(len(set(ids)), 16)
+
+    def test_verified_question_added(self):
+        question = self.create_question(20, category=self.other_category)
+        self.assertEqual(self.deck_ids(category="other"), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            question.verify(self.user)
+        self.assertEqual(self.deck_ids(category="other"), {question.id})
+        self.assertIn(question.id, self.deck_ids(difficulty="hard"))
+
+    def test_edited_question_moved(self):
+        question = Question.objects.get(id=self.questions[1].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            question.difficulty = "medium"
+            question.save()
+        self.assertNotIn(question.id, self.deck_ids(difficulty="easy"))
+        self.assertEqual(self.deck_ids(difficulty="medium"), {question.id})
+        self.assertIn(question.id, self.deck_ids())
+
+    def test_removed_questions(self):
+        unverified = Question.objects.get(id=self.questions[0].id)
+        deleted = Question.objects.get(id=self.questions[1].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            unverified.unverify()
+            deleted.delete()
+        self.assertEqual(len(self.deck_ids()), 18)
+        self.assertNotIn(unverified.id, self.deck_ids(difficulty="hard"))
+        self.assertNotIn(deleted.id, self.deck_ids(difficulty="easy"))
+
+    def test_withdrawn_before_refresh(self):
+        """
+        confirms an unverified or deleted question is not dealt while
+        the decks wait to be patched.
+        """
+        unverified = Question.objects.get(id=self.questions[0].id)
+        deleted = Question.objects.get(id=self.questions[1].id)
+        with mock.patch("quiz.tasks.refresh_decks_task.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                unverified.unverify()
+                deleted.delete()
+        delay.assert_called()
+        self.assertEqual(len(self.deck_ids()), 18)
+        self.assertNotIn(unverified.id, self.deck_ids(difficulty="hard"))
+        with mock.patch("quiz.tasks.refresh_decks_task.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                unverified.verify(self.user)
+        self.assertIn(unverified.id, self.deck_ids(difficulty="hard"))
+
+    def test_deferred_question_saved(self):
+        question = Question.objects.only("id", "question").get(id=self.questions[0].id)
+        question.question = "0 Which is a vegetable?"
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+        self.assertIn(question.id, self.deck_ids(difficulty="hard"))
+
+    def test_renamed_category(self):
+        category = Category.objects.get(id=self.category.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            category.slug = "fruits"
+            category.save()
+        self.assertIsNone(decks.deal("test", None, None, 50))
+        dealt = decks.deal("fruits", None, None, 50)
+        self.assertEqual(len(dealt), 20)
+        categories = {
+            payload["category"] for payload in decks.deal(None, None, None, 50)
+        }
+        self.assertEqual(categories, {"fruits"})
+
+    def test_deleted_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.get(id=self.category.id).delete()
+        self.assertIsNone(decks.deal("test", None, None, 50))
+        categories = {
+            payload["category"] for payload in decks.deal(None, None, None, 50)
+        }
+        self.assertEqual(categories, {"deleted"})
+
+    def test_deck_lock(self):
+        with decks.deck_lock():
+            with self.assertRaises(decks.DeckLocked):
+                with decks.deck_lock(timeout=0):
+                    pass
+        with decks.deck_lock(timeout=0):
+            pass
+
+    @override_settings(QUESTION_DECKS=False)
+    def test_decks_disabled(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(QUESTION_URL)
+        self.assertGreater(len(context.captured_queries), 0)
+
+
+class QuizSessionTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        for i in range(10):
+            question = Question.objects.create(
+                question=f"{i} Which is a fruit?",
+                difficulty="easy" if i % 2 else "hard",
+                type="multiple-choice",
+                created_by=self.user,
+                correct_answer=f"Apple {i}",
+                category=self.category,
+            )
+            InCorrectAnswer.objects.bulk_create(
+                [
+                    InCorrectAnswer(question=question, option=f"{option} {i}")
+                    for option in ["Rice", "Beans", "Yam"]
+                ]
+            )
+            question.verify(self.user)
+        cache.clear()
+
+    def start(self, **params):
+        response = self.client.post(QUIZ_SESSION_URL, params, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["data"]
+
+    def answer(self, key, answers):
+        return self.client.post(
+            reverse("quiz:quiz-session-answers", args=[key]),
+            {"answers": answers},
+            format="json",
+        )
+
+    def play(self):
+        quiz = self.start(difficulty="easy", limit=4)
+        questions = quiz["questions"]
+        self.assertEqual(len(questions), 4)
+        self.assertNotIn("correct_answer", questions[0])
+        self.assertEqual(len(questions[0]["options"]), 4)
+        self.assertTrue(
+            all(
+                Question.objects.get(id=q["id"]).difficulty == "easy" for q in questions
+            )
+        )
+        # answer the first two questions right and the third one wrong
+        answers = {}
+        for question in questions[:3]:
+            number = question["question"].split()[0]
+            answers[str(question["id"])] = f"Apple {number}"
+        answers[str(questions[2]["id"])] = "Rice"
+        # the correct answers are read with one query, the database store
+        # adds reading the session and storing its result
+        with self.assertNumQueries(3 if self.database_store else 1):
+            response = self.answer(quiz["session"], answers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data["data"]
+        self.assertEqual((result["score"], result["total"]), (2, 4))
+        self.assertEqual(
+            [item["correct"] for item in result["results"]], [True, True, False, False]
+        )
+        response = self.answer(quiz["session"], answers)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.get(
+            reverse("quiz:quiz-session-detail", args=[quiz["session"]])
+        )
+        self.assertEqual(response.data["data"]["result"]["score"], 2)
+        self.assertEqual(response.data["data"]["questions"], questions)
+
+    def test_database_store(self):
+        self.database_store = True
+        self.play()
+
+    @override_settings(QUIZ_SESSION_STORE="quiz.sessions.CacheSessionStore")
+    def test_cache_store(self):
+        self.database_store = False
+        self.play()
+
+    def test_unverified_question_not_graded(self):
+        quiz = self.start(limit=4)
+        unverified = Question.objects.get(id=quiz["questions"][0]["id"])
+        with self.captureOnCommitCallbacks(execute=True):
+            unverified.unverify()
+        served = self.client.get(
+            reverse("quiz:quiz-session-detail", args=[quiz["session"]])
+        ).data["data"]["questions"]
+        answers = {str(question["id"]): "Rice" for question in quiz["questions"]}
+        result = self.answer(quiz["session"], answers).data["data"]
+        self.assertEqual(result["total"], 3)
+        self.assertEqual(
+            [item["id"] for item in result["results"]],
+            [question["id"] for question in served],
+        )
+
+    def test_no_matching_questions(self):
+        response = self.client.post(QUIZ_SESSION_URL, {"category": "none"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_filters(self):
+        for body in [{"limit": None}, {"limit": "all"}, {"category": ["test"]}, [1]]:
+            response = self.client.post(QUIZ_SESSION_URL, body, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_unknown_session(self):
+        response = self.answer("unknown", {})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_answers(self):
+        quiz = self.start()
+        response = self.answer(quiz["session"], ["Apple"])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_session_of_user(self):
+        access_token = self.user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        quiz = self.start()
+        self.client.credentials()
+        response = self.answer(quiz["session"], {})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SimilarQuestionsTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        self.other_category = Category.objects.create(name="Other")
+        texts = [
+            "Which scheduling algorithm gives the minimum average waiting time?",
+            "Which scheduling algorithm gives minimum average waiting time?",
+            "What is the chemical symbol of gold?",
+            "Which process scheduling algorithm gives the minimum average "
+            "waiting time?",
+        ]
+        self.questions = [
+            Question.objects.create(
+                question=text,
+                difficulty="easy",
+                type="multiple-choice",
+                created_by=self.admin_user,
+                correct_answer="SJF" if i != 2 else "Au",
+                category=self.category if i < 3 else self.other_category,
+            )
+            for i, text in enumerate(texts)
+        ]
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def test_admin_restriction(self):
+        user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com"
+        )
+        access_token = user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        response = self.client.get(QUESTION_SIMILAR_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_clusters(self):
+        response = self.client.get(QUESTION_SIMILAR_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        clusters = response.data["data"]
+        self.assertEqual(len(clusters), 1)
+        ids = [question["id"] for question in clusters[0]]
+        self.assertEqual(
+            ids, [self.questions[0].id, self.questions[1].id, self.questions[3].id]
+        )
+        self.assertEqual(clusters[0][2]["category"], "other")
+
+    def test_category_clusters(self):
+        response = self.client.get(QUESTION_SIMILAR_URL, {"category": "other"})
+        self.assertEqual(response.data["data"], [])
+        response = self.client.get(QUESTION_SIMILAR_URL, {"category": "test"})
+        self.assertEqual(len(response.data["data"][0]), 2)
+
+    def test_invalid_threshold(self):
+        response = self.client.get(QUESTION_SIMILAR_URL, {"threshold": "2"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_warns_about_similar_questions(self):
+        question = {
+            "question": "Which scheduling algorithm has the minimum average "
+            "waiting time?",
+            "difficulty": "easy",
+            "type": "multiple-choice",
+            "category": self.category.id,
+            "correct_answer": "SJF",
+            "incorrect_answer_fields": {
+                "incorrect_answer_1": "FCFS",
+                "incorrect_answer_2": "RR",
+                "incorrect_answer_3": "LIFO",
+            },
+        }
+        response = self.client.post(QUESTION_URL, question, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        similar = response.data["similar_questions"]
+        self.assertEqual(similar[0]["id"], self.questions[0].id)
+        self.assertNotIn(self.questions[2].id, [item["id"] for item in similar])
+        self.assertGreaterEqual(similar[0]["similarity"], 0.7)
+
+    def test_similar_questions_command(self):
+        out = io.StringIO()
+        call_command("similar_questions", stdout=out)
+        self.assertIn("Cluster of 3 questions", out.getvalue())
+        self.assertIn("Found 1 clusters", out.getvalue())
+
+
 class QuestionVerificationTest(APITestCase):
     def setUp(self):
         self.verified_user = User.objects.create_user(
@@ -325,6 +1538,168 @@ class QuestionVerificationTest(APITestCase):
         self.assertIsNone(self.question_1.date_verified)
 
 
+class QuestionBulkVerificationTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        self.other_category = Category.objects.create(name="Other")
+        self.questions = [
+            Question.objects.create(
+                question=f"Question {i}?",
+                difficulty="easy",
+                type="multiple-choice",
+                created_by=self.user if i % 2 else self.admin_user,
+                correct_answer="Yes",
+                category=self.category if i < 6 else self.other_category,
+            )
+            for i in range(8)
+        ]
+        access_token = self.admin_user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+
+    def verified_ids(self):
+        return set(Question.verified.values_list("id", flat=True))
+
+    def test_admin_restriction(self):
+        access_token = self.user.get_tokens_for_user()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+        response = self.client.post(BULK_VERIFICATION_URL, {"ids": [1]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_verify_ids_with_one_update(self):
+        ids = [question.id for question in self.questions[:5]]
+        generation = caching.get_generation()
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(
+                    BULK_VERIFICATION_URL, {"ids": ids}, format="json"
+                )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"count": 5, "ids": ids})
+        updates = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "quiz_question"')
+        ]
+        self.assertEqual(len(updates), 1)
+        # the questions are withdrawn from the decks, the decks refreshed
+        # and the cache and sampling indexes invalidated once, after the
+        # commit
+        self.assertEqual(len(callbacks), 4)
+        self.assertEqual(caching.get_generation(), generation)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(caching.get_generation(), generation + 1)
+        self.assertEqual(self.verified_ids(), set(ids))
+        for question in Question.objects.filter(id__in=ids):
+            question.clean()
+            self.assertEqual(question.verified_by, self.admin_user)
+            self.assertIsNotNone(question.date_verified)
+
+    def test_verified_questions_kept(self):
+        self.questions[0].verify(self.user)
+        date_verified = Question.objects.get(id=self.questions[0].id).date_verified
+        ids = [question.id for question in self.questions[:2]]
+        response = self.client.post(BULK_VERIFICATION_URL, {"ids": ids}, format="json")
+        self.assertEqual(response.data["data"]["ids"], ids[1:])
+        question = Question.objects.get(id=self.questions[0].id)
+        self.assertEqual(
+            (question.verified_by, question.date_verified), (self.user, date_verified)
+        )
+
+    def test_changed_ids_only(self):
+        """
+        questions verified by a concurrent request after they were
+        selected are not reported as changed.
+        """
+        ids = [question.id for question in self.questions[:3]]
+
+        class StaleQuerySet:
+            # as if the selection was read before questions[0] was verified
+            def exclude(self, **kwargs):
+                return Question.objects.filter(id__in=ids)
+
+        self.questions[0].verify(self.user)
+        changed = verification.set_verification(StaleQuerySet(), self.admin_user)
+        self.assertEqual(changed, ids[1:])
+        self.assertEqual(Question.objects.get(id=ids[0]).verified_by, self.user)
+
+    def test_verify_filter(self):
+        body = {
+            "category": self.category.slug,
+            "created_by": self.user.id,
+            "created_after": self.questions[2].date_created.isoformat(),
+        }
+        response = self.client.post(BULK_VERIFICATION_URL, body, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.verified_ids(), {self.questions[3].id, self.questions[5].id}
+        )
+
+    def test_created_before_exclusive(self):
+        """
+        a question created at created_before is left out, as it is by
+        the export given the same cutoff.
+        """
+        start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        for i, question in enumerate(self.questions):
+            Question.objects.filter(id=question.id).update(
+                date_created=start + timedelta(hours=i)
+            )
+        cutoff = (start + timedelta(hours=3)).isoformat()
+        body = {"created_before": cutoff}
+        response = self.client.post(BULK_VERIFICATION_URL, body, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        exported = export.filter_questions(created_before=cutoff)
+        self.assertEqual(
+            self.verified_ids(), {question.id for question in self.questions[:3]}
+        )
+        self.assertEqual(
+            self.verified_ids(), set(exported.values_list("id", flat=True))
+        )
+
+    def test_unverify(self):
+        for question in self.questions:
+            question.verify(self.admin_user)
+        body = {"category": self.other_category.slug}
+        response = self.client.delete(BULK_VERIFICATION_URL, body, format="json")
+        self.assertEqual(response.data["data"]["count"], 2)
+        for question in Question.objects.filter(category=self.other_category):
+            question.clean()
+            self.assertIsNone(question.verified_by)
+            self.assertIsNone(question.date_verified)
+        self.assertEqual(len(self.verified_ids()), 6)
+
+    def test_invalid_selection(self):
+        for body in [
+            {},
+            {"ids": []},
+            {"ids": [self.questions[0].id, 9999]},
+            {"category": "missing"},
+            {"created_after": "2022-02-01", "created_before": "2022-01-01"},
+        ]:
+            response = self.client.post(BULK_VERIFICATION_URL, body, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+        self.assertEqual(self.verified_ids(), set())
+
+    @override_settings(MATERIALIZED_STATISTICS=True)
+    def test_materialized_statistics(self):
+        stats.rebuild_counters()
+        ids = [question.id for question in self.questions]
+        self.client.post(BULK_VERIFICATION_URL, {"ids": ids[:5]}, format="json")
+        self.client.delete(BULK_VERIFICATION_URL, {"ids": ids[:2]}, format="json")
+        self.assertEqual(stats.read_counters(), stats.compute_counters())
+        self.assertEqual(stats.read_counters()["verified"], 3)
+
+
 class StatisticsViewTest(APITestCase):
     def setUp(self):
         self.verified_user = User.objects.create_user(
@@ -421,3 +1796,66 @@ class StatisticsViewTest(APITestCase):
         self.assertEqual(response.data.get("status"), "success")
         self.assertIn("activity", response.data.get("data"))
         self.assertEqual(len(response.data.get("data")), 1)
+
+
+class CategoryCountsTest(APITestCase):
+    def setUp(self):
+        self.verified_user = User.objects.create_user(
+            username="dave", password="dave1234", email="d@gmail.com", is_verified=True
+        )
+        self.category = Category.objects.create(name="Test")
+        Category.objects.create(name="Empty")
+        for difficulty in ["easy", "easy", "hard"]:
+            Question.objects.create(
+                question="Are you old?",
+                difficulty=difficulty,
+                type="True / False",
+                created_by=self.verified_user,
+                correct_answer="True",
+                category=self.category,
+            )
+        Question.objects.first().verify(self.verified_user)
+
+    def test_categories_without_counts(self):
+        response = self.client.get(CATEGORY_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for category in response.data.get("data")["results"]:
+            self.assertNotIn("question_counts", category)
+
+    def test_categories_with_counts(self):
+        response = self.client.get(CATEGORY_URL, {"counts": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = {
+            category["slug"]: category["question_counts"]
+            for category in response.data.get("data")["results"]
+        }
+        self.assertEqual(
+            counts["test"],
+            {
+                "total": 3,
+                "verified": 1,
+                "unverified": 2,
+                "difficulty": {"easy": 2, "medium": 0, "hard": 1},
+            },
+        )
+        self.assertEqual(counts["empty"]["total"], 0)
+
+    def test_category_detail_with_counts(self):
+        url = reverse("categories-detail", args=["test"])
+        response = self.client.get(url, {"counts": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("data")["question_counts"]["total"], 3)
+
+    def test_categories_counts_queries(self):
+        """
+        confirms the counts cost the same queries for any
+        number of categories.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(CATEGORY_URL, {"counts": "true"})
+        few_categories = len(context.captured_queries)
+        for i in range(5):
+            Category.objects.create(name=f"Category {i}")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(CATEGORY_URL, {"counts": "true"})
+        self.assertEqual(len(context.captured_queries), few_categories)
@@ -1,10 +1,19 @@
 from django.urls import path
 
 from .views import (
+    QuestionBatchCreateView,
+    QuestionBulkVerificationView,
+    QuestionCacheStatsView,
     QuestionDetailView,
+    QuestionExportView,
     QuestionListCreateView,
     QuestionListFullView,
     QuestionVerification,
+    QuizSessionAnswerView,
+    QuizSessionCreateView,
+    QuizSessionDetailView,
+    RandomQuestionListView,
+    SimilarQuestionsView,
     UnverifiedQuestionListFullView,
 )
 
@@ -12,6 +21,23 @@ app_name = "quiz"
 urlpatterns = [
     path("", QuestionListCreateView, name="question-list"),
     path("<int:id>", QuestionDetailView, name="question-detail"),
+    path("batch", QuestionBatchCreateView, name="question-batch"),
+    path(
+        "verification",
+        QuestionBulkVerificationView,
+        name="question-bulk-verification",
+    ),
+    path("random", RandomQuestionListView, name="question-random"),
+    path("sessions", QuizSessionCreateView, name="quiz-session-list"),
+    path("sessions/<str:key>", QuizSessionDetailView, name="quiz-session-detail"),
+    path(
+        "sessions/<str:key>/answers",
+        QuizSessionAnswerView,
+        name="quiz-session-answers",
+    ),
+    path("cache-stats", QuestionCacheStatsView, name="question-cache-stats"),
+    path("export", QuestionExportView, name="question-export"),
+    path("similar", SimilarQuestionsView, name="question-similar"),
     path("full", QuestionListFullView, name="question-list-full"),
     path(
         "unverified",
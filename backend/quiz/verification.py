@@ -0,0 +1,80 @@
+"""
+bulk verification of questions.
+
+`set_verification` verifies or unverifies every question of a queryset
+with a single UPDATE of `is_verified`, `date_verified` and `verified_by`
+per chunk of BATCH_SIZE questions, setting the three together so the
+invariants of `Question.clean` hold: a verified question has a verifier
+and a date, an unverified one neither. Questions already in the wanted
+state are left alone, so their verifier and date are kept.
+
+The update skips model signals, so the decks, statistics counters and
+cache generation are updated here, once for the whole batch, the decks
+and generation once the transaction is committed.
+"""
+from functools import partial
+from typing import List
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import decks, sampling, stats
+from .caching import bump_generation_on_commit
+from .models import Question
+from .tasks import schedule_deck_refresh
+
+BATCH_SIZE = 1000
+
+
+def set_verification(queryset, user=None) -> List[int]:
+    """
+    verifies the questions of queryset by user, or unverifies them when
+    user is None. Returns the ids of the questions that changed.
+    """
+    verified = user is not None
+    candidates = list(
+        queryset.exclude(is_verified=verified)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if not candidates:
+        return []
+    values = {
+        "is_verified": verified,
+        "date_verified": timezone.now() if verified else None,
+        "verified_by": user,
+    }
+    rows = []
+    with transaction.atomic():
+        for start in range(0, len(candidates), BATCH_SIZE):
+            # the rows still in the old state are locked before the
+            # update, so a question changed by a concurrent request is
+            # neither reported nor counted twice
+            chunk = list(
+                Question.objects.select_for_update()
+                .filter(
+                    id__in=candidates[start : start + BATCH_SIZE],
+                    is_verified=not verified,
+                )
+                .order_by("id")
+                .values_list("id", "category_id", "difficulty", "type")
+            )
+            if chunk:
+                Question.objects.filter(id__in=[row[0] for row in chunk]).update(
+                    **values
+                )
+                rows.extend(chunk)
+        if not rows:
+            return []
+        if stats.is_materialized():
+            # only the verified counter moves
+            stats.apply_deltas({"verified": len(rows) if verified else -len(rows)})
+        ids = [row[0] for row in rows]
+        transaction.on_commit(partial(decks.withdraw, ids, not verified))
+        schedule_deck_refresh(
+            (id, (category_id, difficulty, type, not verified))
+            for id, category_id, difficulty, type in rows
+        )
+        bump_generation_on_commit()
+        bump_generation_on_commit(sampling.GENERATION_KEY)
+    return ids
@@ -1,9 +1,15 @@
+from collections import Counter
+
+from common.conditional import ConditionalGetMixin
+from common.pagination import PageNumberOrKeysetPagination
 from common.permissions import IsAdminUserOrReadOnly
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, status
+from rest_framework import generics, serializers, status
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import (
+    AllowAny,
     IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
@@ -12,17 +18,171 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from . import (
+    batch,
+    caching,
+    decks,
+    export,
+    payloads,
+    search,
+    sessions,
+    similarity,
+    stats,
+    verification,
+)
 from .models import Category, Question
 from .serializers import (
+    CategoryCountSerializer,
     CategorySerializer,
     QuestionDetailSerializer,
     QuestionPublicSerializer,
+    QuestionVerificationSerializer,
+    QuizSessionSerializer,
 )
 
 User = get_user_model()
+MAX_LIMIT = 50
+
+
+def get_limit(query_params) -> int:
+    """
+    returns the `limit` query parameter, never more than MAX_LIMIT.
+    """
+    try:
+        return min(int(query_params.get("limit", MAX_LIMIT)), MAX_LIMIT)
+    except (TypeError, ValueError):
+        return MAX_LIMIT
+
+
+def get_filters(query_params) -> dict:
+    return {
+        "category": query_params.get("category"),
+        "difficulty": query_params.get("difficulty"),
+        "type": query_params.get("type"),
+    }
+
+
+def get_page(query_params) -> int:
+    try:
+        return max(int(query_params.get("page", 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def get_random_questions(query_params) -> list:
+    """
+    draws random verified questions matching the `category`,
+    `difficulty` and `type` query parameters. At most `limit`
+    questions are returned and never more than MAX_LIMIT.
+    """
+    return Question.verified.random_all(
+        limit=get_limit(query_params), **get_filters(query_params)
+    )
+
 
+def get_random_question_data(query_params) -> list:
+    """
+    same as get_random_questions but returns the serialized questions.
+    They are dealt from the precomputed deck of the filters when it is
+    cached (see quiz.decks). Otherwise the payload of every question is
+    cached so only the questions missing from the cache are read from
+    the database.
+    """
+    questions = decks.deal(limit=get_limit(query_params), **get_filters(query_params))
+    if questions is not None:
+        return questions
+    ids = Question.verified.random_ids(
+        limit=get_limit(query_params), **get_filters(query_params)
+    )
+    return get_question_data(ids)
 
-class QuestionListCreateView(generics.GenericAPIView):
+
+def get_question_data(ids) -> list:
+    """
+    returns the public payload of the verified questions of ids, in
+    order, read from the cache where possible.
+    """
+
+    questions = caching.get_many_or_set(
+        "public-question",
+        ids,
+        lambda missing_ids: payloads.public_payloads(Question.verified, missing_ids),
+    )
+    return [questions[id] for id in ids if id in questions]
+
+
+def get_search_arguments(query_params) -> dict:
+    filters = {"is_verified": True}
+    for field, param in [
+        ("category__slug", "category"),
+        ("difficulty", "difficulty"),
+        ("type", "type"),
+    ]:
+        if query_params.get(param) is not None:
+            filters[field] = query_params.get(param)
+    limit = get_limit(query_params)
+    page = get_page(query_params)
+    return {
+        "query": query_params.get("search"),
+        "offset": (page - 1) * limit,
+        "limit": limit,
+        **filters,
+    }
+
+
+def search_questions(query_params) -> list:
+    """
+    returns a page of verified questions matching the `search`
+    query parameter, most relevant first. The `category`, `difficulty`
+    and `type` filters are applied and `page` selects the page of
+    `limit` questions.
+    """
+    return search.search(**get_search_arguments(query_params))
+
+
+def get_search_data(query_params) -> list:
+    """
+    same as search_questions but returns the serialized questions.
+    The page is cached under the normalized query parameters.
+    """
+    terms = sorted(set(search.tokenize(query_params.get("search"))))
+    params = {
+        **get_filters(query_params),
+        "search": " ".join(terms),
+        "limit": get_limit(query_params),
+        "page": get_page(query_params),
+    }
+
+    def serialize():
+        ids = search.search_ids(**get_search_arguments(query_params))
+        questions = payloads.public_payloads(Question.objects, ids)
+        return [questions[id] for id in ids if id in questions]
+
+    return caching.get_or_set(caching.make_key("public-search", params), serialize)
+
+
+class QuestionBankConditionalMixin(ConditionalGetMixin):
+    """
+    validates GET responses with the generations of the question bank,
+    bumped by every write to questions and categories, and of the other
+    data listed in generation_keys.
+    """
+
+    generation_keys = [caching.GENERATION_KEY]
+
+    def get_etag(self, request, *args, **kwargs):
+        return caching.make_etag(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            keys=self.generation_keys,
+        )
+
+    def get_last_modified(self, request, *args, **kwargs):
+        modified = [caching.last_modified(key) for key in self.generation_keys]
+        return None if None in modified else max(modified)
+
+
+class QuestionListCreateView(QuestionBankConditionalMixin, generics.GenericAPIView):
     """
     Public questions endpoint
     """
@@ -32,62 +192,318 @@ class QuestionListCreateView(generics.GenericAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        queryset = Question.verified.random_all()
-        limit = self.request.query_params.get("limit")
-        category = self.request.query_params.get("category")
-        difficulty = self.request.query_params.get("difficulty")
-        type = self.request.query_params.get("type")
         search = self.request.query_params.get("search")
-        if category is not None:
-            print("category", category)
-            queryset = queryset.filter(category__slug=category)
-        if difficulty is not None:
-            print("difficulty", difficulty)
-            queryset = queryset.filter(difficulty=difficulty)
-        if type is not None:
-            print("type", type)
-            queryset = queryset.filter(type=type)
-        if limit is not None:
-            print("limit", limit)
-            try:
-                limit = int(limit)
-                queryset = queryset[:limit]
-            except ValueError:
-                pass
         if search is not None:
-            search_query = Q(question__icontains=search) | Q(
-                explanation__icontains=search
-            )
-            search_queryset = Question.verified.filter(search_query)
-            return search_queryset
-        return queryset[:50]
+            return search_questions(self.request.query_params)
+        return get_random_questions(self.request.query_params)
+
+    def get_etag(self, request, *args, **kwargs):
+        # random questions are drawn again on every request
+        if request.query_params.get("search") is None:
+            return None
+        return super().get_etag(request, *args, **kwargs)
+
+    def get_last_modified(self, request, *args, **kwargs):
+        if request.query_params.get("search") is None:
+            return None
+        return super().get_last_modified(request, *args, **kwargs)
 
     def get(self, request):
-        serializer = self.serializer_class(self.get_queryset(), many=True)
+        if request.query_params.get("search") is not None:
+            questions = get_search_data(request.query_params)
+        else:
+            questions = get_random_question_data(request.query_params)
         data = {
             "status": "success",
             "message": "Question fetched successfully",
-            "data": serializer.data,
+            "data": questions,
         }
         return Response(data, status.HTTP_200_OK)
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(created_by=request.user)
+        question = serializer.save(created_by=request.user)
         data = {
             "status": "success",
             "message": "Question created successfully",
             "data": serializer.data,
         }
+        similar = similarity.similar_questions(
+            question.question, question.correct_answer, exclude=question.id
+        )
+        if similar:
+            questions = similarity.describe_questions(id for id, _ in similar)
+            data["message"] = "Question created successfully, similar questions exist"
+            data["similar_questions"] = [
+                {**questions[id], "similarity": score} for id, score in similar
+            ]
+        return Response(data, status.HTTP_201_CREATED)
+
+
+class QuestionBatchCreateView(APIView):
+    """
+    creates many questions in one request.
+
+    Expects `{"questions": [...], "mode": "atomic" | "partial",
+    "duplicates": "skip" | "update"}` where every question has the shape
+    accepted by the public questions endpoint. In atomic mode (the
+    default) nothing is created unless every question is valid; in
+    partial mode the valid questions are created and the invalid ones
+    reported. Copies of questions already in their category are skipped
+    by default, or update the existing question. The result of every
+    question is returned in order.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            raise serializers.ValidationError(
+                {"questions": "expected an object with a list of questions"}
+            )
+        questions = request.data.get("questions")
+        mode = request.data.get("mode", batch.ATOMIC)
+        duplicates = request.data.get("duplicates", batch.SKIP)
+        if not isinstance(questions, list) or not questions:
+            raise serializers.ValidationError(
+                {"questions": "questions must be a non-empty list"}
+            )
+        if len(questions) > batch.MAX_BATCH_ITEMS:
+            raise serializers.ValidationError(
+                {
+                    "questions": f"at most {batch.MAX_BATCH_ITEMS} questions can be created at once"
+                }
+            )
+        if mode not in batch.MODES:
+            raise serializers.ValidationError(
+                {"mode": f"mode must be one of {', '.join(batch.MODES)}"}
+            )
+        if duplicates not in batch.DUPLICATE_MODES:
+            choices = ", ".join(batch.DUPLICATE_MODES)
+            raise serializers.ValidationError(
+                {"duplicates": f"duplicates must be one of {choices}"}
+            )
+        results = batch.create_questions(questions, request.user, mode, duplicates)
+        counts = Counter(result["status"] for result in results)
+        data = {
+            "created": counts["created"],
+            "updated": counts["updated"],
+            "duplicates": counts["duplicate"],
+            "failed": counts["failed"],
+            "results": results,
+        }
+        if counts["failed"] and (
+            mode == batch.ATOMIC or not counts["created"] + counts["updated"]
+        ):
+            data = {
+                "status": "error",
+                "message": "No question was created",
+                "error": data,
+            }
+            return Response(data, status.HTTP_400_BAD_REQUEST)
+        if counts["failed"]:
+            message = "Some questions could not be created"
+        elif counts["created"]:
+            message = "Questions created successfully"
+        else:
+            message = "No new question to create"
+        data = {"status": "success", "message": message, "data": data}
+        return Response(
+            data,
+            status.HTTP_201_CREATED if counts["created"] else status.HTTP_200_OK,
+        )
+
+
+class QuizSessionCreateView(APIView):
+    """
+    starts a quiz of random verified questions drawn with the `category`,
+    `difficulty`, `type` and `limit` parameters of the public questions
+    endpoint, given in the body or the query string.
+
+    The questions are served without their answers; the answers are
+    submitted at the end of the quiz to the answers endpoint.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = QuizSessionSerializer(data=request.data or request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        ids = Question.verified.random_ids(
+            limit=get_limit(params), **get_filters(params)
+        )
+        if not ids:
+            raise serializers.ValidationError(
+                {"questions": "No question matches the filters"}
+            )
+        session = sessions.start_session(ids, request.user)
+        data = {
+            "status": "success",
+            "message": "Quiz started successfully",
+            "data": get_session_data(session),
+        }
         return Response(data, status.HTTP_201_CREATED)
 
 
-class QuestionListFullView(generics.ListAPIView):
+def get_session_data(session: dict) -> dict:
+    return {
+        "session": session["key"],
+        "expires": session["expires"],
+        "questions": sessions.quiz_questions(
+            session, get_question_data(session["questions"])
+        ),
+        "result": session["result"],
+    }
+
+
+def get_quiz_session(request, key: str) -> dict:
+    session = sessions.get_session(key, request.user)
+    if session is None:
+        raise NotFound("Quiz not found or expired")
+    return session
+
+
+class QuizSessionDetailView(APIView):
+    """
+    returns the questions of a quiz, and its result once graded.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request, key):
+        session = get_quiz_session(request, key)
+        data = {
+            "status": "success",
+            "message": "Quiz fetched successfully",
+            "data": get_session_data(session),
+        }
+        return Response(data, status.HTTP_200_OK)
+
+
+class QuizSessionAnswerView(APIView):
+    """
+    grades the answers of a quiz, given as `{"answers": {"<question id>":
+    "<option>"}}`. A quiz is graded once.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def post(self, request, key):
+        session = get_quiz_session(request, key)
+        answers = request.data.get("answers")
+        if not isinstance(answers, dict) or not all(
+            isinstance(answer, str) for answer in answers.values()
+        ):
+            raise serializers.ValidationError(
+                {"answers": "answers must map question ids to options"}
+            )
+        data = {
+            "status": "success",
+            "message": "Quiz graded successfully",
+            "data": sessions.grade(session, answers),
+        }
+        return Response(data, status.HTTP_200_OK)
+
+
+class RandomQuestionListView(generics.GenericAPIView):
+    """
+    returns random verified questions.
+    Accepts the same filters as the public questions endpoint.
+    """
+
+    serializer_class = QuestionPublicSerializer
+
+    def get(self, request):
+        data = {
+            "status": "success",
+            "message": "Random questions fetched successfully",
+            "data": get_random_question_data(request.query_params),
+        }
+        return Response(data, status.HTTP_200_OK)
+
+
+class QuestionCacheStatsView(APIView):
+    """
+    returns the hit and miss counters of the public questions cache.
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        data = {
+            "status": "success",
+            "message": "Public questions cache statistics",
+            "data": caching.stats(),
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SimilarQuestionsView(APIView):
+    """
+    lists the clusters of likely duplicate questions, optionally of the
+    category whose slug is given in the `category` query parameter.
+
+    `threshold` is the lowest similarity (0 to 1) between questions of a
+    cluster and `limit` the number of clusters returned.
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        try:
+            threshold = float(
+                request.query_params.get("threshold", similarity.THRESHOLD)
+            )
+        except ValueError:
+            threshold = -1
+        if not 0 < threshold <= 1:
+            raise serializers.ValidationError(
+                {"threshold": "threshold must be a number between 0 and 1"}
+            )
+        category = request.query_params.get("category")
+        if category is not None:
+            category = get_object_or_404(Category, slug=category)
+        clusters = similarity.find_clusters(category, threshold)
+        clusters = clusters[: get_limit(request.query_params)]
+        questions = similarity.describe_questions(
+            id for cluster in clusters for id in cluster
+        )
+        data = {
+            "status": "success",
+            "message": f"{len(clusters)} clusters of similar questions",
+            "data": [[questions[id] for id in cluster] for cluster in clusters],
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class QuestionDetailListMixin:
+    """
+    lists questions in the format of QuestionDetailSerializer, built
+    from plain rows by quiz.payloads.
+    """
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_queryset().values(*payloads.DETAIL_VALUES)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(payloads.to_detail(list(rows), request))
+        return self.get_paginated_response(payloads.to_detail(page, request))
+
+
+class QuestionListFullView(QuestionDetailListMixin, generics.ListAPIView):
     serializer_class = QuestionDetailSerializer
     permission_classes = [IsAdminUser]
     authentication_classes = [JWTAuthentication]
     queryset = Question.objects.order_by("-date_created")
+    pagination_class = PageNumberOrKeysetPagination
 
     def list(self, request, *args, **kwargs):
         data = super().list(request, *args, **kwargs).data
@@ -99,11 +515,12 @@ class QuestionListFullView(generics.ListAPIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
-class UnverifiedQuestionListFullView(generics.ListAPIView):
+class UnverifiedQuestionListFullView(QuestionDetailListMixin, generics.ListAPIView):
     serializer_class = QuestionDetailSerializer
     permission_classes = [IsAdminUser]
     authentication_classes = [JWTAuthentication]
     queryset = Question.unverified.order_by("-date_created")
+    pagination_class = PageNumberOrKeysetPagination
 
     def list(self, request, *args, **kwargs):
         data = super().list(request, *args, **kwargs).data
@@ -115,6 +532,47 @@ class UnverifiedQuestionListFullView(generics.ListAPIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
+class QuestionExportView(APIView):
+    """
+    streams the questions as NDJSON, CSV or the JSON format of the scraper,
+    selected with the `as` query parameter.
+
+    Optionally filtered with the `verified`, `category`, `created_after`
+    and `created_before` query parameters.
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        # `format` is taken by DRF for content negotiation
+        format = request.query_params.get("as", "ndjson")
+        if format not in export.FORMATS:
+            raise serializers.ValidationError(
+                {"as": f"as must be one of {', '.join(export.FORMATS)}"}
+            )
+        verified = request.query_params.get("verified")
+        if verified is not None:
+            verified = verified.lower() in ["true", "1"]
+        try:
+            queryset = export.filter_questions(
+                verified=verified,
+                category=request.query_params.get("category"),
+                created_after=request.query_params.get("created_after"),
+                created_before=request.query_params.get("created_before"),
+            )
+        except ValueError as err:
+            raise serializers.ValidationError({"date": str(err)})
+        response = StreamingHttpResponse(
+            export.export(queryset, format), content_type=export.CONTENT_TYPES[format]
+        )
+        extension = "json" if format == "json" else format
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="questions.{extension}"'
+        return response
+
+
 class QuestionVerification(APIView):
     """
     verify or unverify the question whose ID was passed in the URL
@@ -150,7 +608,41 @@ class QuestionVerification(APIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
-class StatisticsView(APIView):
+class QuestionBulkVerificationView(APIView):
+    """
+    verifies (POST) or unverifies (DELETE) many questions at once, given
+    by `ids` and/or the filters `category` (slug), `created_by` (user ID),
+    `created_after` and `created_before`.
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def get_questions(self, request):
+        serializer = QuestionVerificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.get_queryset()
+
+    def post(self, request):
+        ids = verification.set_verification(self.get_questions(request), request.user)
+        data = {
+            "status": "success",
+            "message": f"{request.user} verifies {len(ids)} questions",
+            "data": {"count": len(ids), "ids": ids},
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        ids = verification.set_verification(self.get_questions(request))
+        data = {
+            "status": "success",
+            "message": f"{request.user} unverifies {len(ids)} questions",
+            "data": {"count": len(ids), "ids": ids},
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class StatisticsView(QuestionBankConditionalMixin, APIView):
     """
     returns information about questions, categories
     and activity about the quiz app.
@@ -159,52 +651,52 @@ class StatisticsView(APIView):
     an `on` query parameter in the URL.
     """
 
+    generation_keys = [caching.GENERATION_KEY, caching.USERS_GENERATION_KEY]
+
     def get(self, request):
-        questions = {
-            "all_questions": Question.no_of_all_questions(),
-            "verified_questions": Question.no_of_verified_questions(),
-            "unverified_questions": Question.no_of_unverified_questions(),
-        }
-        difficulty = {
-            "easy": Question.no_of_easy_questions(),
-            "medium": Question.no_of_medium_questions(),
-            "hard": Question.no_of_hard_questions(),
-        }
-        users = {
-            "Total Users": User.total_user(),
-            "Total Staff": User.total_staff(),
-        }
-        activity = {
-            "last_created": Question.last_created(),
-            "last_verified": Question.last_verified(),
-        }
-        data = {
-            "status": "success",
-            "message": "Statistics about questions,category, difficulty, users, activity",
-            "data": {
-                "question": questions,
-                "difficulty": difficulty,
-                "category": Category.questions_count_category(),
-                "users": users,
-                "activity": activity,
-            },
-        }
         info_on = request.query_params.get("on")
-        info_list = ["category", "difficulty", "question", "users", "activity"]
-        if info_on is not None and info_on in info_list:
+        if info_on is not None and info_on in stats.SECTIONS:
             data = {
                 "status": "success",
                 "message": f"Statistics on {info_on}",
-                "data": {
-                    info_on: data.get("data")[info_on],
-                },
+                "data": stats.get_statistics([info_on]),
             }
+            return Response(data, status=status.HTTP_200_OK)
+        data = {
+            "status": "success",
+            "message": "Statistics about questions,category, difficulty, users, activity",
+            "data": stats.get_statistics(
+                ["question", "difficulty", "category", "users", "activity"]
+            ),
+        }
         return Response(data, status=status.HTTP_200_OK)
 
 
-class CategoryListCreateView(generics.ListCreateAPIView):
-    serializer_class = CategorySerializer
-    queryset = Category.objects.all()
+class CategoryCountMixin:
+    """
+    includes the question counts of categories when the `counts`
+    query parameter is true.
+    """
+
+    def with_counts(self):
+        return self.request.method == "GET" and self.request.query_params.get(
+            "counts", ""
+        ).lower() in ["true", "1"]
+
+    def get_queryset(self):
+        if self.with_counts():
+            return Category.objects.with_question_counts().order_by("id")
+        return Category.objects.all()
+
+    def get_serializer_class(self):
+        if self.with_counts():
+            return CategoryCountSerializer
+        return CategorySerializer
+
+
+class CategoryListCreateView(
+    QuestionBankConditionalMixin, CategoryCountMixin, generics.ListCreateAPIView
+):
     permission_classes = [IsAdminUserOrReadOnly]
     authentication_classes = [JWTAuthentication]
 
@@ -227,11 +719,13 @@ class CategoryListCreateView(generics.ListCreateAPIView):
         return Response(data, status=status.HTTP_201_CREATED)
 
 
-class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
-    serializer_class = CategorySerializer
+class CategoryDetailView(
+    QuestionBankConditionalMixin,
+    CategoryCountMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdminUserOrReadOnly]
-    queryset = Category.objects.all()
     lookup_field = "slug"
 
     def retrieve(self, request, *args, **kwargs):
@@ -262,7 +756,7 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Response(data, status=status.HTTP_204_NO_CONTENT)
 
 
-class UserQuestionListView(generics.ListAPIView):
+class UserQuestionListView(QuestionDetailListMixin, generics.ListAPIView):
     serializer_class = QuestionDetailSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -270,7 +764,7 @@ class UserQuestionListView(generics.ListAPIView):
     def get_queryset(self):
         id = self.kwargs["id"]
         user = get_object_or_404(User, id=id)
-        return user.questions.all()
+        return user.questions.order_by("-date_created")
 
     def list(self, request, *args, **kwargs):
         data = super().list(request, *args, **kwargs).data
@@ -297,11 +791,13 @@ class UserQuestionStatView(APIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
-class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class QuestionDetailView(
+    QuestionBankConditionalMixin, generics.RetrieveUpdateDestroyAPIView
+):
     serializer_class = QuestionPublicSerializer
     permission_classes = [IsAdminUser]
     authentication_classes = [JWTAuthentication]
-    queryset = Question.objects.all()
+    queryset = Question.objects.with_related()
     lookup_field = "id"
 
     def retrieve(self, request, *args, **kwargs):
@@ -333,9 +829,18 @@ class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 QuestionListCreateView = QuestionListCreateView.as_view()
+QuestionBatchCreateView = QuestionBatchCreateView.as_view()
+QuizSessionCreateView = QuizSessionCreateView.as_view()
+QuizSessionDetailView = QuizSessionDetailView.as_view()
+QuizSessionAnswerView = QuizSessionAnswerView.as_view()
+RandomQuestionListView = RandomQuestionListView.as_view()
+QuestionCacheStatsView = QuestionCacheStatsView.as_view()
+SimilarQuestionsView = SimilarQuestionsView.as_view()
 QuestionListFullView = QuestionListFullView.as_view()
 UnverifiedQuestionListFullView = UnverifiedQuestionListFullView.as_view()
+QuestionExportView = QuestionExportView.as_view()
 QuestionVerification = QuestionVerification.as_view()
+QuestionBulkVerificationView = QuestionBulkVerificationView.as_view()
 StatisticsView = StatisticsView.as_view()
 CategoryListCreateView = CategoryListCreateView.as_view()
 CategoryDetailView = CategoryDetailView.as_view()
@@ -1,38 +1,124 @@
 import json
 import os
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 API_BASE_URL = settings.API_BASE_URL
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+MAX_REPORTED_ERRORS = 100
 
 
 class JsonConnector:
     """
-    handles json files.
-    """
+    handles json files holding an array of questions.
 
-    data = ["no"]
+    Iterating the connector yields the questions one at a time, reading
+    the file in chunks, so memory does not grow with the size of the
+    file. `parsed_data` loads them all.
+    """
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, chunk_size=CHUNK_SIZE):
         self.file = filepath
-        with open(filepath) as f:
-            data = json.loads(f.read())
-        self.data = data
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        decoder = json.JSONDecoder()
+        with open(self.file) as f:
+            buffer, position, eof = "", 0, False
+            # what may come next: "[", an item or "]", an item, "," or "]"
+            expected = "["
+            while True:
+                position = self.skip(buffer, position)
+                if position == len(buffer):
+                    if eof:
+                        raise ValueError(f"{self.file} ends inside its JSON array")
+                    buffer, position, eof = self.read(f, buffer, position)
+                    continue
+                char = buffer[position]
+                if expected == "[":
+                    if char != "[":
+                        raise ValueError(f"{self.file} does not hold a JSON array")
+                    expected = "item or ]"
+                    position += 1
+                    continue
+                if char == "]" and expected != "item":
+                    return
+                if expected == ", or ]":
+                    if char != ",":
+                        raise ValueError(
+                            f"{self.file} misses a comma in its JSON array"
+                        )
+                    expected = "item"
+                    position += 1
+                    continue
+                if char in ",]":
+                    raise ValueError(f"{self.file} has an empty item in its JSON array")
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    end = None
+                # an item reaching the end of the buffer may be cut short
+                if (end is None or end == len(buffer)) and not eof:
+                    buffer, position, eof = self.read(f, buffer, position)
+                    continue
+                yield item
+                expected = ", or ]"
+                position = end
+
+    def read(self, f, buffer, position):
+        """
+        drops the consumed part of buffer and appends the next chunk.
+        The chunk grows with the buffer so a large item is not decoded
+        again after every small read.
+        """
+        chunk = f.read(max(self.chunk_size, len(buffer) - position))
+        return buffer[position:] + chunk, 0, not chunk
+
+    @staticmethod
+    def skip(buffer, position):
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        return position
 
     @property
     def parsed_data(self) -> list:
-        return self.data
+        return list(self)
+
+
+class NdjsonConnector(JsonConnector):
+    """
+    handles ndjson files holding one question per line.
+    """
+
+    def __iter__(self):
+        with open(self.file) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+CONNECTORS = {
+    ".json": JsonConnector,
+    ".ndjson": NdjsonConnector,
+    ".jsonl": NdjsonConnector,
+}
 
 
 def connection_factory(filepath):
     """
-    factory method for initializing JsonConnector
+    factory method for initializing the connector of a file
     """
-    if filepath.endswith(".json"):
-        connector = JsonConnector
-    else:
+    connector = CONNECTORS.get(os.path.splitext(filepath)[1])
+    if connector is None:
         raise ValueError("Invalid file format. No handler for this file")
     return connector(filepath)
 
@@ -49,26 +135,164 @@ def connect_to(filepath):
     return factory
 
 
+def format_question(data: dict, category: int) -> dict:
+    """
+    converts a scraped question to the body accepted by the create
+    question endpoint. Returns None when the question is malformed.
+    """
+    type = (
+        "multiple-choice"
+        if len(data.get("incorrect answers") or []) > 1
+        else "True / False"
+    )
+    try:
+        incorrect_answer_fields = {
+            "incorrect_answer_1": data.get("incorrect answers")[0]
+        }
+        if type == "multiple-choice":
+            incorrect_answer_fields.setdefault(
+                "incorrect_answer_2", data.get("incorrect answers")[1]
+            )
+            incorrect_answer_fields.setdefault(
+                "incorrect_answer_3", data.get("incorrect answers")[2]
+            )
+    except Exception as err:
+        print("This data:", data, "caused the error")
+        print(err)
+    else:
+        formatted_data = {
+            "question": data.get("question"),
+            "difficulty": random.choice(["easy", "medium", "hard"]),
+            "type": type,
+            "category": category,
+            "correct_answer": data.get("correct_answer"),
+            "incorrect_answer_fields": incorrect_answer_fields,
+            "explanation": data.get("explanation"),
+        }
+        return formatted_data
+
+
+class UploadReport:
+    """
+    counts what happened during an upload. Safe to update from the
+    worker threads.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.retried = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def add(self, sent=0, failed=0, retried=0, skipped=0, duplicates=0, error=None):
+        with self.lock:
+            self.sent += sent
+            self.duplicates += duplicates
+            self.failed += failed
+            self.retried += retried
+            self.skipped += skipped
+            if error is not None and len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(error)
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """questions sent per second"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "sent": self.sent,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "retried": self.retried,
+            "skipped": self.skipped,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 2),
+        }
+
+    def __str__(self):
+        return (
+            f"{self.sent} sent, {self.duplicates} duplicates, "
+            f"{self.failed} failed, {self.retried} retried, "
+            f"{self.skipped} skipped in {self.elapsed:.2f}s "
+            f"({self.throughput:.1f} questions/s)"
+        )
+
+
 class ApiConnector:
     """
     1. Iterate through data.
     2. Get questions from every JSON file.
     3. Push Data to the database using the Create Question endpoint.
+
+    Questions are posted by a pool of `concurrency` threads sharing one
+    keep-alive session. Requests that fail with a connection error, a 5xx
+    or a 429 are retried up to `retries` times with exponential backoff.
+    With `batch_size` set, questions are posted in batches of that size to
+    the batch endpoint instead of one request each, and `duplicates`
+    tells it to skip or update the questions already in the bank.
     """
 
-    def __init__(self, directory, token, category=1, api_base_url=API_BASE_URL):
+    def __init__(
+        self,
+        directory,
+        token,
+        category=1,
+        api_base_url=API_BASE_URL,
+        concurrency=8,
+        retries=3,
+        backoff=0.5,
+        timeout=30,
+        batch_size=None,
+        duplicates="skip",
+        progress=None,
+    ):
         self.api_base_url = api_base_url
         self.headers = {"Accept": "*/*", "Authorization": f"Bearer {token}"}
         self.directory = directory
-        self.file_extension = ".json"
+        self.file_extensions = tuple(CONNECTORS)
         self.category = category
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.duplicates = duplicates
+        self.progress = progress
+        self.session = self.make_session()
+        self.report = UploadReport()
+
+    def make_session(self) -> requests.Session:
+        """
+        returns a session keeping one connection alive per worker.
+        """
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency, pool_maxsize=self.concurrency
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
-    def run(self):
+    def run(self) -> UploadReport:
         """
         initialize the process of posting the data to the db.
         """
         files = self.get_list_of_json_files()
-        self.send_data_to_api(files)
+        return self.send_data_to_api(files)
 
     def get_list_of_json_files(self) -> list:
         """
@@ -80,64 +304,145 @@ class ApiConnector:
             if os.path.isfile(f"{self.directory}/{dirs_or_files}")
         ]
         return [
-            file for file in list_of_only_files if file.endswith(self.file_extension)
+            file for file in list_of_only_files if file.endswith(self.file_extensions)
         ]
 
     def format_data_for_api(self, data: dict) -> dict:
         """
         returns a ready made body to use as json payload in the request body
         """
-        type = (
-            "multiple-choice"
-            if len(data.get("incorrect answers")) > 1
-            else "True / False"
-        )
-        try:
-            incorrect_answer_fields = {
-                "incorrect_answer_1": data.get("incorrect answers")[0]
-            }
-            if type == "multiple-choice":
-                incorrect_answer_fields.setdefault(
-                    "incorrect_answer_2", data.get("incorrect answers")[1]
-                )
-                incorrect_answer_fields.setdefault(
-                    "incorrect_answer_3", data.get("incorrect answers")[2]
-                )
-        except Exception as err:
-            print("This data:", data, "caused the error")
-            print(err)
-        else:
-            formatted_data = {
-                "question": data.get("question"),
-                "difficulty": random.choice(["easy", "medium", "hard"]),
-                "type": type,
-                "category": self.category,
-                "correct_answer": data.get("correct_answer"),
-                "incorrect_answer_fields": incorrect_answer_fields,
-                "explanation": data.get("explanation"),
-            }
-            return formatted_data
-
-    def send_data_to_api(self, files: list):
+        return format_question(data, self.category)
+
+    def iter_bodies(self, files: list):
         """
-        actually send data to the api endpoint.
+        yields the request body of every question in files, reading the
+        files only as fast as the questions are posted.
         """
         for file in files:
-            list_of_data = connect_to(os.path.join(self.directory, file)).parsed_data
-            for data in list_of_data:
+            connector = connect_to(os.path.join(self.directory, file))
+            if connector is None:
+                continue
+            for data in connector:
                 body = self.format_data_for_api(data)
-                self.post_data_to_api(body)
+                if body is None:
+                    self.report.add(skipped=1)
+                    continue
+                yield body
+
+    def iter_batches(self, bodies):
+        batch = []
+        for body in bodies:
+            batch.append(body)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def send_data_to_api(self, files: list) -> UploadReport:
+        """
+        actually send data to the api endpoint.
+        """
+        self.report = UploadReport()
+        bodies = self.iter_bodies(files)
+        if self.batch_size:
+            self.map(self.post_batch_to_api, self.iter_batches(bodies))
+        else:
+            self.map(self.post_data_to_api, bodies)
+        self.report.finish()
+        return self.report
+
+    def map(self, func, items):
+        """
+        calls func on every item from a pool of `concurrency` threads,
+        reading items only as fast as they are posted.
+        """
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+
+        def call(item):
+            try:
+                func(item)
+            except Exception as err:
+                self.report.add(failed=1, error=(None, repr(err)))
+            finally:
+                slots.release()
+                if self.progress is not None:
+                    self.progress(self.report)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for item in items:
+                slots.acquire()
+                executor.submit(call, item)
+
+    def retry_delay(self, attempt: int, response=None) -> float:
+        retry_after = None
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        # jitter keeps the workers from retrying in lockstep
+        return self.backoff * 2**attempt * random.uniform(0.5, 1)
+
+    def post(self, url, data):
+        """
+        posts data, retrying connection errors, 5xx and 429 responses.
+        Returns the last response, or None when no response was received.
+        """
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                response = self.session.post(url, json=data, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                pass
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            if attempt < self.retries:
+                self.report.add(retried=1)
+                time.sleep(self.retry_delay(attempt, response))
+        return response
 
     def post_data_to_api(self, data):
         """
         handles sending of data to the api endpoint.
         """
         link = f"{self.api_base_url}questions/"
-        r = requests.post(link, json=data, headers=self.headers)
-        if r.status_code == 201:
+        r = self.post(link, data)
+        if r is not None and r.status_code == 201:
+            self.report.add(sent=1)
             return "success"
+        if r is not None and r.status_code == 409:
+            self.report.add(duplicates=1)
+            return "duplicate"
+        error = (data.get("question"), r.status_code if r is not None else None)
+        self.report.add(failed=1, error=error)
         return "failed"
 
+    def post_batch_to_api(self, batch: list):
+        """
+        sends a batch of questions to the batch endpoint. Invalid
+        questions are reported without failing the rest of the batch.
+        """
+        link = f"{self.api_base_url}questions/batch"
+        body = {"questions": batch, "mode": "partial", "duplicates": self.duplicates}
+        r = self.post(link, body)
+        try:
+            body = r.json()
+            results = (body.get("data") or body.get("error"))["results"]
+        except (AttributeError, TypeError, KeyError, ValueError):
+            status_code = r.status_code if r is not None else None
+            self.report.add(failed=len(batch), error=(None, status_code))
+            return "failed"
+        for result in results:
+            if result["status"] == "created":
+                self.report.add(sent=1)
+            elif result["status"] in ["duplicate", "updated"]:
+                self.report.add(duplicates=1)
+            else:
+                question = batch[result["index"]].get("question")
+                self.report.add(failed=1, error=(question, result.get("errors")))
+        return "success" if r.status_code in [200, 201] else "failed"
+
 
 DIRECTORY = f"{os.path.dirname(os.path.abspath(__file__))}\data\microbiology"
 token = settings.ADMIN_TOKEN
@@ -145,7 +450,7 @@ token = settings.ADMIN_TOKEN
 
 def main():
     api = ApiConnector(DIRECTORY, token)
-    api.run()
+    print(api.run())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+"""
+crawls many question pages at once.
+
+Pages are fetched by a pool of threads sharing one keep-alive session
+and parsed in a pool of processes, so parsing is not serialized by the
+GIL. The questions of every page are written to their own JSON file as
+soon as the page is parsed, while other pages are still being fetched.
+"""
+import hashlib
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .httpcache import CachedResponse, CrawlManifest, NotCached
+from .scraper import parse_page, save_to_json_file
+
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+# not a .json file so the loaders do not take it for questions
+MANIFEST_NAME = ".crawl-manifest"
+
+
+def read_urls(source: str, session=None) -> list:
+    """
+    returns the page URLs of a sitemap (a URL or a file ending in .xml),
+    or of a file listing one URL per line.
+    """
+    if source.startswith(("http://", "https://")):
+        content = (session or requests).get(source, timeout=30).content
+    else:
+        with open(source, "rb") as f:
+            content = f.read()
+    if source.endswith(".xml") or content.lstrip().startswith(b"<?xml"):
+        root = ElementTree.fromstring(content)
+        return [
+            loc.text.strip()
+            for loc in root.iter(f"{SITEMAP_NAMESPACE}loc")
+            if loc.text and loc.text.strip()
+        ]
+    return [
+        line.strip()
+        for line in content.decode().splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+
+
+def page_name(url: str) -> str:
+    """
+    returns the file name of the questions of a page, from its last
+    path segment.
+    """
+    path = urlparse(url).path.strip("/")
+    return path.rsplit("/", 1)[-1] or "index"
+
+
+def page_names(urls) -> dict:
+    """
+    maps every url to its page_name, made unique with a hash of the url
+    for the urls whose last path segments are the same.
+    """
+    names = {}
+    for url in urls:
+        names.setdefault(page_name(url), []).append(url)
+    unique = {}
+    for name, shared in names.items():
+        for url in dict.fromkeys(shared):
+            if len(set(shared)) > 1:
+                unique[url] = f"{name}-{hashlib.sha256(url.encode()).hexdigest()[:8]}"
+            else:
+                unique[url] = name
+    return unique
+
+
+class CrawlReport:
+    def __init__(self):
+        self.pages = 0
+        self.unchanged = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.questions = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.finished = None
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.pages} pages, {self.questions} questions, {self.failed} failed, "
+            f"{self.unchanged} unchanged ({self.not_modified} not modified) "
+            f"in {self.elapsed:.2f}s ({self.pages_per_second:.1f} pages/s)"
+        )
+
+
+class Crawler:
+    """
+    fetches urls with `concurrency` threads and parses them with
+    `processes` processes (the number of CPUs by default), writing the
+    questions of every page to output_dir.
+
+    With a cache (see scraper.httpcache) pages are revalidated instead of
+    downloaded again. With incremental, pages whose content did not
+    change since they were last exported to output_dir are skipped.
+    """
+
+    def __init__(
+        self,
+        urls,
+        output_dir,
+        concurrency=8,
+        processes=None,
+        parser="fast",
+        timeout=30,
+        cache=None,
+        incremental=True,
+    ):
+        self.urls = list(urls)
+        self.names = page_names(self.urls)
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.processes = processes
+        self.parser = parser
+        self.timeout = timeout
+        self.cache = cache
+        self.incremental = incremental
+        self.session = self.make_session()
+        self.report = CrawlReport()
+
+    def make_session(self) -> requests.Session:
+        """
+        returns a session keeping one connection alive per worker.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency, pool_maxsize=self.concurrency
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def fetch(self, url: str) -> CachedResponse:
+        if self.cache is not None:
+            return self.cache.fetch(self.session, url, self.timeout)
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return CachedResponse(url, response.content, "fetched")
+
+    def output_path(self, url: str) -> str:
+        return os.path.join(self.output_dir, f"{self.names[url]}.json")
+
+    def fail(self, url, error):
+        self.report.failed += 1
+        self.report.errors.append((url, error))
+
+    def save(self, response: CachedResponse, questions: list):
+        output = self.output_path(response.url)
+        save_to_json_file(questions, output[: -len(".json")])
+        self.manifest.record(response.url, response.sha256, output, len(questions))
+        self.report.pages += 1
+        self.report.questions += len(questions)
+
+    def run(self) -> CrawlReport:
+        self.report = CrawlReport()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.manifest = CrawlManifest(os.path.join(self.output_dir, MANIFEST_NAME))
+        try:
+            self.crawl()
+        finally:
+            self.manifest.save()
+        self.report.finish()
+        return self.report
+
+    def crawl(self):
+        """
+        fetches and parses the pages, saving every page as soon as it is
+        parsed. At most `window` pages are fetched or parsed at once, so
+        the memory used does not grow with the number of urls.
+        """
+        processes = self.processes or os.cpu_count() or 1
+        window = 2 * (self.concurrency + processes)
+        urls = iter(self.urls)
+        with ThreadPoolExecutor(self.concurrency) as fetchers, ProcessPoolExecutor(
+            processes
+        ) as parsers:
+            fetches, parses = {}, {}
+            while True:
+                for url in islice(urls, max(window - len(fetches) - len(parses), 0)):
+                    fetches[fetchers.submit(self.fetch, url)] = url
+                if not fetches and not parses:
+                    return
+                done, _ = wait([*fetches, *parses], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in parses:
+                        self.parsed(parses.pop(future), future)
+                        continue
+                    response = self.fetched(fetches.pop(future), future)
+                    if response is not None:
+                        parse = parsers.submit(
+                            parse_page, response.content, self.parser
+                        )
+                        # the worker has its own copy of the page
+                        response.content = None
+                        parses[parse] = response
+
+    def fetched(self, url: str, future) -> Optional[CachedResponse]:
+        """
+        returns the response of a fetch, or None when the page failed or
+        is unchanged.
+        """
+        try:
+            response = future.result()
+        except (requests.RequestException, NotCached) as err:
+            self.fail(url, str(err))
+            return None
+        if response.status == "not-modified":
+            self.report.not_modified += 1
+        if self.incremental and self.manifest.is_unchanged(
+            url, response.sha256, self.output_path(url)
+        ):
+            self.report.unchanged += 1
+            return None
+        return response
+
+    def parsed(self, response: CachedResponse, future):
+        try:
+            self.save(response, future.result())
+        except Exception as err:
+            self.fail(response.url, repr(err))
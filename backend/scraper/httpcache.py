@@ -0,0 +1,181 @@
+"""
+on-disk HTTP cache and crawl manifest of the scraper.
+
+The cache keeps the last response of every URL with its ETag and
+Last-Modified headers, and revalidates it with a conditional request so
+an unchanged page costs a 304 instead of a download. In offline mode the
+cache answers from disk only, which replays a previous crawl or fixtures
+without any network access.
+
+The manifest records the hash of the content every page was last
+exported from, so a re-crawl skips parsing and exporting pages whose
+content did not change.
+"""
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional, Union
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_atomic(path, data: Union[str, bytes]):
+    """
+    writes data to path so readers never see a partial file, even when
+    several threads write the same path.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class NotCached(Exception):
+    """raised in offline mode for a URL missing from the cache"""
+
+
+class CachedResponse:
+    """
+    status is "fetched" for a new or changed page, "not-modified" when
+    the server answered 304 and "replayed" when read offline.
+    """
+
+    def __init__(self, url: str, content: bytes, status: str):
+        self.url = url
+        self.content = content
+        self.status = status
+        self.sha256 = content_hash(content)
+
+
+class HttpCache:
+    """
+    stores the response of every URL under directory as `<key>.json`
+    for the validators and `<key>.body` for the content.
+    """
+
+    def __init__(self, directory, offline=False):
+        self.directory = directory
+        self.offline = offline
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, url: str, extension: str) -> str:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        returns the validators of the cached response of url, or None.
+        """
+        try:
+            with open(self.path(url, "json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def body(self, url: str, entry: Optional[dict] = None) -> Optional[bytes]:
+        """
+        returns the cached content of url, or None when it is missing or,
+        given the entry of url, is not the content the entry describes.
+        """
+        try:
+            with open(self.path(url, "body"), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        if entry is not None and content_hash(content) != entry.get("sha256"):
+            return None
+        return content
+
+    def store(self, url: str, content: bytes, etag=None, last_modified=None):
+        # both files are replaced whole, the body first, so the
+        # validators never describe a partial or other body
+        write_atomic(self.path(url, "body"), content)
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "sha256": content_hash(content),
+            "fetched_at": datetime.datetime.utcnow().isoformat(),
+        }
+        write_atomic(self.path(url, "json"), json.dumps(entry))
+
+    def conditional_headers(self, entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def fetch(self, session, url: str, timeout=30) -> CachedResponse:
+        """
+        returns the content of url, revalidating the cached response.
+        Raises NotCached offline and requests errors online.
+        """
+        entry = self.get(url)
+        content = None if entry is None else self.body(url, entry)
+        if content is None:
+            # a body that does not match its validators is fetched again
+            entry = None
+        if self.offline:
+            if entry is None:
+                raise NotCached(url)
+            return CachedResponse(url, content, "replayed")
+        response = session.get(
+            url, headers=self.conditional_headers(entry), timeout=timeout
+        )
+        if response.status_code == 304 and entry is not None:
+            return CachedResponse(url, content, "not-modified")
+        response.raise_for_status()
+        self.store(
+            url,
+            response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return CachedResponse(url, response.content, "fetched")
+
+
+class CrawlManifest:
+    """
+    maps every crawled URL to the hash of the content its questions
+    were exported from, saved as JSON at path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.pages = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.pages = {}
+
+    def is_unchanged(self, url: str, sha256: str, output: str) -> bool:
+        page = self.pages.get(url)
+        return (
+            page is not None
+            and page["sha256"] == sha256
+            and page["output"] == output
+            and os.path.exists(output)
+        )
+
+    def record(self, url: str, sha256: str, output: str, questions: int):
+        self.pages[url] = {
+            "sha256": sha256,
+            "output": output,
+            "questions": questions,
+            "exported_at": datetime.datetime.utcnow().isoformat(),
+        }
+
+    def save(self):
+        write_atomic(self.path, json.dumps(self.pages, indent=2, sort_keys=True))
@@ -0,0 +1,177 @@
+"""
+loads scraped questions straight into the database.
+
+Unlike ApiConnector this skips HTTP, authentication and DRF: questions
+are streamed from the files, validated with the model field validators and
+written with `bulk_create`, one transaction per chunk. Verification is
+applied in the same pass.
+"""
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from quiz.batch import fingerprint_key, insert_questions, split_duplicates
+from quiz.fingerprint import fingerprint
+from quiz.models import InCorrectAnswer, Question
+
+from .api_connector import CONNECTORS, connect_to, format_question
+
+CHUNK_SIZE = 1000
+# foreign keys are checked once for the whole load, not per question
+EXCLUDED_FIELDS = ["category", "created_by", "verified_by"]
+
+
+class LoadReport:
+    def __init__(self):
+        self.created = 0
+        self.answers = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.finished = None
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        """questions and incorrect answers written per second"""
+        rows = self.created + self.answers
+        return rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "created": self.created,
+            "answers": self.answers,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 2),
+        }
+
+    def __str__(self):
+        return (
+            f"{self.created} questions and {self.answers} incorrect answers, "
+            f"{self.duplicates} duplicates skipped, {self.failed} failed "
+            f"in {self.elapsed:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+class DatabaseLoader:
+    """
+    loads every JSON file of directory into category, created by user,
+    skipping the questions already in the category.
+    With verify the questions are verified by user. With dry_run the
+    questions are validated but nothing is written.
+    """
+
+    def __init__(
+        self,
+        directory,
+        user,
+        category,
+        verify=False,
+        dry_run=False,
+        chunk_size=CHUNK_SIZE,
+    ):
+        self.directory = directory
+        self.user = user
+        self.category = category
+        self.verify = verify
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.report = LoadReport()
+
+    def get_list_of_json_files(self) -> list:
+        return sorted(
+            file
+            for file in os.listdir(self.directory)
+            if file.endswith(tuple(CONNECTORS))
+            and os.path.isfile(os.path.join(self.directory, file))
+        )
+
+    def iter_scraped(self):
+        """
+        yields the scraped questions one at a time, streamed from the
+        files.
+        """
+        for file in self.get_list_of_json_files():
+            yield from connect_to(os.path.join(self.directory, file))
+
+    def build(self, data: dict):
+        """
+        returns the question and incorrect answers of a scraped question,
+        or None when it is invalid.
+        """
+        body = format_question(data, self.category.id)
+        if body is None:
+            self.fail(data.get("question"), "malformed question")
+            return None
+        options = list(body.pop("incorrect_answer_fields").values())
+        body.pop("category")
+        body["explanation"] = body["explanation"] or ""
+        question = Question(**body, category=self.category, created_by=self.user)
+        question.fingerprint = fingerprint(
+            question.question, question.correct_answer, options
+        )
+        if self.verify:
+            question.is_verified = True
+            question.verified_by = self.user
+            question.date_verified = timezone.now()
+        try:
+            question.full_clean(exclude=EXCLUDED_FIELDS, validate_unique=False)
+            # format_question already gives True / False questions a
+            # single answer, which is all InCorrectAnswer.clean checks
+            for option in options:
+                InCorrectAnswer(option=option).clean_fields(exclude=["question"])
+        except ValidationError as err:
+            self.fail(body.get("question"), err.messages)
+            return None
+        return question, options
+
+    def fail(self, question, error):
+        self.report.failed += 1
+        if len(self.report.errors) < 100:
+            self.report.errors.append((question, error))
+
+    def iter_chunks(self):
+        chunk = []
+        for data in self.iter_scraped():
+            built = self.build(data)
+            if built is None:
+                continue
+            chunk.append(built)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def run(self) -> LoadReport:
+        self.report = LoadReport()
+        # questions of earlier chunks are not in the database on a dry run
+        seen = set()
+        for chunk in self.iter_chunks():
+            size = len(chunk)
+            chunk = [item for item in chunk if fingerprint_key(item[0]) not in seen]
+            new, _ = split_duplicates(chunk)
+            chunk = [item for _, item in new]
+            self.report.duplicates += size - len(chunk)
+            seen.update(fingerprint_key(question) for question, _ in chunk)
+            if not chunk:
+                continue
+            if not self.dry_run:
+                with transaction.atomic():
+                    insert_questions(chunk)
+            self.report.created += len(chunk)
+            self.report.answers += sum(len(options) for _, options in chunk)
+        self.report.finish()
+        return self.report
@@ -0,0 +1,50 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from scraper.scraper import fast_parser, parse_page
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent.parent / "tests" / "fixtures"
+PARSERS = ["html5lib", "fast"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the page parsers over saved HTML pages, in pages per second. "
+        "Fails when the parsers do not extract the same questions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixtures", type=str, default=str(FIXTURES_DIR))
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--parsers", type=str, nargs="+", default=PARSERS)
+
+    def handle(self, *args, **options):
+        pages = [
+            path.read_bytes()
+            for path in sorted(Path(options["fixtures"]).glob("*.html"))
+        ]
+        if not pages:
+            raise CommandError(f"No .html file in {options['fixtures']}")
+        rounds = options["rounds"]
+        self.stdout.write(
+            f"{len(pages)} pages, {rounds} rounds, fast uses {fast_parser()}"
+        )
+        self.stdout.write(f"{'parser':<10} {'pages/s':>10} {'questions':>10}")
+        results = {}
+        for parser in options["parsers"]:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                questions = [parse_page(page, parser) for page in pages]
+            elapsed = time.perf_counter() - start
+            results[parser] = questions
+            count = sum(len(page) for page in questions)
+            self.stdout.write(
+                f"{parser:<10} {len(pages) * rounds / elapsed:>10.1f} {count:>10}"
+            )
+        expected = next(iter(results.values()))
+        different = [parser for parser, result in results.items() if result != expected]
+        if different:
+            raise CommandError(
+                f"Different questions extracted by {', '.join(different)}"
+            )
@@ -1,17 +1,24 @@
 import os
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
 from quiz.models import Category
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
 from scraper.api_connector import ApiConnector
+from scraper.loader import CHUNK_SIZE, DatabaseLoader
 
 SCRAPER_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = SCRAPER_DIR / "data"
 
-category_choices = Category.objects.values_list("id", flat=True)
-category_choices = list(category_choices)
-category_choices.sort()
-directory_choices = os.listdir(DATA_DIR)
+
+def get_directory_choices() -> list:
+    return sorted(os.listdir(DATA_DIR))
+
+
+def get_category_choices() -> list:
+    return sorted(Category.objects.values_list("id", flat=True))
 
 
 class Command(BaseCommand):
@@ -19,31 +26,139 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("token", type=str)
-        parser.add_argument("directory", type=str, choices=directory_choices)
-        parser.add_argument("category", type=int, choices=category_choices)
+        # choices are checked in handle so that loading the command
+        # neither lists the data directory nor queries the database
+        parser.add_argument("directory", type=str, help="A directory of scraper/data")
+        parser.add_argument("category", type=int, help="The id of a category")
         parser.add_argument(
             "--verify",
             action="store_true",
             help="Verify all Questions that\
         will be added",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of requests sent at the same time",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=3,
+            help="Number of retries of a request failing with a 5xx or 429",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Send questions to the batch endpoint in batches of this size",
+        )
+        parser.add_argument(
+            "--update-duplicates",
+            action="store_true",
+            help="Update the questions already in the bank instead of\
+        skipping them, with --batch-size",
+        )
+        parser.add_argument(
+            "--direct",
+            action="store_true",
+            help="Write the questions with the ORM instead of the API",
+        )
+        parser.add_argument(
+            "--user",
+            type=str,
+            help="Username of the author of the questions with --direct,\
+        defaults to the owner of the token",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the questions without writing them, with --direct",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Number of questions written per transaction with --direct",
+        )
 
     def handle(self, *args, **options):
         token = options.get("token")
         category = options.get("category")
         directory = options.get("directory")
         verify = options.get("verify")
-        print(options)
-
         path_directory = DATA_DIR / directory
-        api = ApiConnector(path_directory, token, category=category)
-        api.run()
-        self.stdout.write(self.style.SUCCESS("All Questions Loaded Successfully"))
+        self.check_choices(directory, category)
 
-        # work on question verification
+        if options["direct"]:
+            return self.load_direct(path_directory, token, category, options)
         if verify:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    "Setting Verified to be true for all questions loaded."
-                )
+            raise CommandError("--verify is only supported with --direct")
+        if options["dry_run"]:
+            raise CommandError("--dry-run is only supported with --direct")
+
+        api = ApiConnector(
+            path_directory,
+            token,
+            category=category,
+            concurrency=options["concurrency"],
+            retries=options["retries"],
+            batch_size=options["batch_size"],
+            duplicates="update" if options["update_duplicates"] else "skip",
+        )
+        report = api.run()
+        for question, error in report.errors:
+            self.stderr.write(f"Failed: {question!r} ({error})")
+        if report.failed:
+            self.stdout.write(self.style.WARNING(str(report)))
+        else:
+            self.stdout.write(self.style.SUCCESS(str(report)))
+            self.stdout.write(self.style.SUCCESS("All Questions Loaded Successfully"))
+
+    def check_choices(self, directory, category):
+        directory_choices = get_directory_choices()
+        if directory not in directory_choices:
+            raise CommandError(
+                f"invalid directory: '{directory}' "
+                f"(choose from {', '.join(directory_choices)})"
+            )
+        if not Category.objects.filter(id=category).exists():
+            category_choices = ", ".join(map(str, get_category_choices()))
+            raise CommandError(
+                f"invalid category: {category} (choose from {category_choices})"
             )
+
+    def get_user(self, token, username):
+        User = get_user_model()
+        try:
+            if username is not None:
+                return User.objects.get(username=username)
+            return User.objects.get(id=AccessToken(token)["user_id"])
+        except (TokenError, KeyError):
+            raise CommandError("Invalid token, pass --user instead")
+        except User.DoesNotExist:
+            raise CommandError("User not found")
+
+    def load_direct(self, path_directory, token, category, options):
+        user = self.get_user(token, options["user"])
+        if options["verify"] and not user.is_staff:
+            raise CommandError(f"{user.username} is not allowed to verify questions")
+        loader = DatabaseLoader(
+            path_directory,
+            user,
+            Category.objects.get(id=category),
+            verify=options["verify"],
+            dry_run=options["dry_run"],
+            chunk_size=options["chunk_size"],
+        )
+        report = loader.run()
+        for question, error in report.errors:
+            self.stderr.write(f"Invalid: {question!r} ({error})")
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Dry run, nothing written: {report}"))
+        elif report.failed:
+            self.stdout.write(self.style.WARNING(str(report)))
+        else:
+            self.stdout.write(self.style.SUCCESS(str(report)))
+            self.stdout.write(self.style.SUCCESS("All Questions Loaded Successfully"))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from scraper.crawler import Crawler, read_urls
+from scraper.httpcache import HttpCache
+
+
+class Command(BaseCommand):
+    help = (
+        "Scrape question pages concurrently, writing the questions of every "
+        "page to its own JSON file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", type=str, help="Pages to scrape")
+        parser.add_argument(
+            "--from",
+            dest="source",
+            type=str,
+            help="A sitemap (URL or .xml file) or a file listing one URL per line",
+        )
+        parser.add_argument("--output", type=str, required=True)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Number of parsing processes, the number of CPUs by default",
+        )
+        parser.add_argument(
+            "--parser",
+            type=str,
+            default="fast",
+            help='"fast" parses only the questions, or a BeautifulSoup parser',
+        )
+        parser.add_argument(
+            "--cache",
+            type=str,
+            help="Directory of an HTTP cache revalidated with ETag/Last-Modified",
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Only use the pages of --cache, without any request",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Export every page, even those unchanged since the last crawl",
+        )
+
+    def handle(self, *args, **options):
+        urls = list(options["urls"])
+        if options["source"]:
+            urls += read_urls(options["source"])
+        if not urls:
+            raise CommandError("Pass the pages to scrape or --from")
+        if options["offline"] and not options["cache"]:
+            raise CommandError("--offline requires --cache")
+        cache = None
+        if options["cache"]:
+            cache = HttpCache(options["cache"], offline=options["offline"])
+        crawler = Crawler(
+            urls,
+            options["output"],
+            concurrency=options["concurrency"],
+            processes=options["processes"],
+            parser=options["parser"],
+            cache=cache,
+            incremental=not options["full"],
+        )
+        report = crawler.run()
+        for url, error in report.errors:
+            self.stderr.write(f"Failed: {url} ({error})")
+        style = self.style.WARNING if report.failed else self.style.SUCCESS
+        self.stdout.write(style(str(report)))
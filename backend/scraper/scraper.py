@@ -3,68 +3,115 @@ import pprint
 import re
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+# map letter numbering of option to its index in content
+ANSWER_INDEXES = {"a": 1, "b": 2, "c": 3, "d": 4}
+ENTRY_CONTENT = SoupStrainer("div", class_="entry-content")
+
+
+def fast_parser() -> str:
+    """
+    lxml when it is installed, else the parser of the standard library.
+    """
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return "html.parser"
+    return "lxml"
+
+
+def find_entry_content(content, parser: str = "fast"):
+    """
+    returns the `div.entry-content` holding the questions of a page.
+
+    "fast" only builds the entry content, skipping the rest of the page,
+    with lxml or html.parser. Any other value is passed to BeautifulSoup
+    as the parser of the whole page, e.g. "html5lib".
+    """
+    if parser == "fast":
+        soup = BeautifulSoup(content, fast_parser(), parse_only=ENTRY_CONTENT)
+    else:
+        soup = BeautifulSoup(content, parser)
+    return soup.find("div", class_="entry-content")
+
+
+def extract_questions(ec) -> list:
+    """
+    returns the questions of an entry content.
+    """
+    # gather all ads
+    ads = ec.find_all("div", id=re.compile("^sf-ads"))
+    # gather all collapse spans - view answer button
+    vans = ec.find_all("span", class_="collapseomatic")
+    # gather all br tags
+    brs = ec.find_all("br")
+    # removes all ads
+    for ad in ads:
+        ad.decompose()
+    # removes all collapse spans - view answer button
+    for van in vans:
+        van.decompose()
+    # removes all br tags
+    for br in brs:
+        br.decompose()
+    ps = ec.find_all("p")[1:]
+    questions = []
+    for p in ps:
+        try:
+            contents = p.contents
+            answer = p.find_next_sibling("div", class_="collapseomatic_content")
+            ans, exp = answer.contents[:2]
+            ans_let = ans.split(":")[1].strip().lower()
+            question = contents[0].split(".")[1].lstrip()
+            options = contents[1:]
+            options.pop()  # remove the last newline char in the list
+            # remove correct answer
+            correct_answer = options.pop(ANSWER_INDEXES[ans_let] - 1)
+            correct_answer = correct_answer.split(")", 1)[1].lstrip()
+            # make use of maxsplit argument just in case there isanother useful ')'
+            incorrect_answers = [
+                option.split(")", 1)[1].lstrip() for option in options if str(option)
+            ]
+            explanation = exp.replace("Explanation:", "").strip()
+        except:
+            # print("Invalid format")
+            pass
+        else:
+            quiz = {
+                "question": question,
+                "incorrect answers": incorrect_answers,
+                "correct_answer": correct_answer,
+                "explanation": explanation,
+            }
+            questions.append(quiz)
+    return questions
+
+
+def parse_page(content, parser: str = "fast") -> list:
+    """
+    returns the questions of a page, an empty list when it has none.
+    """
+    ec = find_entry_content(content, parser)
+    if ec is None:
+        return []
+    return extract_questions(ec)
 
 
 class SanfoundryScraper:
-    def __init__(self, url):
+    def __init__(self, url, parser="fast", cache=None):
         self.url = url
+        self.parser = parser
+        # a scraper.httpcache.HttpCache revalidating the page
+        self.cache = cache
 
     def scrape_text_only(self) -> list:
-        res = requests.get(self.url)
-        content = res.content
-        soup = BeautifulSoup(content, "html5lib")
-        ec = soup.find("div", class_="entry-content")
-        # gather all ads
-        ads = ec.find_all("div", id=re.compile("^sf-ads"))
-        # gather all collapse spans - view answer button
-        vans = ec.find_all("span", class_="collapseomatic")
-        # gather all br tags
-        brs = ec.find_all("br")
-        # removes all ads
-        for ad in ads:
-            ad.decompose()
-        # removes all collapse spans - view answer button
-        for van in vans:
-            van.decompose()
-        # removes all br tags
-        for br in brs:
-            br.decompose()
-        ps = ec.find_all("p")[1:]
-        questions = []
-        # map letter numbering of option to its index in content
-        dict_ans_idx = {"a": 1, "b": 2, "c": 3, "d": 4}
-        for p in ps:
-            try:
-                contents = p.contents
-                answer = p.find_next_sibling("div", class_="collapseomatic_content")
-                ans, exp = answer.contents[:2]
-                ans_let = ans.split(":")[1].strip().lower()
-                question = contents[0].split(".")[1].lstrip()
-                options = contents[1:]
-                options.pop()  # remove the last newline char in the list
-                # remove correct answer
-                correct_answer = options.pop(dict_ans_idx[ans_let] - 1)
-                correct_answer = correct_answer.split(")", 1)[1].lstrip()
-                # make use of maxsplit argument just in case there isanother useful ')'
-                incorrect_answers = [
-                    option.split(")", 1)[1].lstrip()
-                    for option in options
-                    if str(option)
-                ]
-                explanation = exp.replace("Explanation:", "").strip()
-            except:
-                # print("Invalid format")
-                pass
-            else:
-                quiz = {
-                    "question": question,
-                    "incorrect answers": incorrect_answers,
-                    "correct_answer": correct_answer,
-                    "explanation": explanation,
-                }
-                questions.append(quiz)
-        return questions
+        if self.cache is not None:
+            content = self.cache.fetch(requests, self.url).content
+        else:
+            content = requests.get(self.url).content
+        return parse_page(content, self.parser)
 
 
 def save_to_json_file(questions, file_path):
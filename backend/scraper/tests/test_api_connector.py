@@ -0,0 +1,215 @@
+import json
+import tempfile
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from ..api_connector import (
+    ApiConnector,
+    JsonConnector,
+    NdjsonConnector,
+    connection_factory,
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    accepts questions like the API does, failing the first
+    `server.failures` requests with `server.failure_status`.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # write headers and body in one segment
+    wbufsize = -1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            fail = server.failures > 0
+            server.failures -= 1
+        if fail:
+            return self.respond(server.failure_status, {"status": "error"})
+        if self.path.endswith("/batch"):
+            results = []
+            for index, question in enumerate(body["questions"]):
+                if question["question"].startswith("bad"):
+                    results.append({"index": index, "status": "failed", "errors": {}})
+                else:
+                    results.append({"index": index, "status": "created", "id": index})
+            with server.lock:
+                server.received.extend(body["questions"])
+            return self.respond(
+                201, {"status": "success", "data": {"results": results}}
+            )
+        if body["question"].startswith("bad"):
+            return self.respond(400, {"status": "error"})
+        with server.lock:
+            server.received.append(body)
+        self.respond(201, {"status": "success", "data": body})
+
+    def respond(self, status, data):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class ApiConnectorTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.failures = 0
+        self.server.failure_status = 503
+        self.server.connections = set()
+        self.server.received = []
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        questions = [
+            {
+                "question": f"{i} Which is a fruit?",
+                "incorrect answers": ["Rice", "Beans", "Yam"],
+                "correct_answer": "Apple",
+                "explanation": "Apples grow on trees",
+            }
+            for i in range(30)
+        ]
+        Path(self.directory.name, "fruits.json").write_text(json.dumps(questions))
+
+    def connector(self, **kwargs):
+        host, port = self.server.server_address
+        return ApiConnector(
+            self.directory.name,
+            "token",
+            api_base_url=f"http://{host}:{port}/api/v1/",
+            backoff=0.01,
+            **kwargs,
+        )
+
+    def test_upload(self):
+        report = self.connector(concurrency=4).run()
+        self.assertEqual((report.sent, report.failed, report.retried), (30, 0, 0))
+        self.assertEqual(len(self.server.received), 30)
+        self.assertGreater(report.throughput, 0)
+        # connections are kept alive and shared by the workers
+        self.assertLessEqual(len(self.server.connections), 4)
+
+    def test_retries(self):
+        self.server.failures = 3
+        report = self.connector(concurrency=1).run()
+        self.assertEqual((report.sent, report.failed, report.retried), (30, 0, 3))
+
+    def test_retries_exhausted(self):
+        self.server.failures = 3
+        self.server.failure_status = 429
+        report = self.connector(concurrency=1, retries=2).run()
+        self.assertEqual((report.sent, report.failed, report.retried), (29, 1, 2))
+
+    def test_client_errors_not_retried(self):
+        path = Path(self.directory.name, "bad.json")
+        path.write_text(
+            json.dumps(
+                [
+                    {
+                        "question": "bad question",
+                        "incorrect answers": ["No"],
+                        "correct_answer": "Yes",
+                        "explanation": "",
+                    }
+                ]
+            )
+        )
+        report = self.connector().run()
+        self.assertEqual((report.sent, report.failed, report.retried), (30, 1, 0))
+        self.assertEqual(report.errors, [("bad question", 400)])
+
+    def test_batch_upload(self):
+        report = self.connector(batch_size=8).run()
+        self.assertEqual((report.sent, report.failed), (30, 0))
+        self.assertEqual(self.server.requests, 4)
+        self.assertEqual(len(self.server.received), 30)
+
+
+class JsonConnectorTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, text):
+        path = Path(self.directory.name, name)
+        path.write_text(text)
+        return str(path)
+
+    def test_stream_json_array(self):
+        for path in DATA_DIR.glob("*/*.json"):
+            with open(path) as f:
+                expected = json.load(f)
+            # chunks far smaller than a question cut every item short
+            self.assertEqual(list(JsonConnector(str(path), chunk_size=7)), expected)
+
+    def test_stream_ndjson(self):
+        questions = [{"question": f"{i} Which is a fruit?"} for i in range(5)]
+        path = self.write(
+            "questions.ndjson",
+            "\n".join(json.dumps(question) for question in questions) + "\n\n",
+        )
+        connector = connection_factory(path)
+        self.assertIsInstance(connector, NdjsonConnector)
+        self.assertEqual(list(connector), questions)
+
+    def test_invalid_files(self):
+        with self.assertRaises(ValueError):
+            list(JsonConnector(self.write("object.json", '{"question": "?"}')))
+        with self.assertRaises(ValueError):
+            list(JsonConnector(self.write("cut.json", '[{"question": "?"}, {"q'), 4))
+        with self.assertRaises(ValueError):
+            connection_factory(self.write("questions.csv", ""))
+        self.assertEqual(list(JsonConnector(self.write("empty.json", " [ ] "))), [])
+
+    def test_invalid_separators(self):
+        # rejected like json.loads rejects them
+        for text in ["[1 2]", "[,,1,]", "[1,,2]", "[1,]", "[,]", '[{"a": 1}{"a": 2}]']:
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(JsonConnector(self.write("invalid.json", text), 2))
+        path = self.write("valid.json", ' [ 1 ,\n2, {"a": [3, 4]} ] ')
+        self.assertEqual(list(JsonConnector(path, 2)), [1, 2, {"a": [3, 4]}])
+
+    def test_constant_memory(self):
+        question = {
+            "question": "Which is a fruit?",
+            "incorrect answers": ["Rice", "Beans", "Yam"],
+            "correct_answer": "Apple",
+            "explanation": "Apples grow on trees" * 10,
+        }
+        path = Path(self.directory.name, "large.json")
+        with open(path, "w") as f:
+            f.write("[")
+            f.write(",\n".join(json.dumps(question) for _ in range(20_000)))
+            f.write("]")
+        self.assertGreater(path.stat().st_size, 5_000_000)
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        count = sum(1 for _ in JsonConnector(str(path)))
+        _, peak = tracemalloc.get_traced_memory()
+        self.assertEqual(count, 20_000)
+        self.assertLess(peak, 1_000_000)
@@ -0,0 +1,30 @@
+import importlib
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from quiz.models import Category
+
+COMMAND = "scraper.management.commands.loadscraped"
+
+
+class LoadScrapedCommandTest(TestCase):
+    def test_import_runs_no_queries(self):
+        sys.modules.pop(COMMAND, None)
+        with CaptureQueriesContext(connection) as context:
+            importlib.import_module(COMMAND)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_invalid_directory(self):
+        with self.assertRaisesMessage(CommandError, "invalid directory: 'nowhere'"):
+            call_command("loadscraped", "token", "nowhere", "1", "--direct")
+
+    def test_invalid_category(self):
+        category = Category.objects.create(name="Test")
+        with self.assertRaisesMessage(
+            CommandError, f"invalid category: 999 (choose from {category.id})"
+        ):
+            call_command("loadscraped", "token", "chemistry", "999", "--direct")
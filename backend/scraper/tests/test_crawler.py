@@ -0,0 +1,128 @@
+import json
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..crawler import Crawler, page_name, page_names, read_urls
+from ..scraper import parse_page
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    serves the fixtures, /<name>/ being fixtures/<name>.html
+    """
+
+    def translate_path(self, path):
+        return str(FIXTURES_DIR / f"{path.strip('/')}.html")
+
+    def log_message(self, *args):
+        pass
+
+
+class ParserTest(SimpleTestCase):
+    def test_parsers_agree(self):
+        for path in FIXTURES_DIR.glob("*.html"):
+            content = path.read_bytes()
+            questions = parse_page(content, "fast")
+            self.assertTrue(questions)
+            self.assertEqual(questions, parse_page(content, "html5lib"))
+            self.assertEqual(questions, parse_page(content, "html.parser"))
+
+    def test_page_without_questions(self):
+        self.assertEqual(parse_page(b"<html><body><p>nothing</p></body></html>"), [])
+
+
+class CrawlerTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output.cleanup)
+        host, port = self.server.server_address
+        self.urls = [
+            f"http://{host}:{port}/{path.stem}/"
+            for path in sorted(FIXTURES_DIR.glob("*.html"))
+        ]
+
+    def test_crawl(self):
+        urls = self.urls + [self.urls[0] + "missing/"]
+        report = Crawler(urls, self.output.name, processes=2).run()
+        self.assertEqual((report.pages, report.failed), (4, 1))
+        for path in FIXTURES_DIR.glob("*.html"):
+            with open(Path(self.output.name, f"{path.stem}.json")) as f:
+                self.assertEqual(json.load(f), parse_page(path.read_bytes()))
+        self.assertEqual(report.errors[0][0], urls[-1])
+
+    def test_pages_saved_while_fetching(self):
+        crawler = Crawler(self.urls, self.output.name, concurrency=1, processes=1)
+        fetch = crawler.fetch
+        saved = []
+
+        def fetch_last_after_save(url):
+            if url == self.urls[-1]:
+                deadline = time.monotonic() + 10
+                while not crawler.report.pages and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                saved.append(crawler.report.pages)
+            return fetch(url)
+
+        crawler.fetch = fetch_last_after_save
+        report = crawler.run()
+        self.assertEqual(report.pages, 4)
+        self.assertGreater(saved[0], 0)
+
+    def test_read_sitemap(self):
+        sitemap = Path(self.output.name, "sitemap.xml")
+        locs = "".join(f"<url><loc>{url}</loc></url>" for url in self.urls)
+        sitemap.write_text(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+        )
+        self.assertEqual(read_urls(str(sitemap)), self.urls)
+        listing = Path(self.output.name, "urls.txt")
+        listing.write_text("# pages\n" + "\n".join(self.urls) + "\n")
+        self.assertEqual(read_urls(str(listing)), self.urls)
+
+    def test_page_name(self):
+        self.assertEqual(
+            page_name("https://www.sanfoundry.com/operating-system-questions/"),
+            "operating-system-questions",
+        )
+
+    def test_page_names_unique(self):
+        urls = [
+            "https://example.com/a/questions/",
+            "https://example.com/b/questions/",
+            "https://example.com/c/other/",
+        ]
+        names = page_names(urls)
+        self.assertEqual(names[urls[2]], "other")
+        self.assertEqual(len(set(names.values())), 3)
+        self.assertTrue(names[urls[0]].startswith("questions-"))
+
+    def test_scrape_command(self):
+        output = StringIO()
+        call_command(
+            "scrape", *self.urls, output=self.output.name, processes=1, stdout=output
+        )
+        self.assertIn("4 pages", output.getvalue())
+        self.assertEqual(len(list(Path(self.output.name).glob("*.json"))), 4)
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_parser", rounds=1, stdout=output)
+        self.assertIn("pages/s", output.getvalue())
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from django.test import SimpleTestCase
+
+from ..crawler import MANIFEST_NAME, Crawler
+from ..httpcache import CrawlManifest, HttpCache
+from ..scraper import SanfoundryScraper
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """
+    serves `server.pages` with an ETag and answers 304 to a matching
+    If-None-Match.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        content = self.server.pages.get(self.path)
+        if content is None:
+            return self.respond(404, b"")
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.counts["304"] += 1
+            return self.respond(304, b"", etag)
+        self.server.counts["200"] += 1
+        self.respond(200, content, etag)
+
+    def respond(self, status, content, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+        self.server.daemon_threads = True
+        self.server.pages = {
+            f"/{path.stem}/": path.read_bytes()
+            for path in sorted(FIXTURES_DIR.glob("*.html"))
+        }
+        self.server.counts = {"200": 0, "304": 0}
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = os.path.join(self.tmp.name, "output")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}"
+        self.urls = [self.base_url + path for path in self.server.pages]
+
+    def crawl(self, offline=False, **kwargs):
+        cache = HttpCache(self.cache_dir, offline=offline)
+        return Crawler(self.urls, self.output, processes=1, cache=cache, **kwargs).run()
+
+    def test_recrawl_skips_unchanged_pages(self):
+        report = self.crawl()
+        self.assertEqual((report.pages, report.unchanged), (4, 0))
+        self.assertEqual(self.server.counts, {"200": 4, "304": 0})
+        output = Path(self.output, "chemistry-basic.json")
+        modified = output.stat().st_mtime_ns
+
+        report = self.crawl()
+        self.assertEqual((report.pages, report.unchanged), (0, 4))
+        self.assertEqual(report.not_modified, 4)
+        self.assertEqual(self.server.counts, {"200": 4, "304": 4})
+        self.assertEqual(output.stat().st_mtime_ns, modified)
+
+    def test_recrawl_exports_changed_pages(self):
+        self.crawl()
+        path = "/python-general/"
+        self.server.pages[path] = self.server.pages[path].replace(
+            b"</main>", b"<p>updated</p></main>"
+        )
+        report = self.crawl()
+        self.assertEqual((report.pages, report.unchanged), (1, 3))
+        manifest = CrawlManifest(os.path.join(self.output, MANIFEST_NAME))
+        self.assertEqual(
+            manifest.pages[self.base_url + path]["sha256"],
+            hashlib.sha256(self.server.pages[path]).hexdigest(),
+        )
+
+    def test_truncated_body_fetched_again(self):
+        """
+        a body that does not match its validators, e.g. cut by a crash,
+        is downloaded again instead of being served on a 304.
+        """
+        self.crawl()
+        cache = HttpCache(self.cache_dir)
+        url = self.urls[0]
+        with open(cache.path(url, "body"), "r+b") as f:
+            f.truncate(10)
+        self.assertIsNone(cache.body(url, cache.get(url)))
+        response = cache.fetch(requests.Session(), url)
+        self.assertEqual(response.status, "fetched")
+        self.assertEqual(response.content, self.server.pages[url[len(self.base_url) :]])
+        self.assertEqual(cache.body(url, cache.get(url)), response.content)
+        self.assertFalse([n for n in os.listdir(self.cache_dir) if n.endswith(".tmp")])
+
+    def test_full_crawl(self):
+        self.crawl()
+        report = self.crawl(incremental=False)
+        self.assertEqual((report.pages, report.not_modified), (4, 4))
+
+    def test_offline_replay(self):
+        """
+        replays the fixtures without touching the network.
+        """
+        cache = HttpCache(self.cache_dir)
+        for url in self.urls:
+            path = url[len(self.base_url) :]
+            cache.store(url, self.server.pages[path])
+        missing = self.base_url + "/missing/"
+        self.urls.append(missing)
+        report = self.crawl(offline=True)
+        self.assertEqual((report.pages, report.failed), (4, 1))
+        self.assertEqual(report.errors[0][0], missing)
+        self.assertEqual(self.server.counts, {"200": 0, "304": 0})
+
+    def test_scraper_cache(self):
+        cache = HttpCache(self.cache_dir)
+        scraper = SanfoundryScraper(self.urls[0], cache=cache)
+        questions = scraper.scrape_text_only()
+        self.assertEqual(scraper.scrape_text_only(), questions)
+        self.assertEqual(self.server.counts, {"200": 1, "304": 1})
@@ -0,0 +1,117 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from quiz.models import Category, InCorrectAnswer, Question
+
+from ..loader import DatabaseLoader
+
+User = get_user_model()
+
+
+class DatabaseLoaderTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin",
+            password="dave1234",
+            email="admin@gmail.com",
+            is_verified=True,
+        )
+        self.category = Category.objects.create(name="Test")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        questions = [
+            {
+                "question": f"{i} Which is a fruit?",
+                "incorrect answers": ["Rice", "Beans", "Yam"],
+                "correct_answer": "Apple",
+                "explanation": "Apples grow on trees",
+            }
+            for i in range(25)
+        ]
+        questions.append(
+            {
+                "question": "Is this too long?",
+                "incorrect answers": ["No"],
+                "correct_answer": "Yes" * 100,
+                "explanation": "",
+            }
+        )
+        questions.append({"question": "Where are the answers?"})
+        Path(self.directory.name, "fruits.json").write_text(json.dumps(questions))
+        Path(self.directory.name, "notes.txt").write_text("not questions")
+
+    def load(self, **kwargs):
+        loader = DatabaseLoader(
+            self.directory.name, self.user, self.category, chunk_size=10, **kwargs
+        )
+        return loader.run()
+
+    def test_load(self):
+        report = self.load()
+        self.assertEqual((report.created, report.answers, report.failed), (25, 75, 2))
+        self.assertEqual(Question.objects.count(), 25)
+        self.assertEqual(InCorrectAnswer.objects.count(), 75)
+        self.assertFalse(Question.objects.filter(is_verified=True).exists())
+        question = Question.objects.get(question="3 Which is a fruit?")
+        self.assertEqual(question.created_by, self.user)
+        self.assertEqual(question.category, self.category)
+        self.assertTrue(question.terms.filter(term="yam").exists())
+        self.assertGreater(report.rows_per_second, 0)
+
+    def test_load_verified(self):
+        self.load(verify=True)
+        self.assertEqual(Question.verified.count(), 25)
+        self.assertFalse(Question.verified.filter(date_verified=None).exists())
+        self.assertEqual(
+            set(Question.verified.values_list("verified_by", flat=True)),
+            {self.user.id},
+        )
+
+    def test_load_without_returning(self):
+        """
+        confirms questions are bulk inserted on backends that cannot
+        return the ids of a bulk insert, e.g. MySQL.
+        """
+        returning = mock.patch.object(
+            type(connection.features),
+            "can_return_rows_from_bulk_insert",
+            new_callable=mock.PropertyMock,
+            return_value=False,
+        )
+        with returning, mock.patch.object(Question, "save") as save:
+            with mock.patch("quiz.batch.schedule_deck_refresh") as refresh:
+                report = self.load(verify=True)
+        save.assert_not_called()
+        self.assertEqual(report.created, 25)
+        refreshed = {id for call in refresh.call_args_list for id, _ in call.args[0]}
+        self.assertEqual(refreshed, set(Question.verified.values_list("id", flat=True)))
+        for question in Question.objects.all():
+            self.assertEqual(question.incorrect_answers.count(), 3)
+            self.assertTrue(question.terms.filter(term="yam").exists())
+
+    def test_dry_run(self):
+        report = self.load(dry_run=True)
+        self.assertEqual((report.created, report.failed), (25, 2))
+        self.assertEqual(Question.objects.count(), 0)
+
+    def test_skips_duplicates(self):
+        copies = [
+            {
+                "question": f"{i}  which IS a fruit?",
+                "incorrect answers": ["Yam", "Beans", "Rice"],
+                "correct_answer": "Apple",
+                "explanation": "",
+            }
+            for i in (3, 30, 30)
+        ]
+        Path(self.directory.name, "copies.json").write_text(json.dumps(copies))
+        report = self.load()
+        self.assertEqual((report.created, report.duplicates), (26, 2))
+        report = self.load()
+        self.assertEqual((report.created, report.duplicates), (0, 28))
+        self.assertEqual(Question.objects.count(), 26)
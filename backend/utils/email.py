@@ -1,11 +1,34 @@
-from django.template.loader import render_to_string
+import functools
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
+from django.template.loader import get_template
 
 
-def send_email(template_path, recipient, link, site_name, **kwargs):
-    email_body = render_to_string(
-        template_path, {"link": link, "site_name": site_name, **kwargs}
+@functools.lru_cache(maxsize=None)
+def _compiled_template(template_path):
+    return get_template(template_path)
+
+
+def compiled_template(template_path):
+    """
+    returns the template of template_path, compiled once per process
+    unless DEBUG is on, so edited templates are picked up while developing.
+    """
+    if settings.DEBUG:
+        return get_template(template_path)
+    return _compiled_template(template_path)
+
+
+def render_email(template_path, recipient, link, site_name, **kwargs) -> EmailMessage:
+    email_body = compiled_template(template_path).render(
+        {"link": link, "site_name": site_name, **kwargs}
     )
     email_subject = f"{site_name}: Email Account Verification"
-    send_mail(email_subject, email_body, settings.DEFAULT_FROM_EMAIL, [recipient])
+    return EmailMessage(
+        email_subject, email_body, settings.DEFAULT_FROM_EMAIL, [recipient]
+    )
+
+
+def send_email(template_path, recipient, link, site_name, **kwargs):
+    render_email(template_path, recipient, link, site_name, **kwargs).send()
@@ -0,0 +1,16 @@
+from config import celery_app
+from django.test import override_settings
+
+
+def run_tasks_eagerly(test):
+    """
+    runs the Celery tasks sent during test in the test process instead
+    of sending them to the broker.
+    """
+    settings = override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    settings.enable()
+    test.addCleanup(settings.disable)
+    # the app read its configuration from the settings already
+    eager = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    test.addCleanup(setattr, celery_app.conf, "task_always_eager", eager)